@@ -0,0 +1,6 @@
+"""
+Benchmark suite for the GitLab Changelog Generator
+
+Synthetic repositories served by a fake GitLab and a fake `gemini` executable,
+so the pipeline can be timed reproducibly without network access.
+"""
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fake Gemini CLI for the benchmark suite
+Stands in for the `gemini` executable: answers --version, categorizes the
+commits of analysis prompts as JSON and returns a canned changelog otherwise,
+after sleeping FAKE_GEMINI_LATENCY seconds (default 0)
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+COMMIT_HEADER = re.compile(r"^## Commit (\S+)$", re.MULTILINE)
+CATEGORIES = ("features", "improvements", "fixes", "performance", "docs", "other")
+
+
+def answer(prompt: str) -> str:
+    """Build the response for a prompt"""
+    commit_ids = COMMIT_HEADER.findall(prompt)
+    if commit_ids:
+        return json.dumps(
+            {
+                "commits": [
+                    {
+                        "id": commit_id,
+                        "category": CATEGORIES[i % len(CATEGORIES)],
+                        "title": f"Change {commit_id}",
+                        "description": "Synthetic analysis",
+                        "technical_details": "Generated by the fake Gemini CLI",
+                        "files_affected": [],
+                    }
+                    for i, commit_id in enumerate(commit_ids)
+                ]
+            }
+        )
+    return "**CHANGELOG - Benchmark**\n\n🟢 Synthetic changelog\n"
+
+
+def main(argv: list) -> int:
+    if "--version" in argv:
+        print("0.0.0-fake")
+        return 0
+
+    if "--prompt" in argv:
+        prompt = argv[argv.index("--prompt") + 1]
+    else:
+        prompt = sys.stdin.read()
+
+    time.sleep(float(os.getenv("FAKE_GEMINI_LATENCY", "0")))
+    print(answer(prompt))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
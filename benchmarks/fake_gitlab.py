@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fake GitLab Server for the benchmark suite
+Serves a SyntheticRepo through the subset of the GitLab REST API v4 used by
+the changelog generator, with optional per-request latency
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlencode, urlparse
+from .synthetic_repo import SyntheticRepo
+
+PROJECT_ROUTE = re.compile(r"^/api/v4/projects/(?P<id>[^/]+)(?P<rest>/.*)?$")
+COMMIT_ROUTE = re.compile(
+    r"^/repository/commits/(?P<sha>[0-9a-f]+)(?P<diff>/diff)?$"
+)
+
+
+class FakeGitLabServer:
+    """Local stand-in for GitLab serving one synthetic project"""
+
+    def __init__(
+        self,
+        repo: SyntheticRepo,
+        project_id: str = "1",
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Initialize the server (port 0 picks a free port)
+
+        Args:
+            repo: Repository served as the project
+            project_id: ID the project answers to
+            latency: Seconds added to every request
+        """
+        self.repo = repo
+        self.project_id = str(project_id)
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        handler = type(
+            "FakeGitLabHandler", (_FakeGitLabHandler,), {"server_ref": self}
+        )
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGitLabServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> "FakeGitLabServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+
+class _FakeGitLabHandler(BaseHTTPRequestHandler):
+    """Routes GitLab API requests to the synthetic repository"""
+
+    server_ref: FakeGitLabServer = None
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body, headers: Dict = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_page(self, items: List, query: Dict) -> None:
+        """Send one page of a list with GitLab's pagination headers"""
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", ["20"])[0])
+        total_pages = max(1, -(-len(items) // per_page))
+        headers = {
+            "X-Page": str(page),
+            "X-Per-Page": str(per_page),
+            "X-Total": str(len(items)),
+            "X-Total-Pages": str(total_pages),
+        }
+        if page < total_pages:
+            next_query = {key: values[0] for key, values in query.items()}
+            next_query["page"] = str(page + 1)
+            path = urlparse(self.path).path
+            next_url = f"{self.server_ref.url}{path}?{urlencode(next_query)}"
+            headers["X-Next-Page"] = str(page + 1)
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        start = (page - 1) * per_page
+        self._send_json(200, items[start : start + per_page], headers)
+
+    def do_GET(self) -> None:
+        fake = self.server_ref
+        fake.count_request()
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        repo = fake.repo
+
+        if parsed.path == "/api/v4/user":
+            self._send_json(200, {"id": 1, "username": "benchmark"})
+            return
+
+        match = PROJECT_ROUTE.match(parsed.path)
+        if not match or match.group("id") != fake.project_id:
+            self._send_json(404, {"message": "404 Project Not Found"})
+            return
+
+        rest = match.group("rest") or ""
+        if rest == "":
+            self._send_json(
+                200,
+                {
+                    "id": int(fake.project_id),
+                    "name": repo.name,
+                    "path": repo.name,
+                    "path_with_namespace": f"benchmarks/{repo.name}",
+                },
+            )
+        elif rest == "/repository/tags":
+            tags = [
+                {"name": name, "commit": repo.commit(sha)} for name, sha in repo.tags
+            ]
+            self._send_page(tags, query)
+        elif rest == "/repository/compare":
+            try:
+                commits = repo.compare(query["from"][0], query["to"][0])
+            except KeyError:
+                self._send_json(404, {"message": "404 Ref Not Found"})
+                return
+            self._send_json(
+                200, {"commits": commits, "diffs": [], "compare_timeout": False}
+            )
+        else:
+            commit_match = COMMIT_ROUTE.match(rest)
+            sha = commit_match.group("sha") if commit_match else None
+            if sha not in repo.diffs:
+                self._send_json(404, {"message": "404 Commit Not Found"})
+            elif commit_match.group("diff"):
+                self._send_page(repo.diffs[sha], query)
+            else:
+                self._send_json(200, repo.commit(sha))
+
+    def log_message(self, format: str, *args) -> None:
+        # Keep benchmark output readable
+        pass
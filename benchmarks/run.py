@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark Runner for GitLab Changelog Generator
+Runs ChangelogGenerator.generate against synthetic repositories served by a
+fake GitLab with a fake `gemini` executable, timing every stage and recording
+peak memory, cache size and GitLab requests as JSON
+
+Usage (from the repository root):
+    python -m benchmarks.run --sizes 100,1000,10000 --profiles small,large
+    python -m benchmarks.run --sizes 100 --compare benchmarks/results/old.json
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+from src import __version__
+from src.changelog_generator import ChangelogGenerator
+from .fake_gitlab import FakeGitLabServer
+from .synthetic_repo import DIFF_PROFILES, SyntheticRepo
+
+# Generator methods timed as stages, in pipeline order
+STAGES = (
+    "connect_source",
+    "connect_gemini",
+    "get_tags",
+    "get_commits_between_tags",
+    "deduplicate_commits",
+    "get_commit_details",
+    "analyze_commits_with_cli",
+    "build_summary_context",
+    "generate_commercial_changelog",
+    "generate_technical_changelog",
+    "save_changelogs",
+)
+
+# Each scenario runs twice in the same workspace: empty caches, then warm caches
+PASSES = ("cold", "warm")
+
+FAKE_GEMINI = Path(__file__).resolve().parent / "fake_gemini.py"
+
+
+def instrument(generator: ChangelogGenerator, timings: Dict[str, float]) -> None:
+    """Wrap the stage methods of a generator to accumulate their elapsed time"""
+    for name in STAGES:
+        method = getattr(generator, name)
+
+        @functools.wraps(method)
+        def timed(*args, _method=method, _name=name, **kwargs):
+            started = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                timings[_name] = timings.get(_name, 0.0) + elapsed
+
+        setattr(generator, name, timed)
+
+
+def install_fake_gemini(bin_dir: Path) -> None:
+    """Put a `gemini` executable running the fake CLI in bin_dir"""
+    shim = bin_dir / "gemini"
+    shim.write_text(
+        f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_GEMINI}" "$@"\n', encoding="utf-8"
+    )
+    shim.chmod(shim.stat().st_mode | stat.S_IEXEC)
+
+
+def directory_size(path: Path) -> Tuple[int, int]:
+    """Total bytes and number of files under a directory"""
+    total = files = 0
+    for file in path.rglob("*"):
+        if file.is_file():
+            total += file.stat().st_size
+            files += 1
+    return total, files
+
+
+@contextlib.contextmanager
+def patched_environ(values: Dict[str, str]):
+    """Temporarily set environment variables"""
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def run_scenario(
+    commits: int, profile: str, args: argparse.Namespace, bin_dir: Path
+) -> List[Dict]:
+    """Benchmark one repository size and diff profile, cold then warm"""
+    repo = SyntheticRepo(commits, profile, seed=args.seed)
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix="changelog-bench-") as workspace:
+        workspace = Path(workspace)
+        with FakeGitLabServer(repo, latency=args.gitlab_latency) as server:
+            env = {
+                "GITLAB_URL": server.url,
+                "GITLAB_ACCESS_TOKEN": "benchmark",
+                "GITLAB_PROJECT_ID": server.project_id,
+                # Empty values keep a local .env from pointing elsewhere
+                "LOCAL_REPO_PATH": "",
+                "FAKE_GEMINI_LATENCY": str(args.gemini_latency),
+                "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+            }
+            cwd = os.getcwd()
+            os.chdir(workspace)
+            try:
+                with patched_environ(env):
+                    for pass_name in PASSES:
+                        results.append(
+                            run_pass(repo, server, pass_name, args, workspace)
+                        )
+            finally:
+                os.chdir(cwd)
+    return results
+
+
+def run_pass(
+    repo: SyntheticRepo,
+    server: FakeGitLabServer,
+    pass_name: str,
+    args: argparse.Namespace,
+    workspace: Path,
+) -> Dict:
+    """Run one generation and collect its measurements"""
+    generator = ChangelogGenerator(
+        use_cache=True,
+        fetch_workers=args.fetch_workers,
+        analysis_workers=args.analysis_workers,
+        show_spinners=False,
+        cache_engine=args.cache_engine,
+    )
+    timings = {}
+    instrument(generator, timings)
+
+    requests_before = server.requests
+    if args.memory:
+        tracemalloc.start()
+    output = io.StringIO()
+    started = time.perf_counter()
+    error = None
+    try:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+            generator.generate("v1.0.0", "v2.0.0")
+    except Exception as e:
+        error = str(e)
+    total = time.perf_counter() - started
+    peak_memory = None
+    if args.memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    cache_bytes, cache_files = directory_size(workspace / ".cache")
+    result = {
+        "commits": repo.commit_count,
+        "diff_profile": repo.diff_profile,
+        "pass": pass_name,
+        "total_seconds": round(total, 4),
+        "stages": {name: round(timings.get(name, 0.0), 4) for name in STAGES},
+        "peak_memory_bytes": peak_memory,
+        "cache_bytes": cache_bytes,
+        "cache_files": cache_files,
+        "gitlab_requests": server.requests - requests_before,
+        # Run metrics recorded by the generator (cache hits, prompt sizes, ...)
+        "counters": generator.metrics.to_dict()["counters"],
+        "error": error,
+    }
+    status = f"❌ {error}" if error else "✅"
+    print(
+        f"   {status} {repo.name} [{pass_name}]: {total:.2f}s, "
+        f"{result['gitlab_requests']} GitLab requests, "
+        f"cache {cache_bytes / 1024:.0f} KiB"
+        + (f", peak {peak_memory / 1024 / 1024:.1f} MiB" if peak_memory else "")
+    )
+    return result
+
+
+def git_revision() -> str:
+    """Commit of the benchmarked tree, if it is a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current: Dict, baseline_file: str, threshold: float) -> List[str]:
+    """Print the change against a previous report, returning the regressions"""
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def key(scenario: Dict) -> Tuple:
+        return scenario["commits"], scenario["diff_profile"], scenario["pass"]
+
+    previous = {key(scenario): scenario for scenario in baseline["scenarios"]}
+    regressions = []
+    print(f"\n📊 Compared with {baseline_file} ({baseline.get('git_revision')})")
+    for scenario in current["scenarios"]:
+        old = previous.get(key(scenario))
+        if not old or old["error"] or scenario["error"]:
+            continue
+        label = "{}-{} [{}]".format(*key(scenario))
+        metrics = [("total", old["total_seconds"], scenario["total_seconds"])]
+        metrics += [
+            (name, old["stages"].get(name, 0.0), scenario["stages"][name])
+            for name in STAGES
+        ]
+        for name, before, after in metrics:
+            # Ignore stages too short to compare reliably
+            if before < 0.01:
+                continue
+            change = (after - before) / before
+            if change > threshold:
+                regressions.append(f"{label} {name}: {before:.3f}s → {after:.3f}s")
+            if name == "total" or change > threshold:
+                print(
+                    f"   {label} {name}: {before:.3f}s → {after:.3f}s ({change:+.0%})"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the changelog pipeline against synthetic repositories"
+    )
+    parser.add_argument(
+        "--sizes", default="100,1000,10000", help="Commits per release (comma list)"
+    )
+    parser.add_argument(
+        "--profiles",
+        default="medium",
+        help=f"Diff size profiles (comma list of {', '.join(DIFF_PROFILES)})",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed")
+    parser.add_argument(
+        "--gitlab-latency", type=float, default=0.0, help="Seconds per GitLab request"
+    )
+    parser.add_argument(
+        "--gemini-latency", type=float, default=0.0, help="Seconds per gemini call"
+    )
+    parser.add_argument(
+        "--cache-engine", choices=("json", "sqlite"), default="json"
+    )
+    parser.add_argument("--fetch-workers", type=int, default=4)
+    parser.add_argument("--analysis-workers", type=int, default=4)
+    parser.add_argument(
+        "--no-memory",
+        dest="memory",
+        action="store_false",
+        help="Skip peak memory tracking (tracemalloc slows the run down)",
+    )
+    parser.add_argument(
+        "--output",
+        help="Report file (default: benchmarks/results/benchmark_<timestamp>.json)",
+    )
+    parser.add_argument("--compare", help="Previous report to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative slowdown reported as a regression (default: 0.10)",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show the generator output"
+    )
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    profiles = args.profiles.split(",")
+    report = {
+        "version": __version__,
+        "git_revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare", "verbose")
+        },
+        "scenarios": [],
+    }
+
+    print(f"\n⏱️  Benchmarking {len(sizes) * len(profiles)} scenarios")
+    with tempfile.TemporaryDirectory(prefix="changelog-bench-bin-") as bin_dir:
+        install_fake_gemini(Path(bin_dir))
+        for profile in profiles:
+            for commits in sizes:
+                report["scenarios"].extend(
+                    run_scenario(commits, profile, args, Path(bin_dir))
+                )
+
+    output = Path(
+        args.output
+        or Path(__file__).resolve().parent
+        / "results"
+        / f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n📁 Report: {output}")
+
+    failed = any(scenario["error"] for scenario in report["scenarios"])
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        if regressions:
+            print(
+                f"\n⚠️  {len(regressions)} regressions above {args.threshold:.0%}"
+            )
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Synthetic Repository for the benchmark suite
+Generates a deterministic linear history (commits, diffs and tags) that the
+fake GitLab server serves in the GitLab API format
+"""
+
+import hashlib
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+# Diff size profiles: (max files per commit, max diff lines per file)
+DIFF_PROFILES = {
+    "small": (2, 10),
+    "medium": (6, 60),
+    "large": (15, 400),
+}
+
+_PREFIXES = ("feat", "fix", "refactor", "perf", "docs", "test", "chore")
+_AREAS = ("api", "auth", "billing", "ui", "reports", "search", "jobs", "db")
+
+
+class SyntheticRepo:
+    """Linear history of N commits between two tags, generated from a seed"""
+
+    def __init__(self, commits: int, diff_profile: str = "medium", seed: int = 0):
+        """
+        Generate the repository
+
+        Args:
+            commits: Commits in the release range (v1.0.0..v2.0.0)
+            diff_profile: Key of DIFF_PROFILES (diff size of each commit)
+            seed: Random seed, so every run serves identical data
+        """
+        if diff_profile not in DIFF_PROFILES:
+            raise ValueError(f"Unknown diff profile: {diff_profile}")
+        self.commit_count = commits
+        self.diff_profile = diff_profile
+        self.seed = seed
+        self.max_files, self.max_lines = DIFF_PROFILES[diff_profile]
+
+        rng = random.Random(f"{seed}:{commits}:{diff_profile}")
+        started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+        # Commit 0 is the previous release; the range holds the next N commits
+        self.commits: List[Dict] = []
+        self.diffs: Dict[str, List[Dict]] = {}
+        parent = None
+        for i in range(commits + 1):
+            sha = hashlib.sha1(f"{seed}:{diff_profile}:{i}".encode()).hexdigest()
+            diff = self._make_diff(rng, i)
+            title = f"{rng.choice(_PREFIXES)}({rng.choice(_AREAS)}): change {i}"
+            additions = sum(d["diff"].count("\n+") for d in diff)
+            deletions = sum(d["diff"].count("\n-") for d in diff)
+            self.commits.append(
+                {
+                    "id": sha,
+                    "short_id": sha[:8],
+                    "title": title,
+                    "message": f"{title}\n\nSynthetic commit {i} for benchmarks.\n",
+                    "author_name": f"dev{i % 7}",
+                    "author_email": f"dev{i % 7}@example.com",
+                    "created_at": (started + timedelta(minutes=i)).isoformat(),
+                    "parent_ids": [parent] if parent else [],
+                    "stats": {
+                        "additions": additions,
+                        "deletions": deletions,
+                        "total": additions + deletions,
+                    },
+                }
+            )
+            self.diffs[sha] = diff
+            parent = sha
+
+        self._positions = {c["id"]: i for i, c in enumerate(self.commits)}
+        # Newest first, like the GitLab tags API ordered by update
+        self.tags: List[Tuple[str, str]] = [
+            ("v2.0.0", self.commits[-1]["id"]),
+            ("v1.0.0", self.commits[0]["id"]),
+        ]
+
+    def _make_diff(self, rng: random.Random, index: int) -> List[Dict]:
+        """Unified diffs for a commit, sized by the diff profile"""
+        diff = []
+        for f in range(rng.randint(1, self.max_files)):
+            path = f"src/{rng.choice(_AREAS)}/module_{(index + f) % 97}.py"
+            lines = rng.randint(1, self.max_lines)
+            body = [f"@@ -1,{lines} +1,{lines} @@"]
+            for n in range(lines):
+                sign = "+" if n % 3 else "-"
+                body.append(f"{sign}    value_{n} = compute_{index}_{n}(payload)")
+            diff.append(
+                {
+                    "old_path": path,
+                    "new_path": path,
+                    "a_mode": "100644",
+                    "b_mode": "100644",
+                    "new_file": False,
+                    "renamed_file": False,
+                    "deleted_file": False,
+                    "diff": "\n".join(body) + "\n",
+                }
+            )
+        return diff
+
+    @property
+    def name(self) -> str:
+        return f"synthetic-{self.commit_count}-{self.diff_profile}"
+
+    def tag_sha(self, ref: str) -> str:
+        """Resolve a tag name or SHA"""
+        for name, sha in self.tags:
+            if name == ref:
+                return sha
+        return ref
+
+    def compare(self, from_ref: str, to_ref: str) -> List[Dict]:
+        """Commits in from_ref..to_ref, oldest first"""
+        start = self._positions[self.tag_sha(from_ref)]
+        end = self._positions[self.tag_sha(to_ref)]
+        return self.commits[start + 1 : end + 1]
+
+    def commit(self, sha: str) -> Dict:
+        return self.commits[self._positions[sha]]
@@ -12,33 +12,297 @@ It analyzes commits between the last two tags using Gemini AI.
 """
 
 import argparse
+from dotenv import load_dotenv
+from src.cache_manager import print_cache_report
 from src.changelog_generator import ChangelogGenerator
+from src.diff_retention import DiffRetentionPolicy
+from src.diff_selection import DiffSelector
+from src.multi_project import MultiProjectRunner, load_project_specs
+from src.service import ChangelogService, serve
 
 
 def main():
     """Entry point for the script"""
+    # Before anything reads its configuration: argparse defaults, the cache
+    # limits, the diff policy and the service and multi-project settings all
+    # fall back to the environment
+    load_dotenv()
+
     parser = argparse.ArgumentParser(
         description="Generate changelogs from GitLab commits between tags"
     )
     parser.add_argument("--from-tag", help="Older tag to start from")
     parser.add_argument("--to-tag", help="Newer tag to end at")
+    parser.add_argument(
+        "--ranges",
+        help="Batch mode: comma-separated release ranges to generate in one run, "
+        'e.g. "v1.0..v1.1,v1.1..v1.2" (a single tag means previous tag..tag)',
+    )
+    parser.add_argument(
+        "--last",
+        type=int,
+        help="Batch mode: generate changelogs for the last N releases",
+    )
+    parser.add_argument(
+        "--projects",
+        help="Multi-project mode: comma-separated GitLab project IDs generated "
+        "concurrently (tag options apply to every project)",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="Multi-project mode: JSON file listing the projects, each with an "
+        'optional name, repo_path and tags, e.g. [{"id": 123, "name": "api"}]',
+    )
+    parser.add_argument(
+        "--max-projects",
+        type=int,
+        help="Projects generated at once in multi-project mode "
+        "(default: MULTI_PROJECT_WORKERS from .env or 4)",
+    )
+    parser.add_argument(
+        "--gitlab-concurrency",
+        type=int,
+        help="GitLab requests in flight across all projects in multi-project and "
+        "service mode (default: GITLAB_GLOBAL_CONCURRENCY from .env or 8)",
+    )
+    parser.add_argument(
+        "--gemini-concurrency",
+        type=int,
+        help="Gemini CLI processes or API requests in flight across all projects "
+        "in multi-project and service mode "
+        "(default: GEMINI_GLOBAL_CONCURRENCY from .env or 4)",
+    )
+    parser.add_argument(
+        "--combined-summary",
+        action="store_true",
+        help="Multi-project mode: also write one markdown file with every "
+        "project's commercial changelog",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Service mode: run a local HTTP API that queues generation jobs "
+        "(POST /jobs, POST /webhooks/gitlab) and keeps clients and caches warm",
+    )
+    parser.add_argument(
+        "--host",
+        help="Service mode bind address (default: SERVICE_HOST from .env or 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="Service mode port (default: SERVICE_PORT from .env or 8765)",
+    )
+    parser.add_argument(
+        "--service-workers",
+        type=int,
+        help="Jobs run at once in service mode "
+        "(default: SERVICE_WORKERS from .env or 2)",
+    )
     parser.add_argument(
         "--cache",
         action="store_true",
         help="Enable caching for commits and commit details to allow recovery from interruptions",
     )
+    parser.add_argument(
+        "--cache-engine",
+        choices=("json", "sqlite"),
+        help="Cache storage: one JSON file per entry, or a single SQLite database "
+        "safe to share between concurrent jobs (default: CACHE_ENGINE or json)",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Show the cache entries, size, hit rate and largest ranges, then exit",
+    )
+    parser.add_argument(
+        "--cache-gc",
+        action="store_true",
+        help="Evict cache entries older than CACHE_TTL_DAYS and the least recently "
+        "used beyond CACHE_MAX_MB, then show the cache stats and exit",
+    )
+    parser.add_argument(
+        "--refresh-tags",
+        action="store_true",
+        help="Re-download the full tag list instead of syncing only new tags",
+    )
     parser.add_argument(
         "--api",
         action="store_true",
         help="Use Gemini API instead of Gemini CLI (requires GEMINI_TOKEN in .env)",
     )
+    parser.add_argument(
+        "--repo-path",
+        help="Read tags, commits and diffs from a local git clone instead of the "
+        "GitLab API (default: LOCAL_REPO_PATH from .env)",
+    )
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        help="Number of concurrent workers used to fetch commit details "
+        "(default: GITLAB_FETCH_WORKERS from .env or 1)",
+    )
+    parser.add_argument(
+        "--diff-max-files",
+        type=int,
+        help="Files kept per commit diff after fetching "
+        "(default: DIFF_MAX_FILES from .env or 10)",
+    )
+    parser.add_argument(
+        "--diff-max-lines",
+        type=int,
+        help="Diff lines kept per file after fetching "
+        "(default: DIFF_MAX_LINES from .env or 20)",
+    )
+    parser.add_argument(
+        "--diff-byte-budget",
+        type=int,
+        help="Diff characters kept per commit, filled with the most relevant hunks "
+        "(default: DIFF_BYTE_BUDGET from .env or 4000, 0 = unlimited)",
+    )
+    parser.add_argument(
+        "--no-diff-filter",
+        action="store_true",
+        help="Keep lockfiles, generated and vendored files and GitLab's file order "
+        "in the diffs",
+    )
+    parser.add_argument(
+        "--analysis-workers",
+        type=int,
+        help="Number of concurrent Gemini CLI processes used for batch analysis "
+        "(default: GEMINI_ANALYSIS_WORKERS from .env or 1)",
+    )
+    parser.add_argument(
+        "--api-concurrency",
+        type=int,
+        help="Maximum in-flight Gemini API requests in API mode "
+        "(default: GEMINI_API_CONCURRENCY from .env or 4)",
+    )
+    parser.add_argument(
+        "--api-batch-analysis",
+        action="store_true",
+        help="In API mode, analyze commit batches with parallel requests before "
+        "generating the changelogs (recommended for large releases)",
+    )
+    parser.add_argument(
+        "--batch-token-budget",
+        type=int,
+        help="Estimated prompt tokens packed into each analysis batch "
+        "(default: GEMINI_BATCH_TOKEN_BUDGET from .env or 12000)",
+    )
+    parser.add_argument(
+        "--summary-token-budget",
+        type=int,
+        help="Estimated tokens of the summary sent to the changelog generations; "
+        "larger summaries are condensed by category first "
+        "(default: GEMINI_SUMMARY_TOKEN_BUDGET from .env or 30000)",
+    )
+    parser.add_argument(
+        "--metrics-report",
+        help="Write a JSON run report with per-stage timings and counters "
+        "(GitLab calls and bytes, cache hits, prompt sizes, Gemini time)",
+    )
+    parser.add_argument(
+        "--metrics-prometheus",
+        help="Also write the run metrics as a Prometheus textfile "
+        "(e.g. for node_exporter's textfile collector)",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Bypass the persistent Gemini response cache (.cache/llm)",
+    )
+    parser.add_argument(
+        "--no-analysis-store",
+        action="store_true",
+        help="Re-analyze every commit instead of reusing the per-commit analyses "
+        "stored by earlier releases (.cache/analysis)",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Fetch and analyze merge commits, cherry-picks and revert pairs too",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write the changelogs to their files while Gemini generates them "
+        "(and print them as they arrive in CLI mode)",
+    )
     args = parser.parse_args()
 
     try:
+        if args.cache_stats or args.cache_gc:
+            # Cache maintenance does not need GitLab or Gemini credentials
+            print_cache_report(gc=args.cache_gc)
+            return
+
         # Use CLI by default, unless --api flag is provided
         use_cli = not args.api
-        generator = ChangelogGenerator(use_cache=args.cache, use_cli=use_cli)
-        generator.generate(args.from_tag, args.to_tag)
+        generator_options = dict(
+            use_cache=args.cache,
+            use_cli=use_cli,
+            fetch_workers=args.fetch_workers,
+            use_llm_cache=not args.no_llm_cache,
+            use_analysis_store=not args.no_analysis_store,
+            deduplicate=not args.no_dedup,
+            stream=args.stream,
+            cache_engine=args.cache_engine,
+            analysis_workers=args.analysis_workers,
+            api_concurrency=args.api_concurrency,
+            api_batch_analysis=args.api_batch_analysis,
+            batch_token_budget=args.batch_token_budget,
+            summary_token_budget=args.summary_token_budget,
+            refresh_tags=args.refresh_tags,
+            diff_retention=DiffRetentionPolicy(
+                max_files=args.diff_max_files,
+                max_lines=args.diff_max_lines,
+                selector=DiffSelector(
+                    byte_budget=args.diff_byte_budget,
+                    enabled=not args.no_diff_filter,
+                ),
+            ),
+        )
+        if args.serve:
+            service = ChangelogService(
+                generator_options=generator_options,
+                workers=args.service_workers,
+                gitlab_concurrency=args.gitlab_concurrency,
+                gemini_concurrency=args.gemini_concurrency,
+            )
+            serve(service, host=args.host, port=args.port)
+            return
+
+        if args.projects or args.manifest:
+            runner = MultiProjectRunner(
+                load_project_specs(args.projects, args.manifest),
+                generator_options=dict(
+                    generator_options,
+                    from_tag=args.from_tag,
+                    to_tag=args.to_tag,
+                    ranges=args.ranges.split(",") if args.ranges else None,
+                    last=args.last,
+                ),
+                max_projects=args.max_projects,
+                gitlab_concurrency=args.gitlab_concurrency,
+                gemini_concurrency=args.gemini_concurrency,
+            )
+            results = runner.run(combined_summary=args.combined_summary)
+            failed = [result for result in results if result["error"]]
+            if failed:
+                raise RuntimeError(f"{len(failed)} of {len(results)} projects failed")
+            return
+
+        generator = ChangelogGenerator(**generator_options, repo_path=args.repo_path)
+        try:
+            if args.ranges or args.last:
+                ranges = args.ranges.split(",") if args.ranges else None
+                generator.generate_many(ranges=ranges, last=args.last)
+            else:
+                generator.generate(args.from_tag, args.to_tag)
+        finally:
+            # Failed and interrupted runs are the ones worth inspecting
+            generator.export_metrics(args.metrics_report, args.metrics_prometheus)
     except KeyboardInterrupt:
         print("\n\n⚠️  Process interrupted by user")
         import sys
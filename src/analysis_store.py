@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Analysis Store for GitLab Changelog Generator
+Persists the per-commit analysis records returned by the batch analysis so a
+re-cut release (rc1 -> rc2) only sends the commits not analyzed yet to Gemini
+
+Records live in analysis/<prompt_version>/<sha[:2]>/<sha>.json: a commit is
+immutable by SHA, and changing the analysis prompt starts a new namespace.
+Reads refresh a record's access time, so the cache gc (CACHE_TTL_DAYS and
+CACHE_MAX_MB) expires and evicts records like commit objects.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Fields kept from each analysis record
+RECORD_FIELDS = (
+    "category",
+    "title",
+    "description",
+    "technical_details",
+    "files_affected",
+)
+
+# Shortest commit ID prefix accepted when matching records to commits
+MIN_SHA_PREFIX = 7
+
+
+class AnalysisStore:
+    """SHA-keyed store of per-commit analysis records, versioned by prompt"""
+
+    def __init__(self, cache_dir: str, prompt_version: str):
+        """Initialize the store for one analysis prompt version"""
+        self.store_dir = Path(cache_dir) / "analysis" / prompt_version
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.prompt_version = prompt_version
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _record_path(self, sha: str) -> Path:
+        return self.store_dir / sha[:2] / f"{sha}.json"
+
+    def get(self, sha: str) -> Optional[Dict]:
+        """Return the stored analysis record of a commit, or None"""
+        record_file = self._record_path(sha)
+        try:
+            with open(record_file, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            # Refresh the access time used by the cache gc
+            os.utime(record_file)
+        except Exception:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return record
+
+    def set(self, sha: str, record: Dict) -> Dict:
+        """Store the analysis record of a commit atomically, returning it"""
+        data = {"id": sha}
+        data.update(
+            {field: record[field] for field in RECORD_FIELDS if field in record}
+        )
+
+        record_file = self._record_path(sha)
+        record_file.parent.mkdir(exist_ok=True)
+        tmp_file = record_file.with_suffix(
+            f".{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_file, record_file)
+        return data
+
+    def lookup(self, shas: Iterable[str]) -> Dict[str, Dict]:
+        """Return the stored records of the given commits, keyed by SHA"""
+        records = {}
+        for sha in shas:
+            record = self.get(sha)
+            if record is not None:
+                records[sha] = record
+        return records
+
+    def store_batch_results(
+        self, batch_results: List[Dict], shas: Iterable[str]
+    ) -> Tuple[Dict[str, Dict], List[Dict]]:
+        """
+        Store the records of analyzed batches
+
+        Args:
+            batch_results: Parsed batch responses ({"commits": [...]})
+            shas: Full SHAs of the commits sent for analysis; the model may
+                echo abbreviated IDs, which are matched by prefix
+
+        Returns:
+            The stored records keyed by full SHA, and the records that could
+            not be matched to a single commit (kept for this run only)
+        """
+        shas = list(shas)
+        stored = {}
+        unmatched = []
+        for batch in batch_results:
+            for record in batch.get("commits", []):
+                record_id = str(record.get("id", ""))
+                matches = []
+                if len(record_id) >= MIN_SHA_PREFIX:
+                    matches = [sha for sha in shas if sha.startswith(record_id)]
+                if len(matches) != 1 or matches[0] in stored:
+                    unmatched.append(record)
+                    continue
+                stored[matches[0]] = self.set(matches[0], record)
+        return stored, unmatched
+
+    def summary(self) -> str:
+        """Human readable hit/miss summary"""
+        return f"Analysis store: {self.hits} hits, {self.misses} misses"
@@ -4,27 +4,163 @@
 """
 Cache Manager for GitLab Changelog Generator
 Handles caching of commits and commit details to allow recovery from interruptions
+
+Commits are immutable by SHA, so commit metadata and details live in a global
+content-addressed store (objects/<sha[:2]>/<sha>.json) shared by every tag
+range. Each (from_tag, to_tag) pair only stores the ordered list of SHAs in
+the range.
+
+Objects are gzip-compressed (plain JSON objects from older versions are still
+read) and the store is bounded: reads refresh an object's access time, and
+`gc` drops entries unused for longer than the TTL, then the least recently
+used ones until the store fits in its size budget. The per-commit analysis
+records (analysis/) share the TTL and the budget; the LLM response cache
+(llm/) keeps its own bounds (LLM_CACHE_*), which `gc` enforces too.
 """
 
+import gzip
 import json
 import hashlib
+import os
+import shutil
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+from .llm_cache import LLMResponseCache
+
+# Hit/miss counters accumulated across runs, for `--cache-stats`
+STATS_FILE = "stats.json"
 
 
 class CacheManager:
     """Manages caching of commits and commit details"""
 
-    def __init__(self, cache_dir: str = ".cache"):
-        """Initialize cache manager with cache directory"""
+    def __init__(
+        self,
+        cache_dir: str = ".cache",
+        max_bytes: int = None,
+        ttl_seconds: float = None,
+        compress: bool = None,
+    ):
+        """
+        Initialize cache manager with cache directory
+
+        Limits default to CACHE_MAX_MB (2048, 0 = unbounded), CACHE_TTL_DAYS
+        (90) and CACHE_COMPRESS (1) from the environment.
+        """
         self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(exist_ok=True)
+        # Serializes read-modify-write cycles on the object files
+        self._lock = threading.Lock()
+
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("CACHE_MAX_MB", "2048")) * 1024 * 1024)
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("CACHE_TTL_DAYS", "90")) * 86400
+        if compress is None:
+            compress = os.getenv("CACHE_COMPRESS", "1") != "0"
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.compress = compress
+
+        # Lookups of this run, added to the persisted counters by save_stats
+        self.hits = 0
+        self.misses = 0
 
-    def _generate_cache_key(self, from_tag: str, to_tag: str, cache_type: str) -> str:
+        self._migrate_legacy_cache()
+
+    def _generate_cache_key(
+        self, from_tag: str, to_tag: str, cache_type: str, extension: str = "json"
+    ) -> str:
         """Generate a unique cache key based on tags and cache type"""
         key_string = f"{from_tag}:{to_tag}:{cache_type}"
         hash_key = hashlib.md5(key_string.encode()).hexdigest()
-        return f"{cache_type}_{from_tag}_{to_tag}_{hash_key}.json"
+        return f"{cache_type}_{from_tag}_{to_tag}_{hash_key}.{extension}"
+
+    def _object_paths(self, sha: str) -> Tuple[Path, Path]:
+        """Compressed and plain paths of the object for a commit SHA"""
+        object_dir = self.objects_dir / sha[:2]
+        return object_dir / f"{sha}.json.gz", object_dir / f"{sha}.json"
+
+    def _object_path(self, sha: str) -> Path:
+        """Path new objects are written to for a commit SHA"""
+        compressed, plain = self._object_paths(sha)
+        return compressed if self.compress else plain
+
+    def _read_object(self, sha: str) -> Optional[Dict]:
+        """Read a commit object from the store, refreshing its access time"""
+        for object_file in self._object_paths(sha):
+            try:
+                if object_file.suffix == ".gz":
+                    data = json.loads(gzip.decompress(object_file.read_bytes()))
+                else:
+                    with open(object_file, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+            except FileNotFoundError:
+                continue
+            except Exception:
+                return None
+            # Access time used for LRU eviction (atime is often disabled)
+            try:
+                os.utime(object_file)
+            except FileNotFoundError:
+                pass
+            return data
+        return None
+
+    def _update_object(self, sha: str, **fields: Any) -> None:
+        """Merge fields into a commit object, writing it atomically"""
+        object_file = self._object_path(sha)
+        with self._lock:
+            data = self._read_object(sha) or {"id": sha}
+            data.update(fields)
+
+            object_file.parent.mkdir(exist_ok=True)
+            payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+            payload = payload.encode("utf-8")
+            if self.compress:
+                # Low level: most of the size gain at a fraction of the CPU cost
+                payload = gzip.compress(payload, compresslevel=3)
+            tmp_file = object_file.with_name(
+                f"{object_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            tmp_file.write_bytes(payload)
+            os.replace(tmp_file, object_file)
+
+            # Drop the copy in the other format (e.g. after enabling compression)
+            for other_file in self._object_paths(sha):
+                if other_file != object_file:
+                    other_file.unlink(missing_ok=True)
+
+    @staticmethod
+    def _serialize_commit(commit: Any) -> Dict:
+        """Convert a commit (metadata dict or GitLab object) to serializable format"""
+        if not isinstance(commit, dict):
+            commit = commit.asdict()
+        return {
+            "id": commit["id"],
+            "title": commit["title"],
+            "message": commit.get("message", ""),
+            "author_name": commit.get("author_name", ""),
+            "created_at": commit.get("created_at", ""),
+            "parent_ids": commit.get("parent_ids", []),
+        }
+
+    def _load_range_shas(self, from_tag: str, to_tag: str) -> Optional[List[str]]:
+        """Load the ordered list of SHAs stored for a tag range"""
+        cache_key = self._generate_cache_key(from_tag, to_tag, "commits")
+        cache_file = self.cache_dir / cache_key
+
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                shas = json.load(f)["shas"]
+        except Exception:
+            return None
+        os.utime(cache_file)
+        return shas
 
     def save_commits_cache(
         self, from_tag: str, to_tag: str, commits: List[Any]
@@ -33,24 +169,17 @@ class CacheManager:
         cache_key = self._generate_cache_key(from_tag, to_tag, "commits")
         cache_file = self.cache_dir / cache_key
 
-        # Convert commit objects to serializable format
-        commits_data = []
+        shas = []
         for commit in commits:
-            commits_data.append(
-                {
-                    "id": commit.id,
-                    "title": commit.title,
-                    "message": getattr(commit, "message", ""),
-                    "author_name": getattr(commit, "author_name", ""),
-                    "created_at": getattr(commit, "created_at", ""),
-                }
-            )
+            commit_data = self._serialize_commit(commit)
+            self._update_object(commit_data["id"], commit=commit_data)
+            shas.append(commit_data["id"])
 
         cache_data = {
             "from_tag": from_tag,
             "to_tag": to_tag,
-            "commits": commits_data,
-            "count": len(commits_data),
+            "shas": shas,
+            "count": len(shas),
         }
 
         with open(cache_file, "w", encoding="utf-8") as f:
@@ -58,65 +187,410 @@ class CacheManager:
 
     def load_commits_cache(self, from_tag: str, to_tag: str) -> Optional[List[Dict]]:
         """Load commits list from cache"""
-        cache_key = self._generate_cache_key(from_tag, to_tag, "commits")
-        cache_file = self.cache_dir / cache_key
-
-        if not cache_file.exists():
+        shas = self._load_range_shas(from_tag, to_tag)
+        if shas is None:
+            self.misses += 1
             return None
 
-        try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                cache_data = json.load(f)
-            return cache_data["commits"]
-        except Exception:
-            return None
+        commits = []
+        for sha in shas:
+            data = self._read_object(sha)
+            if not data or "commit" not in data:
+                # Incomplete (or partly evicted) store: let the caller refetch
+                self.misses += 1
+                return None
+            commits.append(data["commit"])
+        self.hits += 1
+        return commits
 
     def save_commit_detail(
         self, from_tag: str, to_tag: str, commit_id: str, detail: Dict
     ) -> None:
-        """Save a single commit detail to cache"""
-        cache_key = self._generate_cache_key(from_tag, to_tag, "details")
-        cache_file = self.cache_dir / cache_key
+        """Save a single commit detail to the shared commit store"""
+        self._update_object(commit_id, detail=detail)
 
-        # Load existing cache or create new
-        if cache_file.exists():
-            with open(cache_file, "r", encoding="utf-8") as f:
-                cache_data = json.load(f)
-        else:
-            cache_data = {"from_tag": from_tag, "to_tag": to_tag, "details": {}}
+    def load_commit_details(
+        self, from_tag: str, to_tag: str, commit_ids: Iterable[str] = None
+    ) -> Dict[str, Dict]:
+        """Load cached commit details for the range (or for the given SHAs)"""
+        if commit_ids is None:
+            commit_ids = self._load_range_shas(from_tag, to_tag) or []
 
-        # Add or update the commit detail
-        cache_data["details"][commit_id] = detail
+        details = {}
+        requested = 0
+        for sha in commit_ids:
+            requested += 1
+            data = self._read_object(sha)
+            if data and "detail" in data:
+                details[sha] = data["detail"]
+        self.hits += len(details)
+        self.misses += requested - len(details)
+        return details
 
-        # Save back to file
-        with open(cache_file, "w", encoding="utf-8") as f:
-            json.dump(cache_data, f, indent=2, ensure_ascii=False)
+    def tag_catalogue_path(self, source_key: str) -> Path:
+        """Path of the persisted tag catalogue for a commit source"""
+        safe_key = source_key.replace("/", "_")
+        return self.cache_dir / f"tags_{safe_key}.json"
 
-    def load_commit_details(self, from_tag: str, to_tag: str) -> Dict[str, Dict]:
-        """Load all cached commit details"""
-        cache_key = self._generate_cache_key(from_tag, to_tag, "details")
-        cache_file = self.cache_dir / cache_key
+    def _migrate_legacy_cache(self) -> None:
+        """Import per-range cache files from older versions into the commit store"""
+        # Legacy details: details_*.json (whole file) and details_*.jsonl (journal)
+        for legacy_file in list(self.cache_dir.glob("details_*.json*")):
+            try:
+                if legacy_file.suffix == ".jsonl":
+                    details = self._read_legacy_journal(legacy_file)
+                else:
+                    with open(legacy_file, "r", encoding="utf-8") as f:
+                        details = json.load(f).get("details", {})
+                for sha, detail in details.items():
+                    self._update_object(sha, detail=detail)
+            except Exception:
+                continue
+            legacy_file.unlink()
 
-        if not cache_file.exists():
-            return {}
+        # Legacy commit lists stored the full metadata instead of SHAs
+        for cache_file in list(self.cache_dir.glob("commits_*.json")):
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    cache_data = json.load(f)
+                if "commits" not in cache_data:
+                    continue
+                self.save_commits_cache(
+                    cache_data["from_tag"], cache_data["to_tag"], cache_data["commits"]
+                )
+            except Exception:
+                continue
 
-        try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                cache_data = json.load(f)
-            return cache_data.get("details", {})
-        except Exception:
-            return {}
+    @staticmethod
+    def _read_legacy_journal(journal_file: Path) -> Dict[str, Dict]:
+        """Read a legacy JSON Lines details journal, skipping torn lines"""
+        details = {}
+        with open(journal_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    details[entry["id"]] = entry["detail"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return details
 
     def clear_cache(self, from_tag: str = None, to_tag: str = None) -> None:
         """Clear cache for specific tags or all cache"""
         if from_tag and to_tag:
-            # Clear specific cache
-            for cache_type in ["commits", "details"]:
-                cache_key = self._generate_cache_key(from_tag, to_tag, cache_type)
-                cache_file = self.cache_dir / cache_key
-                if cache_file.exists():
-                    cache_file.unlink()
+            # Clear specific range and the objects no other range references
+            shas = self._load_range_shas(from_tag, to_tag) or []
+            cache_key = self._generate_cache_key(from_tag, to_tag, "commits")
+            cache_file = self.cache_dir / cache_key
+            if cache_file.exists():
+                cache_file.unlink()
+
+            referenced = set()
+            for other_file in self.cache_dir.glob("commits_*.json"):
+                try:
+                    with open(other_file, "r", encoding="utf-8") as f:
+                        referenced.update(json.load(f).get("shas", []))
+                except Exception:
+                    continue
+
+            for sha in shas:
+                if sha not in referenced:
+                    for object_file in self._object_paths(sha):
+                        object_file.unlink(missing_ok=True)
         else:
             # Clear all cache
             for cache_file in self.cache_dir.glob("*.json"):
                 cache_file.unlink()
+            shutil.rmtree(self.objects_dir, ignore_errors=True)
+            self.objects_dir.mkdir(exist_ok=True)
+
+    def _range_files(self) -> List[Path]:
+        return list(self.cache_dir.glob("commits_*.json"))
+
+    def _object_files(self) -> List[Path]:
+        return [
+            path
+            for path in self.objects_dir.glob("*/*")
+            if path.name.endswith((".json", ".json.gz"))
+        ]
+
+    def _analysis_files(self) -> List[Path]:
+        return list((self.cache_dir / "analysis").glob("*/*/*.json"))
+
+    def _llm_cache(self) -> Optional[LLMResponseCache]:
+        """LLM response cache kept in this directory, if any"""
+        llm_dir = self.cache_dir / "llm"
+        return LLMResponseCache(str(llm_dir)) if llm_dir.is_dir() else None
+
+    def _gc_llm_cache(self, removed: Dict[str, int]) -> None:
+        """Enforce the LLM response cache bounds, adding to the removed counts"""
+        llm_cache = self._llm_cache()
+        if llm_cache:
+            llm_removed = llm_cache.gc()
+            removed["llm_entries"] += llm_removed["entries"]
+            removed["bytes_freed"] += llm_removed["bytes_freed"]
+
+    def _llm_stats(self) -> Dict[str, int]:
+        llm_cache = self._llm_cache()
+        return llm_cache.stats() if llm_cache else {"entries": 0, "bytes": 0}
+
+    @staticmethod
+    def _sha_of(object_file: Path) -> str:
+        return object_file.name.split(".", 1)[0]
+
+    def _load_stats(self) -> Dict[str, int]:
+        try:
+            with open(self.cache_dir / STATS_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {"hits": 0, "misses": 0}
+
+    def save_stats(self) -> None:
+        """Add this run's hits and misses to the persisted counters"""
+        with self._lock:
+            stats = self._load_stats()
+            stats["hits"] = stats.get("hits", 0) + self.hits
+            stats["misses"] = stats.get("misses", 0) + self.misses
+            self.hits = self.misses = 0
+
+            stats_file = self.cache_dir / STATS_FILE
+            tmp_file = stats_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp_file.write_text(json.dumps(stats), encoding="utf-8")
+            os.replace(tmp_file, stats_file)
+
+    def gc(self, max_bytes: int = None) -> Dict[str, int]:
+        """
+        Enforce the TTL and the size budget of the commit and analysis stores
+
+        Ranges, objects and analysis records unused for longer than the TTL are
+        removed first, then the least recently used objects and records until
+        the stores fit in max_bytes (defaults to the configured budget). Ranges
+        left without one of their commits are dropped, since they would be
+        refetched anyway. The LLM response cache is bounded by its own limits.
+
+        Returns:
+            Removed ranges, objects, analyses and LLM entries, bytes freed and
+            bytes kept
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        now = time.time()
+        removed = {
+            "ranges": 0,
+            "objects": 0,
+            "analyses": 0,
+            "llm_entries": 0,
+            "bytes_freed": 0,
+            "bytes": 0,
+        }
+
+        def remove(path: Path, size: int, kind: str) -> None:
+            path.unlink(missing_ok=True)
+            removed[kind] += 1
+            removed["bytes_freed"] += size
+
+        with self._lock:
+            entries = []
+            for kind, files in (
+                ("objects", self._object_files()),
+                ("analyses", self._analysis_files()),
+            ):
+                for path in files:
+                    try:
+                        stat = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    if now - stat.st_mtime > self.ttl_seconds:
+                        remove(path, stat.st_size, kind)
+                    else:
+                        entries.append((stat.st_mtime, stat.st_size, path, kind))
+
+            ranges = []
+            for range_file in self._range_files():
+                try:
+                    stat = range_file.stat()
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.ttl_seconds:
+                    remove(range_file, stat.st_size, "ranges")
+                else:
+                    ranges.append((stat.st_size, range_file))
+
+            total = sum(entry[1] for entry in entries) + sum(s for s, _ in ranges)
+            if max_bytes and total > max_bytes:
+                entries.sort(key=lambda entry: entry[0])
+                for _, size, path, kind in entries:
+                    if total <= max_bytes:
+                        break
+                    remove(path, size, kind)
+                    total -= size
+
+            # Drop the ranges that lost commits
+            if removed["objects"]:
+                kept = {self._sha_of(path) for path in self._object_files()}
+                for size, range_file in ranges:
+                    try:
+                        with open(range_file, "r", encoding="utf-8") as f:
+                            shas = json.load(f).get("shas", [])
+                    except Exception:
+                        shas = None
+                    if shas is None or not kept.issuperset(shas):
+                        remove(range_file, size, "ranges")
+                        total -= size
+
+            removed["bytes"] = total
+        self._gc_llm_cache(removed)
+        return removed
+
+    def enforce_bounds(self) -> None:
+        """Run gc when a TTL or a size budget is configured"""
+        if self.ttl_seconds or self.max_bytes:
+            self.gc()
+
+    def finish_run(self) -> None:
+        """Persist the run's counters and enforce the bounds if they are exceeded"""
+        self.save_stats()
+        self.enforce_bounds()
+
+    def stats(self, top: int = 5) -> Dict[str, Any]:
+        """
+        Entries, bytes, hit rate and largest ranges of the cache
+
+        Args:
+            top: Number of largest ranges reported
+        """
+        object_sizes = {}
+        compressed = 0
+        for object_file in self._object_files():
+            try:
+                object_sizes[self._sha_of(object_file)] = object_file.stat().st_size
+            except FileNotFoundError:
+                continue
+            compressed += object_file.suffix == ".gz"
+
+        ranges = []
+        for range_file in self._range_files():
+            try:
+                with open(range_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                continue
+            shas = data.get("shas", [])
+            ranges.append(
+                {
+                    "range": f"{data.get('from_tag')}..{data.get('to_tag')}",
+                    "commits": len(shas),
+                    "bytes": sum(object_sizes.get(sha, 0) for sha in shas),
+                }
+            )
+        ranges.sort(key=lambda entry: entry["bytes"], reverse=True)
+
+        analysis_bytes = 0
+        analysis_files = self._analysis_files()
+        for record_file in analysis_files:
+            try:
+                analysis_bytes += record_file.stat().st_size
+            except FileNotFoundError:
+                continue
+
+        # Other directories kept under the same cache (e.g. per-project caches)
+        other = {}
+        for path in self.cache_dir.iterdir():
+            if path.is_dir() and path.name not in ("objects", "analysis", "llm"):
+                other[path.name] = sum(
+                    f.stat().st_size for f in path.rglob("*") if f.is_file()
+                )
+
+        persisted = self._load_stats()
+        hits = persisted.get("hits", 0) + self.hits
+        misses = persisted.get("misses", 0) + self.misses
+        return {
+            "cache_dir": str(self.cache_dir),
+            "ranges": len(ranges),
+            "objects": len(object_sizes),
+            "compressed_objects": compressed,
+            "bytes": sum(object_sizes.values()),
+            "analyses": len(analysis_files),
+            "analysis_bytes": analysis_bytes,
+            "llm": self._llm_stats(),
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else None,
+            "largest_ranges": ranges[:top],
+            "other_bytes": other,
+        }
+
+    def summary(self) -> str:
+        """Human readable hit/miss summary of the run"""
+        return f"Commit cache: {self.hits} hits, {self.misses} misses"
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def print_cache_report(cache_dir: str = ".cache", gc: bool = False) -> None:
+    """
+    Print the stats of a cache directory and of its per-project caches
+
+    With gc, the TTL and size budget are enforced first.
+    """
+    root = Path(cache_dir)
+    cache_dirs = [root] + sorted(
+        path for path in (root / "projects").glob("*") if path.is_dir()
+    )
+    # Imported here: the SQLite engine builds on CacheManager
+    from .sqlite_cache import SQLITE_DB, SQLiteCacheManager
+
+    for directory in cache_dirs:
+        engine = "sqlite" if (directory / SQLITE_DB).exists() else "json"
+        cache = (SQLiteCacheManager if engine == "sqlite" else CacheManager)(directory)
+        print(f"\n💾 {directory} ({engine})")
+        if gc:
+            removed = cache.gc()
+            print(
+                f"   🧹 Removed {removed['ranges']} ranges, "
+                f"{removed['objects']} objects, {removed['analyses']} analyses "
+                f"and {removed['llm_entries']} LLM responses, "
+                f"freed {_format_bytes(removed['bytes_freed'])}"
+            )
+
+        stats = cache.stats()
+        limit = _format_bytes(stats["max_bytes"]) if stats["max_bytes"] else "none"
+        print(
+            f"   Entries: {stats['ranges']} ranges, {stats['objects']} commit objects "
+            f"({stats['compressed_objects']} compressed), "
+            f"{stats['analyses']} analyses"
+        )
+        print(
+            f"   Size: {_format_bytes(stats['bytes'] + stats['analysis_bytes'])} "
+            f"(limit {limit})"
+        )
+        if "file_bytes" in stats:
+            print(f"   Database file: {_format_bytes(stats['file_bytes'])}")
+        if stats["hit_rate"] is None:
+            print("   Hit rate: no lookups recorded")
+        else:
+            print(
+                f"   Hit rate: {stats['hit_rate']:.0%} "
+                f"({stats['hits']} hits, {stats['misses']} misses)"
+            )
+        if stats["largest_ranges"]:
+            print("   Largest ranges:")
+            for entry in stats["largest_ranges"]:
+                print(
+                    f"     • {entry['range']}: {entry['commits']} commits, "
+                    f"{_format_bytes(entry['bytes'])}"
+                )
+        if stats["llm"]["entries"]:
+            print(
+                f"   LLM responses: {stats['llm']['entries']} entries, "
+                f"{_format_bytes(stats['llm']['bytes'])} "
+                f"(bounded by LLM_CACHE_MAX_ENTRIES and LLM_CACHE_TTL_DAYS)"
+            )
+        for name, size in sorted(stats["other_bytes"].items()):
+            if name != "projects":
+                print(f"   {name}/: {_format_bytes(size)}")
@@ -2,16 +2,41 @@
 # -*- coding: utf-8 -*-
 
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Set, Tuple
 import gitlab
+import requests
 from google import genai
-from google.genai import types
 from halo import Halo
 from dotenv import load_dotenv
+from .analysis_store import AnalysisStore
 from .cache_manager import CacheManager
+from .changelog_stream import ChangelogStream
+from .commit_dedup import CommitDeduplicator, patch_id
+from .commit_hydrator import CommitHydrator
+from .diff_retention import DiffRetentionPolicy
+from .gemini_api_backend import GeminiAPIBackend
 from .gemini_cli_analyzer import GeminiCLIAnalyzer
+from .llm_cache import LLMResponseCache
+from .local_git_source import LocalGitSource
+from .prompt_renderer import (
+    BATCH_CONTEXT_HEADER,
+    CHARS_PER_TOKEN,
+    describe_size,
+    render_batch_commit,
+    render_release_context,
+)
+from .run_metrics import RunMetrics, timed_stage
+from .summary_reducer import SummaryReducer
+from .sqlite_cache import SQLiteAnalysisStore, SQLiteCacheManager
+from .tag_catalogue import TagCatalogue
+
+# Model used in API mode
+GEMINI_API_MODEL = "gemini-2.0-flash-exp"
 
 
 class ChangelogGenerator:
@@ -20,17 +45,70 @@ class ChangelogGenerator:
     using Gemini AI to analyze commits between specified tags or last two tags.
     """
 
-    def __init__(self, use_cache: bool = False, use_cli: bool = True):
-        """Initialize the changelog generator with credentials from .env"""
+    def __init__(
+        self,
+        use_cache: bool = False,
+        use_cli: bool = True,
+        fetch_workers: int = None,
+        use_llm_cache: bool = True,
+        analysis_workers: int = None,
+        api_concurrency: int = None,
+        api_batch_analysis: bool = False,
+        batch_token_budget: int = None,
+        repo_path: str = None,
+        diff_retention: DiffRetentionPolicy = None,
+        refresh_tags: bool = False,
+        project_id: str = None,
+        results_dir: str = "results",
+        cache_dir: str = ".cache",
+        show_spinners: bool = True,
+        gitlab_session: requests.Session = None,
+        gemini_limit: threading.Semaphore = None,
+        use_analysis_store: bool = True,
+        stream: bool = False,
+        cache_engine: str = None,
+        deduplicate: bool = True,
+        summary_token_budget: int = None,
+    ):
+        """
+        Initialize the changelog generator with credentials from .env
+
+        project_id, results_dir, cache_dir, gitlab_session and gemini_limit let
+        several generators run side by side (multi-project mode): the session
+        and the semaphore are shared to bound GitLab and Gemini concurrency
+        across all of them.
+
+        cache_engine selects where the caches are stored: "json" files (default)
+        or "sqlite" (one cache.db, safe to share between concurrent jobs).
+
+        With stream, both changelogs are written to their files while Gemini
+        generates them (and echoed to the console in CLI mode).
+
+        With deduplicate, pure merge commits, cherry-picks of commits already in the
+        range and revert pairs are neither fetched nor analyzed.
+
+        summary_token_budget bounds the summary of analyzed commits sent to the
+        changelog generations: larger summaries are condensed by category in
+        parallel Gemini calls first.
+        """
         load_dotenv()
 
         # Load credentials
         self.gitlab_token = os.getenv("GITLAB_ACCESS_TOKEN")
-        self.gitlab_project_id = os.getenv("GITLAB_PROJECT_ID")
+        self.gitlab_url = os.getenv("GITLAB_URL", "https://gitlab.com")
+        self.gitlab_project_id = project_id or os.getenv("GITLAB_PROJECT_ID")
         self.gemini_token = os.getenv("GEMINI_TOKEN")
 
-        # Validate credentials
-        if not all([self.gitlab_token, self.gitlab_project_id]):
+        # Optional local clone used instead of the GitLab API (an explicit
+        # project ID takes precedence over LOCAL_REPO_PATH)
+        self.repo_path = repo_path or (
+            None if project_id else os.getenv("LOCAL_REPO_PATH")
+        )
+
+        # Validate credentials (not needed when reading from a local clone)
+        if not self.repo_path and not all(
+            [self.gitlab_token, self.gitlab_project_id]
+        ):
             raise ValueError(
                 "Missing required environment variables. Please check your .env file.\n"
                 "Required: GITLAB_ACCESS_TOKEN, GITLAB_PROJECT_ID"
@@ -39,103 +117,296 @@ class ChangelogGenerator:
         # Initialize clients
         self.gl = None
         self.project = None
+        self.hydrator = None
+        self.local_source = None
+        self.tag_catalogue = None
+        self.tag_catalogue_new = 0
+        # Commit details fetched during this run, shared by every range
+        self.detail_memo: Dict[str, Dict] = {}
+        self.refresh_tags = refresh_tags
         self.gemini_client = None
+        self.api_backend = None
         self.use_cli = use_cli
+        self.api_concurrency = api_concurrency
+        self.api_batch_analysis = api_batch_analysis
         self.gemini_cli_analyzer = None
+        self.gitlab_session = gitlab_session
+        self.gemini_limit = gemini_limit
+        self.show_spinners = show_spinners
+        self.results_dir = Path(results_dir)
+        self.stream = stream
+        self.deduplicator = CommitDeduplicator() if deduplicate else None
+
+        # Per-stage timings and counters for the run report
+        self.metrics = RunMetrics(chars_per_token=CHARS_PER_TOKEN)
+        self.metrics.labels["project"] = str(
+            self.gitlab_project_id if not self.repo_path else Path(self.repo_path).name
+        )
 
         # Initialize cache manager
+        if cache_engine is None:
+            cache_engine = os.getenv("CACHE_ENGINE", "json")
+        if cache_engine not in ("json", "sqlite"):
+            raise ValueError("cache_engine must be 'json' or 'sqlite'")
+        self.cache_engine = cache_engine
+        cache_class, store_class = (
+            (SQLiteCacheManager, SQLiteAnalysisStore)
+            if cache_engine == "sqlite"
+            else (CacheManager, AnalysisStore)
+        )
         self.use_cache = use_cache
-        self.cache_manager = CacheManager() if use_cache else None
+        self.cache_dir = cache_dir
+        self._cache_class = cache_class
+        self.cache_manager = cache_class(cache_dir) if use_cache else None
+        self.llm_cache = LLMResponseCache() if use_llm_cache else None
+        # Only the diff files and lines the prompts render are kept after fetching
+        self.diff_retention = diff_retention or DiffRetentionPolicy()
+        # Per-commit analysis records, reused by later releases sharing commits;
+        # other diff settings show other diffs, so they get their own namespace
+        self.analysis_store = (
+            store_class(
+                cache_dir,
+                GeminiCLIAnalyzer.analysis_prompt_version(
+                    self.diff_retention.fingerprint()
+                ),
+            )
+            if use_analysis_store
+            else None
+        )
 
+        # Number of concurrent workers used to fetch commit details
+        if fetch_workers is None:
+            fetch_workers = int(os.getenv("GITLAB_FETCH_WORKERS", "1"))
+        if fetch_workers < 1:
+            raise ValueError("fetch_workers must be at least 1")
+        self.fetch_workers = fetch_workers
+
+        # Number of concurrent Gemini CLI processes used for batch analysis
+        if analysis_workers is None:
+            analysis_workers = int(os.getenv("GEMINI_ANALYSIS_WORKERS", "1"))
+        if analysis_workers < 1:
+            raise ValueError("analysis_workers must be at least 1")
+        self.analysis_workers = analysis_workers
+
+        # Estimated prompt tokens packed into each analysis batch
+        if batch_token_budget is None:
+            batch_token_budget = int(os.getenv("GEMINI_BATCH_TOKEN_BUDGET", "12000"))
+        if batch_token_budget < 1:
+            raise ValueError("batch_token_budget must be at least 1")
+        self.batch_token_budget = batch_token_budget
+        self.max_batch_commits = int(os.getenv("GEMINI_MAX_BATCH_COMMITS", "25"))
+
+        # Estimated tokens of the summary sent to the final changelog generations
+        self.summary_reducer = SummaryReducer(
+            self._complete_many,
+            token_budget=summary_token_budget,
+            metrics=self.metrics,
+            show_spinners=show_spinners,
+        )
+
+    @timed_stage("connect_gitlab")
     def connect_gitlab(self) -> None:
         """Connect to GitLab API"""
-        spinner = Halo(text="Connecting to GitLab...", spinner="dots")
+        spinner = Halo(
+            text="Connecting to GitLab...", spinner="dots", enabled=self.show_spinners
+        )
         spinner.start()
 
         try:
-            self.gl = gitlab.Gitlab(private_token=self.gitlab_token)
+            self.gl = gitlab.Gitlab(
+                self.gitlab_url,
+                private_token=self.gitlab_token,
+                session=self.gitlab_session,
+            )
+            # Count every GitLab call and the bytes received in the run report
+            self.gl.session.hooks["response"].append(self.metrics.record_http_response)
             self.gl.auth()
             self.project = self.gl.projects.get(self.gitlab_project_id)
+            self.hydrator = CommitHydrator(self.project)
             spinner.succeed(f"Connected to GitLab project: {self.project.name}")
         except Exception as e:
             spinner.fail(f"Failed to connect to GitLab: {str(e)}")
             raise
 
+    @timed_stage("connect_local_repo")
+    def connect_local_repo(self) -> None:
+        """Open the local git repository used as commit source"""
+        spinner = Halo(
+            text="Opening local git repository...",
+            spinner="dots",
+            enabled=self.show_spinners,
+        )
+        spinner.start()
+
+        try:
+            self.local_source = LocalGitSource(
+                self.repo_path, retention=self.diff_retention
+            )
+            spinner.succeed(f"Using local git repository: {self.local_source.name}")
+        except Exception as e:
+            spinner.fail(f"Failed to open local git repository: {str(e)}")
+            raise
+
+    def connect_source(self) -> None:
+        """Connect to the commit source (local clone or GitLab API)"""
+        if self.repo_path:
+            self.connect_local_repo()
+        else:
+            self.connect_gitlab()
+
+    def ensure_connected(self) -> None:
+        """Connect to the commit source and Gemini unless already connected"""
+        if not (self.project or self.local_source):
+            self.connect_source()
+        if not (self.gemini_cli_analyzer if self.use_cli else self.api_backend):
+            self.connect_gemini()
+
+    @timed_stage("connect_gemini")
     def connect_gemini(self) -> None:
         """Connect to Gemini AI (CLI or API)"""
         if self.use_cli:
-            spinner = Halo(text="Initializing Gemini CLI...", spinner="dots")
+            spinner = Halo(
+                text="Initializing Gemini CLI...",
+                spinner="dots",
+                enabled=self.show_spinners,
+            )
             spinner.start()
 
             try:
-                self.gemini_cli_analyzer = GeminiCLIAnalyzer()
+                self.gemini_cli_analyzer = GeminiCLIAnalyzer(
+                    llm_cache=self.llm_cache,
+                    concurrency_limit=self.gemini_limit,
+                    show_spinners=self.show_spinners,
+                    metrics=self.metrics,
+                )
                 spinner.succeed("Gemini CLI initialized")
             except Exception as e:
                 spinner.fail(f"Failed to initialize Gemini CLI: {str(e)}")
                 raise
         else:
-            spinner = Halo(text="Connecting to Gemini AI API...", spinner="dots")
+            spinner = Halo(
+                text="Connecting to Gemini AI API...",
+                spinner="dots",
+                enabled=self.show_spinners,
+            )
             spinner.start()
 
             try:
                 if not self.gemini_token:
                     raise ValueError("GEMINI_TOKEN required for API mode")
                 self.gemini_client = genai.Client(api_key=self.gemini_token)
+                self.api_backend = GeminiAPIBackend(
+                    self.gemini_client,
+                    GEMINI_API_MODEL,
+                    llm_cache=self.llm_cache,
+                    max_concurrency=self.api_concurrency,
+                    shared_limit=self.gemini_limit,
+                    metrics=self.metrics,
+                )
+                if self.api_batch_analysis:
+                    # Only used to build and parse the per-batch prompts
+                    self.gemini_cli_analyzer = GeminiCLIAnalyzer(verify=False)
                 spinner.succeed("Connected to Gemini AI API")
             except Exception as e:
                 spinner.fail(f"Failed to connect to Gemini AI API: {str(e)}")
                 raise
 
+    def load_tag_catalogue(
+        self, resync: bool = False, full: bool = False
+    ) -> TagCatalogue:
+        """
+        Load the tag catalogue (persisted with --cache) and sync it with the source
+
+        The catalogue is synced once per generator; resync=True syncs an already
+        loaded catalogue again (e.g. a long-running service after a tag push) and
+        full=True lists every GitLab tag instead of only the recently updated ones.
+        """
+        if self.tag_catalogue is None:
+            if self.use_cache:
+                source_key = (
+                    f"local_{self.local_source.name}"
+                    if self.local_source
+                    else f"project_{self.gitlab_project_id}"
+                )
+                self.tag_catalogue = TagCatalogue.load(
+                    self.cache_manager.tag_catalogue_path(source_key)
+                )
+            else:
+                self.tag_catalogue = TagCatalogue()
+        elif not resync:
+            return self.tag_catalogue
+
+        if self.local_source:
+            new_tags = self.tag_catalogue.refresh_from_tags(
+                self.local_source.list_tags()
+            )
+        else:
+            # Only tags newer than the last sync are fetched from GitLab
+            new_tags = self.tag_catalogue.refresh_from_gitlab(
+                self.project, full=full or (self.refresh_tags and not resync)
+            )
+        self.tag_catalogue.save()
+        self.tag_catalogue_new = new_tags
+        return self.tag_catalogue
+
+    @timed_stage("get_tags")
     def get_tags(self, from_tag: str = None, to_tag: str = None) -> Tuple[str, str]:
         """Get the tags for changelog generation based on input parameters"""
-        spinner = Halo(text="Fetching repository tags...", spinner="dots")
+        spinner = Halo(
+            text="Fetching repository tags...",
+            spinner="dots",
+            enabled=self.show_spinners,
+        )
         spinner.start()
 
         try:
-            # Get all tags sorted by updated desc
-            tags = self.project.tags.list(order_by="updated", sort="desc", get_all=True)
-            tag_names = [t.name for t in tags]
+            # Indexed catalogue of (name, commit SHA) tags, newest first
+            catalogue = self.load_tag_catalogue()
+            if any(tag and tag not in catalogue for tag in (from_tag, to_tag)):
+                # Tags pushed on older commits are only found by a
+                # full sync, so list every tag before reporting one as missing
+                spinner.text = "Tag not in catalogue, syncing all tags..."
+                catalogue = self.load_tag_catalogue(resync=True, full=True)
 
             if from_tag is None and to_tag is None:
-                if len(tag_names) < 2:
+                if len(catalogue) < 2:
                     spinner.fail("Not enough tags found. Need at least 2 tags.")
                     raise ValueError("Repository must have at least 2 tags")
-                from_tag = tag_names[1]  # older
-                to_tag = tag_names[0]  # newer
+                to_tag = catalogue.tags[0][0]  # newer
+                from_tag = catalogue.previous(to_tag)  # older
             elif to_tag is not None and from_tag is None:
-                if to_tag not in tag_names:
+                if to_tag not in catalogue:
                     spinner.fail(f"Tag {to_tag} not found")
                     raise ValueError(f"Tag {to_tag} not found")
-                idx = tag_names.index(to_tag)
-                if idx + 1 >= len(tag_names):
+                from_tag = catalogue.previous(to_tag)
+                if from_tag is None:
                     spinner.fail(f"No previous tag found before {to_tag}")
                     raise ValueError(f"No previous tag found before {to_tag}")
-                from_tag = tag_names[idx + 1]
             elif from_tag is not None and to_tag is None:
-                if from_tag not in tag_names:
+                if from_tag not in catalogue:
                     spinner.fail(f"Tag {from_tag} not found")
                     raise ValueError(f"Tag {from_tag} not found")
-                idx = tag_names.index(from_tag)
-                if idx == 0:
+                to_tag = catalogue.next(from_tag)
+                if to_tag is None:
                     spinner.fail(f"No next tag found after {from_tag}")
                     raise ValueError(f"No next tag found after {from_tag}")
-                to_tag = tag_names[idx - 1]
             else:  # both specified
-                if from_tag not in tag_names or to_tag not in tag_names:
-                    missing = [t for t in [from_tag, to_tag] if t not in tag_names]
+                if from_tag not in catalogue or to_tag not in catalogue:
+                    missing = [t for t in [from_tag, to_tag] if t not in catalogue]
                     spinner.fail(f"Tags not found: {', '.join(missing)}")
                     raise ValueError(f"Tags not found: {', '.join(missing)}")
-                idx_from = tag_names.index(from_tag)
-                idx_to = tag_names.index(to_tag)
-                if idx_from <= idx_to:
+                if catalogue.position(from_tag) <= catalogue.position(to_tag):
                     spinner.fail("from_tag must be older than to_tag in timeline")
                     raise ValueError("from_tag must be older than to_tag in timeline")
 
             # Get commits for display
-            from_commit = next(t.commit["id"][:8] for t in tags if t.name == from_tag)
-            to_commit = next(t.commit["id"][:8] for t in tags if t.name == to_tag)
+            from_commit = catalogue.sha(from_tag)[:8]
+            to_commit = catalogue.sha(to_tag)[:8]
 
-            spinner.succeed(f"Found tags: {to_tag} (to) and {from_tag} (from)")
+            spinner.succeed(
+                f"Found tags: {to_tag} (to) and {from_tag} (from) "
+                f"[{len(catalogue)} tags, {self.tag_catalogue_new} new since last sync]"
+            )
             print(f"   🏷️  {from_tag} → commit {from_commit}")
             print(f"   🏷️  {to_tag} → commit {to_commit}")
             print(f"   📊 Comparing: {from_tag}..{to_tag}\n")
@@ -145,6 +416,20 @@ class ChangelogGenerator:
             spinner.fail(f"Failed to fetch tags: {str(e)}")
             raise
 
+    def _print_commit_list(self, commits: List[Dict]) -> None:
+        """Display commit hashes for visual verification"""
+        print(f"\n📋 Commits to be analyzed ({len(commits)}):")
+        for i, commit in enumerate(commits, 1):
+            short_hash = commit["id"][:8]
+            title = (
+                commit["title"][:60] + "..."
+                if len(commit["title"]) > 60
+                else commit["title"]
+            )
+            print(f"   {i}. {short_hash} - {title}")
+        print()
+
+    @timed_stage("get_commits_between_tags")
     def get_commits_between_tags(self, from_tag: str, to_tag: str) -> List[Dict]:
         """Get only the new commits introduced between two tags (from_tag..to_tag)"""
         # Check cache first if enabled
@@ -152,36 +437,31 @@ class ChangelogGenerator:
             cached_commits = self.cache_manager.load_commits_cache(from_tag, to_tag)
             if cached_commits:
                 print(f"\n💾 Loaded {len(cached_commits)} commits from cache")
-                print(f"\n📋 Commits to be analyzed ({len(cached_commits)}):")
-                for i, commit in enumerate(cached_commits, 1):
-                    short_hash = commit["id"][:8]
-                    title = (
-                        commit["title"][:60] + "..."
-                        if len(commit["title"]) > 60
-                        else commit["title"]
-                    )
-                    print(f"   {i}. {short_hash} - {title}")
-                print()
+                self._print_commit_list(cached_commits)
                 return cached_commits
 
         spinner = Halo(
-            text=f"Fetching commits between {from_tag} and {to_tag}...", spinner="dots"
+            text=f"Fetching commits between {from_tag} and {to_tag}...",
+            spinner="dots",
+            enabled=self.show_spinners,
         )
         spinner.start()
 
         try:
-            # Use GitLab's compare API to get only commits between the two tags
-            # This returns commits that are in to_tag but not in from_tag (the new commits)
-            comparison = self.project.repository_compare(from_tag, to_tag)
-
-            # Get the commit objects from the comparison
-            commit_shas = [commit["id"] for commit in comparison["commits"]]
-
-            # Fetch full commit objects
-            commits = []
-            for sha in commit_shas:
-                commit = self.project.commits.get(sha)
-                commits.append(commit)
+            if self.local_source:
+                # Equivalent of `git log from_tag..to_tag` on the local clone
+                commits = self.local_source.list_commits(from_tag, to_tag)
+            else:
+                # Use GitLab's compare API to get only commits between the two tags
+                # This returns commits that are in to_tag but not in from_tag (the new commits)
+                comparison = self.project.repository_compare(from_tag, to_tag)
+
+                # The compare payload already carries the commit metadata, so the
+                # full commit objects are only fetched later by the detail stage
+                commits = [
+                    self.hydrator.from_compare(commit)
+                    for commit in comparison["commits"]
+                ]
 
             spinner.succeed(
                 f"Found {len(commits)} new commits between {from_tag} and {to_tag}"
@@ -192,24 +472,97 @@ class ChangelogGenerator:
                 self.cache_manager.save_commits_cache(from_tag, to_tag, commits)
                 print("💾 Commits saved to cache")
 
-            # Display commit hashes for visual verification
             if commits:
-                print(f"\n📋 Commits to be analyzed ({len(commits)}):")
-                for i, commit in enumerate(commits, 1):
-                    short_hash = commit.id[:8]
-                    title = (
-                        commit.title[:60] + "..."
-                        if len(commit.title) > 60
-                        else commit.title
-                    )
-                    print(f"   {i}. {short_hash} - {title}")
-                print()
+                self._print_commit_list(commits)
 
             return commits
         except Exception as e:
             spinner.fail(f"Failed to fetch commits: {str(e)}")
             raise
 
+    @timed_stage("deduplicate_commits")
+    def deduplicate_commits(self, commits: List[Dict]) -> List[Dict]:
+        """Drop pure merges, cherry-picks and revert pairs before fetching details"""
+        if not self.deduplicator or not commits:
+            return commits
+        before = self.deduplicator.removed
+        pure_merges = self._pure_merges(self.deduplicator.merge_commits(commits))
+        remaining = self.deduplicator.filter_commits(commits, pure_merges)
+        self._report_duplicates(before, len(commits))
+        return remaining
+
+    def _pure_merges(self, merges: List[Dict]) -> Set[str]:
+        """SHAs of the merge commits that add nothing beyond the merged branches"""
+        if not merges:
+            return set()
+        if self.local_source:
+            return self.local_source.pure_merges(commit["id"] for commit in merges)
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+            flags = list(executor.map(self._is_pure_merge, merges))
+        return {commit["id"] for commit, pure in zip(merges, flags) if pure}
+
+    def _is_pure_merge(self, commit: Dict) -> bool:
+        """
+        Whether a two-parent merge only combines its parents (GitLab API)
+
+        GitLab has no combined diff: a clean merge applies the mainline changes
+        since the merge base on top of the merged branch, so its diff against
+        the branch has the same patch id as those mainline changes. Conflict
+        resolutions and extra changes make them differ.
+        """
+        parents = commit["parent_ids"]
+        if len(parents) != 2:
+            return False
+        mainline, branch = parents
+        try:
+            base = self.project.repository_merge_base([mainline, branch])["id"]
+            merged = self.project.repository_compare(branch, commit["id"])
+            applied = self.project.repository_compare(base, mainline)
+        except Exception:
+            # Unknown: keep the merge
+            return False
+        for _ in range(3):
+            self.hydrator.count_call()
+        return patch_id(merged["diffs"]) == patch_id(applied["diffs"])
+
+    def collapse_duplicate_patches(self, commit_details: List[Dict]) -> List[Dict]:
+        """Drop commits whose patch is identical to an earlier one before analysis"""
+        if not self.deduplicator:
+            return commit_details
+        before = self.deduplicator.removed
+        remaining = self.deduplicator.collapse_patches(commit_details)
+        self._report_duplicates(before, len(commit_details))
+        return remaining
+
+    def _report_duplicates(self, before: int, total: int) -> None:
+        removed = self.deduplicator.removed - before
+        self.metrics.increment("duplicate_commits_skipped", removed)
+        if removed:
+            print(f"🧹 Skipped {removed} of {total} commits (merges or duplicates)")
+
+    def _fetch_commit_detail(self, commit_id: str) -> Dict:
+        """Fetch a single commit and its diff from GitLab"""
+        # Get full commit details (fetched at most once per run)
+        full_commit = self.hydrator.get(commit_id)
+
+        # Get diff, trimmed right away to what the prompts render
+        diff = full_commit.diff(get_all=True)
+        self.hydrator.count_call()
+        diff, diff_stats = self.diff_retention.apply(diff)
+
+        return {
+            "id": full_commit.id[:8],
+            "full_id": full_commit.id,
+            "message": full_commit.message,
+            "title": full_commit.title,
+            "author": full_commit.author_name,
+            "date": full_commit.created_at,
+            "diff": diff,
+            "stats": full_commit.stats,
+            "diff_stats": diff_stats,
+        }
+
+    @timed_stage("get_commit_details")
     def get_commit_details(
         self, commits: List, from_tag: str, to_tag: str
     ) -> List[Dict]:
@@ -217,15 +570,29 @@ class ChangelogGenerator:
         # Load cached details if cache is enabled
         cached_details = {}
         if self.use_cache:
-            cached_details = self.cache_manager.load_commit_details(from_tag, to_tag)
+            # Details are keyed by SHA, so commits shared with other ranges are reused
+            cached_details = self.cache_manager.load_commit_details(
+                from_tag,
+                to_tag,
+                [c["id"] if isinstance(c, dict) else c.id for c in commits],
+            )
             if cached_details:
                 print(f"\n💾 Loaded {len(cached_details)} commit details from cache")
+            self.metrics.increment("commit_detail_cache_hits", len(cached_details))
 
-        spinner = Halo(text="Fetching commit details and diffs...", spinner="dots")
+        spinner = Halo(
+            text="Fetching commit details and diffs...",
+            spinner="dots",
+            enabled=self.show_spinners,
+        )
         spinner.start()
 
-        commit_details = []
+        # Slots keep the output in the same order as the input commits,
+        # regardless of the order in which workers finish
+        commit_details = [None] * len(commits)
+        pending = []
         fetched_count = 0
+        executor = None
 
         try:
             for i, commit in enumerate(commits):
@@ -234,147 +601,394 @@ class ChangelogGenerator:
                     commit.get("id") if isinstance(commit, dict) else commit.id
                 )
 
+                # Reuse details already fetched by another range in this run
+                if full_commit_id in self.detail_memo:
+                    commit_details[i] = self.detail_memo[full_commit_id]
+                    continue
+
                 # Check if this commit is already cached
                 if self.use_cache and full_commit_id in cached_details:
-                    commit_details.append(cached_details[full_commit_id])
+                    # Details cached by older versions may still hold full diffs
+                    commit_details[i] = self.diff_retention.apply_to_detail(
+                        cached_details[full_commit_id]
+                    )
+                    self.detail_memo[full_commit_id] = commit_details[i]
                     spinner.text = (
                         f"Loading commit details {i + 1}/{len(commits)} (from cache)..."
                     )
                     continue
 
-                # Fetch from GitLab
-                spinner.text = f"Fetching commit details {i + 1}/{len(commits)}..."
-
-                # Get full commit details
-                full_commit = self.project.commits.get(full_commit_id)
+                pending.append((i, full_commit_id))
 
-                # Get diff
-                diff = full_commit.diff(get_all=True)
+            done_count = len(commits) - len(pending)
 
-                commit_info = {
-                    "id": full_commit.id[:8],
-                    "full_id": full_commit.id,
-                    "message": full_commit.message,
-                    "title": full_commit.title,
-                    "author": full_commit.author_name,
-                    "date": full_commit.created_at,
-                    "diff": diff,
-                    "stats": full_commit.stats,
+            if self.local_source:
+                # Read every pending commit with one batched git invocation
+                local_details = self.local_source.get_commit_details(
+                    commits[i] if isinstance(commits[i], dict) else commits[i].asdict()
+                    for i, _ in pending
+                )
+                results = ((i, local_details[commit_id]) for i, commit_id in pending)
+            elif self.fetch_workers > 1 and len(pending) > 1:
+                # Fetch from GitLab using a bounded worker pool
+                executor = ThreadPoolExecutor(max_workers=self.fetch_workers)
+                futures = {
+                    executor.submit(self._fetch_commit_detail, commit_id): i
+                    for i, commit_id in pending
                 }
+                results = (
+                    (futures[future], future.result())
+                    for future in as_completed(futures)
+                )
+            else:
+                # Fetch from GitLab one commit at a time
+                results = (
+                    (i, self._fetch_commit_detail(commit_id))
+                    for i, commit_id in pending
+                )
 
-                commit_details.append(commit_info)
+            spinner.text = f"Fetching commit details {done_count}/{len(commits)}..."
+            # Results are consumed on this thread only, so cache writes never overlap
+            for i, commit_info in results:
+                commit_details[i] = commit_info
+                self.detail_memo[commit_info["full_id"]] = commit_info
                 fetched_count += 1
+                done_count += 1
+                spinner.text = (
+                    f"Fetching commit details {done_count}/{len(commits)}..."
+                )
 
                 # Save to cache incrementally if enabled
                 if self.use_cache:
                     self.cache_manager.save_commit_detail(
-                        from_tag, to_tag, full_commit.id, commit_info
+                        from_tag, to_tag, commit_info["full_id"], commit_info
                     )
 
+            if executor is not None:
+                executor.shutdown()
+            self.metrics.increment("commit_details_fetched", fetched_count)
+
             cached_msg = (
                 f" ({len(commit_details) - fetched_count} from cache)"
                 if self.use_cache and len(cached_details) > 0
                 else ""
             )
+            workers_msg = (
+                f" using {self.fetch_workers} workers" if executor is not None else ""
+            )
             spinner.succeed(
-                f"Fetched details for {len(commit_details)} commits{cached_msg}"
+                f"Fetched details for {len(commit_details)} commits{cached_msg}{workers_msg}"
             )
             return commit_details
         except KeyboardInterrupt:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            total = sum(1 for detail in commit_details if detail is not None)
             spinner.warn(
-                f"Interrupted! Fetched {fetched_count} new details, {len(commit_details)} total"
+                f"Interrupted! Fetched {fetched_count} new details, {total} total"
             )
             if self.use_cache:
                 print("💾 Progress saved to cache. Run again with --cache to resume.")
             raise
         except Exception as e:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
             spinner.fail(f"Failed to fetch commit details: {str(e)}")
-            if self.use_cache and len(commit_details) > 0:
-                print(
-                    f"💾 Partial progress saved to cache ({len(commit_details)} commits)"
-                )
+            total = sum(1 for detail in commit_details if detail is not None)
+            if self.use_cache and total > 0:
+                print(f"💾 Partial progress saved to cache ({total} commits)")
             raise
 
+    def estimate_commit_tokens(self, commit: Dict) -> int:
+        """Estimate the prompt tokens a commit adds to an analysis batch"""
+        chars = len(BATCH_CONTEXT_HEADER) + len(render_batch_commit(commit))
+        return chars // CHARS_PER_TOKEN + 1
+
     def split_commits_into_batches(
-        self, commits: List[Dict], batch_size: int = 5
+        self, commits: List[Dict], batch_size: int = None
     ) -> List[List[Dict]]:
-        """Split commits into manageable batches for analysis"""
+        """
+        Split commits into manageable batches for analysis
+
+        With a fixed batch_size, commits are cut into equal batches. Otherwise
+        commits are packed in order up to the per-request token budget (and
+        max_batch_commits); a commit larger than the budget gets its own batch.
+        """
         batches = []
-        for i in range(0, len(commits), batch_size):
-            batches.append(commits[i : i + batch_size])
+        if batch_size:
+            for i in range(0, len(commits), batch_size):
+                batches.append(commits[i : i + batch_size])
+            return batches
+
+        batch = []
+        batch_tokens = 0
+        for commit in commits:
+            tokens = self.estimate_commit_tokens(commit)
+            if batch and (
+                batch_tokens + tokens > self.batch_token_budget
+                or len(batch) >= self.max_batch_commits
+            ):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(commit)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
         return batches
 
+    def _batch_sizes_summary(self, batches: List[List[Dict]]) -> str:
+        """Describe the resulting batch sizes for the progress output"""
+        if not batches:
+            return "no batches"
+        sizes = [len(batch) for batch in batches]
+        return (
+            f"{min(sizes)}-{max(sizes)} commits per batch, "
+            f"avg {sum(sizes) / len(sizes):.1f}, "
+            f"budget ~{self.batch_token_budget} tokens"
+        )
+
+    def _analyze_batch_timed(
+        self, batch: List[Dict], batch_num: int, total_batches: int, show_spinner: bool
+    ) -> Tuple[Dict, float]:
+        """Analyze a single batch, returning its result and elapsed seconds"""
+        started = time.perf_counter()
+        result = self.gemini_cli_analyzer.analyze_commits_batch(
+            batch, batch_num, total_batches, show_spinner=show_spinner
+        )
+        return result, time.perf_counter() - started
+
+    @timed_stage("analyze_commits")
     def analyze_commits_with_cli(self, commits: List[Dict]) -> List[Dict]:
         """Analyze commits in batches using Gemini CLI"""
-        spinner = Halo(text="Preparing commits for analysis...", spinner="dots")
+        spinner = Halo(
+            text="Preparing commits for analysis...",
+            spinner="dots",
+            enabled=self.show_spinners,
+        )
         spinner.start()
 
-        # Split commits into batches to avoid overwhelming Gemini
-        batches = self.split_commits_into_batches(commits, batch_size=5)
-        spinner.succeed(f"Split {len(commits)} commits into {len(batches)} batches")
+        # Split commits into token-budgeted batches to avoid overwhelming Gemini
+        batches = self.split_commits_into_batches(commits)
+        spinner.succeed(
+            f"Split {len(commits)} commits into {len(batches)} batches "
+            f"({self._batch_sizes_summary(batches)})"
+        )
 
-        analyzed_results = []
+        # Results are slotted by batch number so the output keeps batch order
+        results = [None] * len(batches)
+        timings = {}
+        failures = {}
+
+        if self.analysis_workers > 1 and len(batches) > 1:
+            spinner = Halo(
+                text=f"Analyzing {len(batches)} batches with "
+                f"{self.analysis_workers} parallel Gemini CLI processes...",
+                spinner="dots",
+                enabled=self.show_spinners,
+            )
+            spinner.start()
+            with ThreadPoolExecutor(max_workers=self.analysis_workers) as executor:
+                futures = {
+                    executor.submit(
+                        self._analyze_batch_timed, batch, i, len(batches), False
+                    ): i
+                    for i, batch in enumerate(batches, 1)
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    i = futures[future]
+                    try:
+                        results[i - 1], timings[i] = future.result()
+                    except Exception as e:
+                        failures[i] = e
+                    spinner.text = f"Analyzed {done}/{len(batches)} batches..."
+
+            if failures:
+                spinner.warn(
+                    f"Analyzed {len(batches) - len(failures)}/{len(batches)} batches"
+                )
+            else:
+                spinner.succeed(f"Analyzed {len(batches)} batches")
+        else:
+            for i, batch in enumerate(batches, 1):
+                try:
+                    results[i - 1], timings[i] = self._analyze_batch_timed(
+                        batch, i, len(batches), True
+                    )
+                except Exception as e:
+                    failures[i] = e
+
+        # Per-batch timing report
+        for i in range(1, len(batches) + 1):
+            if i in failures:
+                print(
+                    f"   ⚠️  Batch {i}/{len(batches)}: failed, skipped "
+                    f"({str(failures[i])})"
+                )
+            else:
+                print(
+                    f"   ⏱️  Batch {i}/{len(batches)}: {timings[i]:.1f}s "
+                    f"({len(batches[i - 1])} commits)"
+                )
+
+        return [result for result in results if result is not None]
+
+    def analyze_commits_incrementally(
+        self, commits: List[Dict], analyze: Callable[[List[Dict]], List[Dict]]
+    ) -> List[Dict]:
+        """
+        Analyze only the commits without a stored analysis record
+
+        Stored and new records are merged back in commit order into a single
+        analysis result, so the changelog prompts see every commit.
+        """
+        if not self.analysis_store:
+            return analyze(commits)
+
+        # Details carry an abbreviated "id" (shown to the model) and the "full_id"
+        records = self.analysis_store.lookup(commit["full_id"] for commit in commits)
+        pending = [c for c in commits if c["full_id"] not in records]
+        self.metrics.increment("analysis_store_hits", len(records))
+        self.metrics.increment("analysis_store_misses", len(pending))
+        if records:
+            print(
+                f"\n♻️  Reusing {len(records)} stored commit analyses, "
+                f"{len(pending)} new commits to analyze"
+            )
+
+        unmatched = []
+        if pending:
+            new_records, unmatched = self.analysis_store.store_batch_results(
+                analyze(pending), (commit["full_id"] for commit in pending)
+            )
+            records.update(new_records)
+
+        merged = [
+            dict(records[c["full_id"]], id=c["id"])
+            for c in commits
+            if c["full_id"] in records
+        ]
+        merged.extend(unmatched)
+        return [{"commits": merged}] if merged else []
+
+    @timed_stage("analyze_commits")
+    def analyze_commits_with_api(self, commits: List[Dict]) -> List[Dict]:
+        """Analyze commit batches concurrently with the Gemini API (map step)"""
+        batches = self.split_commits_into_batches(commits)
+        print(
+            f"📦 Split {len(commits)} commits into {len(batches)} batches "
+            f"({self._batch_sizes_summary(batches)})"
+        )
+        prompts = [
+            self.gemini_cli_analyzer.build_batch_prompt(batch, i, len(batches))
+            for i, batch in enumerate(batches, 1)
+        ]
+
+        spinner = Halo(
+            text=f"Analyzing {len(batches)} batches with Gemini AI API "
+            f"({self.api_backend.max_concurrency} in flight)...",
+            spinner="dots",
+            enabled=self.show_spinners,
+        )
+        spinner.start()
+        responses = self.api_backend.run(
+            self.api_backend.generate_many(
+                prompts, structured=False, return_exceptions=True
+            )
+        )
 
-        for i, batch in enumerate(batches, 1):
+        analyzed_results = []
+        failures = 0
+        for i, (prompt, response) in enumerate(zip(prompts, responses), 1):
             try:
-                result = self.gemini_cli_analyzer.analyze_commits_batch(
-                    batch, i, len(batches)
+                if isinstance(response, Exception):
+                    raise response
+                analyzed_results.append(
+                    self.gemini_cli_analyzer.parse_batch_response(response)
                 )
-                analyzed_results.append(result)
             except Exception as e:
+                failures += 1
+                if self.llm_cache and isinstance(response, str):
+                    self.llm_cache.invalidate(prompt, GEMINI_API_MODEL, "api-json")
                 print(f"\n⚠️  Warning: Failed to analyze batch {i}: {str(e)}")
-                print("Continuing with remaining batches...\n")
-                continue
 
+        if failures:
+            spinner.warn(f"Analyzed {len(batches) - failures}/{len(batches)} batches")
+        else:
+            spinner.succeed(f"Analyzed {len(batches)} batches")
         return analyzed_results
 
-    def prepare_context_for_gemini(self, commits: List[Dict], tag_name: str) -> str:
-        """Prepare commit data as context for Gemini AI (legacy API mode)"""
-        context = f"# Release: {tag_name}\n\n"
-        context += f"Total commits: {len(commits)}\n\n"
-        context += "## Commits:\n\n"
-
-        for commit in commits:
-            context += f"### Commit {commit['id']}\n"
-            context += f"**Author:** {commit['author']}\n"
-            context += f"**Date:** {commit['date']}\n"
-            context += f"**Message:**\n{commit['message']}\n\n"
-            context += f"**Stats:** +{commit['stats']['additions']} -{commit['stats']['deletions']}\n\n"
-
-            # Add diff information (limited to avoid token limits)
-            context += "**Changes:**\n"
-            for diff_item in commit["diff"][:5]:  # Limit to first 5 files per commit
-                context += f"- File: {diff_item.get('new_path', diff_item.get('old_path', 'unknown'))}\n"
-                context += f"  Type: {diff_item.get('new_file', False) and 'new' or diff_item.get('deleted_file', False) and 'deleted' or 'modified'}\n"
-
-                # Add a snippet of the diff (limited)
-                if "diff" in diff_item and diff_item["diff"]:
-                    diff_lines = diff_item["diff"].split("\n")[:20]  # First 20 lines
-                    context += (
-                        f"  Diff snippet:\n```\n{chr(10).join(diff_lines)}\n```\n"
-                    )
+    def _complete_many(self, prompts: List[str]) -> List:
+        """Send prompts to Gemini concurrently, returning responses or exceptions"""
+        if not self.use_cli:
+            return self.api_backend.run(
+                self.api_backend.generate_many(prompts, return_exceptions=True)
+            )
 
-            context += "\n---\n\n"
+        responses = [None] * len(prompts)
+        with ThreadPoolExecutor(max_workers=self.analysis_workers) as executor:
+            futures = {
+                executor.submit(self.gemini_cli_analyzer.condense_summary, prompt): i
+                for i, prompt in enumerate(prompts)
+            }
+            for future in as_completed(futures):
+                try:
+                    responses[futures[future]] = future.result()
+                except Exception as e:
+                    responses[futures[future]] = e
+        return responses
+
+    @timed_stage("reduce_summary")
+    def build_summary_context(self, analyzed_commits: List[Dict]) -> str:
+        """Summary context of the analyzed commits, within the summary token budget"""
+        context = self.summary_reducer.reduce(analyzed_commits)
+        self.metrics.increment("summary_context_chars", len(context))
+        return context
 
+    def prepare_context_for_gemini(self, commits: List[Dict], tag_name: str) -> str:
+        """Prepare commit data as context for Gemini AI (legacy API mode)"""
+        context = render_release_context(commits, tag_name)
+        self.metrics.increment("release_context_chars", len(context))
         return context
 
+    @timed_stage("generate_commercial_changelog")
     def generate_commercial_changelog(
-        self, context_or_analyzed: any, tag_name: str
+        self,
+        context_or_analyzed: any,
+        tag_name: str,
+        stream: ChangelogStream = None,
+        summary_context: str = None,
     ) -> str:
         """Generate commercial changelog using Gemini AI (CLI or API)"""
         if self.use_cli:
             # context_or_analyzed is the analyzed commits from CLI
             return self.gemini_cli_analyzer.generate_commercial_changelog(
-                context_or_analyzed, tag_name
+                context_or_analyzed,
+                tag_name,
+                stream=stream,
+                summary_context=summary_context,
             )
 
         # Legacy API mode
         spinner = Halo(
-            text="Generating commercial changelog with Gemini AI API...", spinner="dots"
+            text="Generating commercial changelog with Gemini AI API...",
+            spinner="dots",
+            enabled=self.show_spinners,
         )
         spinner.start()
-        context = context_or_analyzed
+        prompt = self._build_commercial_api_prompt(context_or_analyzed, tag_name)
+
+        try:
+            content = self.api_backend.run(self.api_backend.generate(prompt))
+
+            spinner.succeed("Commercial changelog generated")
+            return content
+        except Exception as e:
+            spinner.fail(f"Failed to generate commercial changelog: {str(e)}")
+            raise
 
+    def _build_commercial_api_prompt(self, context: str, tag_name: str) -> str:
+        """Build the commercial changelog prompt for API mode"""
         prompt = f"""Eres un experto en comunicación comercial y product management. 
 
 Analiza los siguientes commits de un release de software y genera un changelog COMERCIAL para el equipo de ventas y clientes.
@@ -417,45 +1031,46 @@ Reglas:
 - No incluyas una sección si no hay ítems reales para ella
 - Sé muy conciso, evita párrafos largos
 """
+        return prompt
 
-        # Configure structured output
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "object",
-                "properties": {"content": {"type": "string"}},
-                "required": ["content"],
-            },
-        )
-
-        try:
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.0-flash-exp", contents=prompt, config=config
-            )
-
-            spinner.succeed("Commercial changelog generated")
-            return response.parsed["content"]
-        except Exception as e:
-            spinner.fail(f"Failed to generate commercial changelog: {str(e)}")
-            raise
-
+    @timed_stage("generate_technical_changelog")
     def generate_technical_changelog(
-        self, context_or_analyzed: any, tag_name: str
+        self,
+        context_or_analyzed: any,
+        tag_name: str,
+        stream: ChangelogStream = None,
+        summary_context: str = None,
     ) -> str:
         """Generate technical changelog using Gemini AI (CLI or API)"""
         if self.use_cli:
             # context_or_analyzed is the analyzed commits from CLI
             return self.gemini_cli_analyzer.generate_technical_changelog(
-                context_or_analyzed, tag_name
+                context_or_analyzed,
+                tag_name,
+                stream=stream,
+                summary_context=summary_context,
             )
 
         # Legacy API mode
         spinner = Halo(
-            text="Generating technical changelog with Gemini AI API...", spinner="dots"
+            text="Generating technical changelog with Gemini AI API...",
+            spinner="dots",
+            enabled=self.show_spinners,
         )
         spinner.start()
-        context = context_or_analyzed
+        prompt = self._build_technical_api_prompt(context_or_analyzed, tag_name)
+
+        try:
+            content = self.api_backend.run(self.api_backend.generate(prompt))
+
+            spinner.succeed("Technical changelog generated")
+            return content
+        except Exception as e:
+            spinner.fail(f"Failed to generate technical changelog: {str(e)}")
+            raise
 
+    def _build_technical_api_prompt(self, context: str, tag_name: str) -> str:
+        """Build the technical changelog prompt for API mode"""
         prompt = f"""Eres un experto en desarrollo de software y documentación técnica.
 
 Analiza los siguientes commits de un release de software y genera un changelog TÉCNICO para el equipo de desarrollo.
@@ -524,49 +1139,113 @@ Reglas:
 - No incluyas una sección si no hay ítems reales para ella
 - Sé ordenado y evita texto redundante
 """
-
-        # Configure structured output
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema={
-                "type": "object",
-                "properties": {"content": {"type": "string"}},
-                "required": ["content"],
-            },
-        )
+        return prompt
+
+    @timed_stage("generate_changelogs")
+    def generate_changelogs_with_api(
+        self, context: str, tag_name: str, streams: List[ChangelogStream] = None
+    ) -> Tuple[str, str]:
+        """
+        Generate the commercial and technical changelogs concurrently (API mode)
+
+        With streams (commercial, technical), each changelog is written to its
+        stream as it is generated and the spinner reports the progress.
+        """
+        text = "Generating commercial and technical changelogs with Gemini AI API..."
+        spinner = Halo(text=text, spinner="dots", enabled=self.show_spinners)
+        spinner.start()
+        prompts = [
+            self._build_commercial_api_prompt(context, tag_name),
+            self._build_technical_api_prompt(context, tag_name),
+        ]
 
         try:
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.0-flash-exp", contents=prompt, config=config
-            )
+            if streams:
+                commercial_stream, technical_stream = streams
+                for stream in streams:
+                    stream.start()
+
+                def on_chunk(stream: ChangelogStream) -> Callable[[str], None]:
+                    def write(chunk: str) -> None:
+                        stream.write(chunk)
+                        spinner.text = (
+                            f"{text} (commercial {commercial_stream.chars} chars, "
+                            f"technical {technical_stream.chars} chars)"
+                        )
+
+                    return write
+
+                commercial, technical = self.api_backend.run(
+                    self.api_backend.generate_stream_many(
+                        prompts, [on_chunk(stream) for stream in streams]
+                    )
+                )
+                spinner.succeed(
+                    "Commercial and technical changelogs generated "
+                    f"(commercial: {commercial_stream.summary()}; "
+                    f"technical: {technical_stream.summary()})"
+                )
+                return commercial, technical
 
-            spinner.succeed("Technical changelog generated")
-            return response.parsed["content"]
+            commercial, technical = self.api_backend.run(
+                self.api_backend.generate_many(prompts)
+            )
+            spinner.succeed("Commercial and technical changelogs generated")
+            return commercial, technical
         except Exception as e:
-            spinner.fail(f"Failed to generate technical changelog: {str(e)}")
+            spinner.fail(f"Failed to generate changelogs: {str(e)}")
             raise
 
-    def save_changelogs(self, commercial: str, technical: str, tag_name: str) -> Path:
-        """Save both changelogs to files in results directory"""
-        spinner = Halo(text="Saving changelogs...", spinner="dots")
+    def create_release_dir(self, tag_name: str) -> Path:
+        """Create the timestamped results directory of a release"""
+        # Create results directory if it doesn't exist
+        results_dir = self.results_dir
+        results_dir.mkdir(parents=True, exist_ok=True)
+
+        # Create release-specific directory with timestamp
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        release_dir = results_dir / f"{tag_name}_{timestamp}"
+        # Several ranges may end at the same tag within the same second
+        suffix = 2
+        while release_dir.exists():
+            release_dir = results_dir / f"{tag_name}_{timestamp}_{suffix}"
+            suffix += 1
+        release_dir.mkdir()
+        return release_dir
+
+    @staticmethod
+    def changelog_files(release_dir: Path, tag_name: str) -> Tuple[Path, Path]:
+        """Commercial and technical changelog files of a release directory"""
+        return (
+            release_dir / f"Changelog_comercial_{tag_name}.md",
+            release_dir / f"Changelog_tech_{tag_name}.md",
+        )
+
+    @timed_stage("save_changelogs")
+    def save_changelogs(
+        self, commercial: str, technical: str, tag_name: str, release_dir: Path = None
+    ) -> Path:
+        """
+        Save both changelogs to files in results directory
+
+        release_dir is the directory already holding the streamed changelogs;
+        their files are rewritten with the final content.
+        """
+        spinner = Halo(
+            text="Saving changelogs...", spinner="dots", enabled=self.show_spinners
+        )
         spinner.start()
 
         try:
-            # Create results directory if it doesn't exist
-            results_dir = Path("results")
-            results_dir.mkdir(exist_ok=True)
-
-            # Create release-specific directory with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            release_dir = results_dir / f"{tag_name}_{timestamp}"
-            release_dir.mkdir(exist_ok=True)
+            release_dir = release_dir or self.create_release_dir(tag_name)
+            commercial_file, technical_file = self.changelog_files(
+                release_dir, tag_name
+            )
 
             # Save commercial changelog
-            commercial_file = release_dir / f"Changelog_comercial_{tag_name}.md"
             commercial_file.write_text(commercial, encoding="utf-8")
 
             # Save technical changelog
-            technical_file = release_dir / f"Changelog_tech_{tag_name}.md"
             technical_file.write_text(technical, encoding="utf-8")
 
             spinner.succeed(f"Changelogs saved to: {release_dir}")
@@ -575,64 +1254,293 @@ Reglas:
             spinner.fail(f"Failed to save changelogs: {str(e)}")
             raise
 
-    def generate(self, from_tag: str = None, to_tag: str = None) -> Path:
-        """Main method to generate changelogs"""
+    def generate_changelogs(
+        self, commit_details: List[Dict], to_tag: str, release_dir: Path = None
+    ) -> Tuple[str, str]:
+        """
+        Analyze commit details and generate both changelogs for a release
+
+        With release_dir, the changelogs are streamed to their files in it.
+        """
+        streams = None
+        if release_dir:
+            # Both generations run concurrently in API mode, so only the
+            # sequential CLI generations are echoed to the console
+            streams = [
+                ChangelogStream(path, echo=self.use_cli)
+                for path in self.changelog_files(release_dir, to_tag)
+            ]
+        try:
+            return self._generate_changelogs(commit_details, to_tag, streams)
+        finally:
+            for stream in streams or []:
+                stream.close()
+
+    def _generate_changelogs(
+        self,
+        commit_details: List[Dict],
+        to_tag: str,
+        streams: List[ChangelogStream] = None,
+    ) -> Tuple[str, str]:
+        commercial_stream, technical_stream = streams or (None, None)
+
+        # Prepare context or analyze commits based on mode
+        if self.use_cli:
+            # Use Gemini CLI for analysis
+            analyzed_commits = self.analyze_commits_incrementally(
+                commit_details, self.analyze_commits_with_cli
+            )
+
+            # Both changelogs share one summary, condensed if it is too large
+            summary_context = self.build_summary_context(analyzed_commits)
+
+            # Generate changelogs using analyzed data
+            commercial_changelog = self.generate_commercial_changelog(
+                analyzed_commits,
+                to_tag,
+                stream=commercial_stream,
+                summary_context=summary_context,
+            )
+            technical_changelog = self.generate_technical_changelog(
+                analyzed_commits,
+                to_tag,
+                stream=technical_stream,
+                summary_context=summary_context,
+            )
+        else:
+            # API mode
+            if self.api_batch_analysis:
+                # Map step: analyze batches concurrently, then summarize them
+                analyzed_commits = self.analyze_commits_incrementally(
+                    commit_details, self.analyze_commits_with_api
+                )
+                context = self.build_summary_context(analyzed_commits)
+                print(f"\n📏 Summary context: {describe_size(context)}")
+            else:
+                spinner = Halo(
+                    text="Preparing context for AI analysis...",
+                    spinner="dots",
+                    enabled=self.show_spinners,
+                )
+                spinner.start()
+                context = self.prepare_context_for_gemini(commit_details, to_tag)
+                spinner.succeed(f"Context prepared ({describe_size(context)})")
+
+            # Generate both changelogs concurrently
+            commercial_changelog, technical_changelog = (
+                self.generate_changelogs_with_api(context, to_tag, streams)
+            )
+
+        return commercial_changelog, technical_changelog
+
+    def _print_run_stats(self) -> None:
+        """Print API call and cache statistics for the run"""
+        if self.hydrator:
+            print(f"\n🔁 {self.hydrator.summary()}")
+        if self.cache_manager:
+            print(f"💾 {self.cache_manager.summary()}")
+            # Persist the hit rate and keep the cache within its bounds
+            self.cache_manager.finish_run()
+        elif self.analysis_store:
+            # Analyses are stored without --cache too: keep them within the
+            # cache bounds (CACHE_TTL_DAYS, CACHE_MAX_MB) as well
+            self._cache_class(self.cache_dir).enforce_bounds()
+        if self.llm_cache:
+            print(f"🧠 {self.llm_cache.summary()}")
+            self.llm_cache.gc()
+        if self.analysis_store:
+            print(f"♻️  {self.analysis_store.summary()}")
+        if self.deduplicator and self.deduplicator.removed:
+            print(f"🧹 {self.deduplicator.summary()}")
+        print(f"⏱️  {self.metrics.summary()}")
+
+    def reset_run_state(self) -> None:
+        """
+        Forget the per-run state of a generator that is reused (service mode)
+
+        The connections, tag catalogue and caches are kept; the metrics, the
+        commit details memoized for the run and the counters start over.
+        """
+        self.metrics.reset()
+        self.detail_memo.clear()
+        if self.hydrator:
+            self.hydrator.reset()
+        if self.deduplicator:
+            self.deduplicator.reset()
+
+    def export_metrics(
+        self, report_path: str = None, prometheus_path: str = None
+    ) -> None:
+        """Write the run report as JSON and/or as a Prometheus textfile"""
+        if report_path:
+            print(f"📈 Run report: {self.metrics.write_json(report_path)}")
+        if prometheus_path:
+            prometheus_file = self.metrics.write_prometheus(prometheus_path)
+            print(f"📈 Prometheus metrics: {prometheus_file}")
+
+    def _print_header(self) -> None:
         print("\n" + "=" * 60)
         print("🚀 GitLab Changelog Generator with Gemini AI")
         print("=" * 60 + "\n")
 
-        # Connect to services
-        self.connect_gitlab()
-        self.connect_gemini()
+    def generate(self, from_tag: str = None, to_tag: str = None) -> Path:
+        """Main method to generate changelogs"""
+        self._print_header()
+
+        # Connect to services (kept when the generator is reused)
+        self.ensure_connected()
 
         # Get tags
         from_tag, to_tag = self.get_tags(from_tag, to_tag)
 
-        # Get commits
-        commits = self.get_commits_between_tags(from_tag, to_tag)
+        # Get commits, skipping merges, cherry-picks and revert pairs
+        commits = self.deduplicate_commits(
+            self.get_commits_between_tags(from_tag, to_tag)
+        )
 
         if not commits:
             print("\n⚠️  No commits found between tags")
             return None
 
-        # Get commit details
-        commit_details = self.get_commit_details(commits, from_tag, to_tag)
-
-        # Prepare context or analyze commits based on mode
-        if self.use_cli:
-            # Use Gemini CLI for analysis
-            analyzed_commits = self.analyze_commits_with_cli(commit_details)
-
-            # Generate changelogs using analyzed data
-            commercial_changelog = self.generate_commercial_changelog(
-                analyzed_commits, to_tag
-            )
-            technical_changelog = self.generate_technical_changelog(
-                analyzed_commits, to_tag
-            )
-        else:
-            # Legacy API mode
-            spinner = Halo(text="Preparing context for AI analysis...", spinner="dots")
-            spinner.start()
-            context = self.prepare_context_for_gemini(commit_details, to_tag)
-            spinner.succeed("Context prepared")
+        # Get commit details (identical patches are analyzed once)
+        commit_details = self.collapse_duplicate_patches(
+            self.get_commit_details(commits, from_tag, to_tag)
+        )
 
-            # Generate changelogs
-            commercial_changelog = self.generate_commercial_changelog(context, to_tag)
-            technical_changelog = self.generate_technical_changelog(context, to_tag)
+        # Streamed changelogs are written to their release directory as they come
+        release_dir = self.create_release_dir(to_tag) if self.stream else None
+        commercial_changelog, technical_changelog = self.generate_changelogs(
+            commit_details, to_tag, release_dir
+        )
 
         # Save changelogs
         output_dir = self.save_changelogs(
-            commercial_changelog, technical_changelog, to_tag
+            commercial_changelog, technical_changelog, to_tag, release_dir
         )
 
         print("\n" + "=" * 60)
         print("✅ Changelog generation completed successfully!")
         print("=" * 60)
-        print(f"\n📁 Output directory: {output_dir.absolute()}")
+        self._print_run_stats()
+        print(f"📁 Output directory: {output_dir.absolute()}")
         print("📄 Files generated:")
         print(f"   - Changelog_comercial_{to_tag}.md")
         print(f"   - Changelog_tech_{to_tag}.md")
         print("\n💬 Files are formatted for WhatsApp/Telegram sharing\n")
 
         return output_dir
+
+    def resolve_ranges(
+        self, ranges: List[str] = None, last: int = None
+    ) -> List[Tuple[str, str]]:
+        """
+        Resolve release ranges for batch mode
+
+        Args:
+            ranges: Range specs, either "from..to" or a single "to" tag
+                (compared with the tag just before it)
+            last: Generate the last N releases (each tag against the previous one)
+
+        Returns:
+            Validated (from_tag, to_tag) pairs, oldest release first
+        """
+        resolved = []
+        if last:
+            names = self.load_tag_catalogue().names
+            if last + 1 > len(names):
+                raise ValueError(
+                    f"Cannot generate the last {last} releases: "
+                    f"only {len(names)} tags found"
+                )
+            resolved.extend((names[i + 1], names[i]) for i in range(last))
+
+        for spec in ranges or []:
+            if ".." in spec:
+                from_tag, to_tag = spec.split("..", 1)
+                resolved.append(self.get_tags(from_tag or None, to_tag or None))
+            else:
+                resolved.append(self.get_tags(None, spec))
+
+        # Oldest release first, without duplicates
+        catalogue = self.load_tag_catalogue()
+        unique = list(dict.fromkeys(resolved))
+        unique.sort(key=lambda r: catalogue.position(r[1]), reverse=True)
+        return unique
+
+    def generate_many(self, ranges: List[str] = None, last: int = None) -> List[Path]:
+        """
+        Generate changelogs for several releases in one process
+
+        Connections, the tag catalogue and the caches are shared by every range.
+        All ranges are fetched first (commits shared between ranges are fetched
+        once), then each range is analyzed and generated.
+        """
+        self._print_header()
+        started = time.perf_counter()
+
+        # Connect to services once
+        self.ensure_connected()
+
+        release_ranges = self.resolve_ranges(ranges, last)
+        if not release_ranges:
+            raise ValueError("No release ranges to generate")
+        total = len(release_ranges)
+        print(f"\n📚 Batch mode: {total} releases")
+        for from_tag, to_tag in release_ranges:
+            print(f"   • {from_tag}..{to_tag}")
+
+        # Stage 1: fetch commits and details for every range
+        range_details = {}
+        for k, (from_tag, to_tag) in enumerate(release_ranges, 1):
+            print(f"\n📥 [{k}/{total}] Fetching {from_tag}..{to_tag}")
+            commits = self.deduplicate_commits(
+                self.get_commits_between_tags(from_tag, to_tag)
+            )
+            if commits:
+                range_details[(from_tag, to_tag)] = self.collapse_duplicate_patches(
+                    self.get_commit_details(commits, from_tag, to_tag)
+                )
+            else:
+                print("\n⚠️  No commits found between tags")
+
+        # Stage 2: analyze and generate each range
+        output_dirs = []
+        failures = []
+        for k, (from_tag, to_tag) in enumerate(release_ranges, 1):
+            if (from_tag, to_tag) not in range_details:
+                continue
+            elapsed = time.perf_counter() - started
+            print(
+                f"\n🧠 [{k}/{total}] Generating {from_tag}..{to_tag} "
+                f"({elapsed:.0f}s elapsed)"
+            )
+            try:
+                release_dir = self.create_release_dir(to_tag) if self.stream else None
+                commercial_changelog, technical_changelog = self.generate_changelogs(
+                    range_details[(from_tag, to_tag)], to_tag, release_dir
+                )
+                output_dirs.append(
+                    self.save_changelogs(
+                        commercial_changelog, technical_changelog, to_tag, release_dir
+                    )
+                )
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                failures.append((from_tag, to_tag, e))
+                print(f"\n⚠️  Warning: Failed to generate {from_tag}..{to_tag}: {e}")
+
+        print("\n" + "=" * 60)
+        print(
+            f"✅ Batch completed: {len(output_dirs)}/{total} releases generated "
+            f"in {time.perf_counter() - started:.0f}s"
+        )
+        print("=" * 60)
+        self._print_run_stats()
+        for output_dir in output_dirs:
+            print(f"📁 {output_dir.absolute()}")
+        for from_tag, to_tag, error in failures:
+            print(f"❌ {from_tag}..{to_tag}: {error}")
+        print()
+
+        return output_dirs
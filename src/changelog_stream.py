@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Changelog Stream for GitLab Changelog Generator
+Writes a changelog to its file while Gemini produces it (and optionally echoes
+it to the console), so the first lines are readable within seconds
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class ChangelogStream:
+    """Progressive writer for one changelog file"""
+
+    def __init__(self, path: Path, echo: bool = False):
+        """
+        Open the changelog file for streaming
+
+        Args:
+            path: Changelog file, rewritten with the final content when saved
+            echo: Also print each chunk to stdout as it arrives
+        """
+        self.path = Path(path)
+        self.echo = echo
+        self.chars = 0
+        self.first_chunk_seconds: Optional[float] = None
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def start(self) -> None:
+        """Mark the start of the generation, the time to first output counts from it"""
+        self._started = time.perf_counter()
+
+    def write(self, chunk: str) -> None:
+        """Append a chunk of generated text and flush it to disk"""
+        with self._lock:
+            if self.first_chunk_seconds is None:
+                self.first_chunk_seconds = time.perf_counter() - self._started
+            self._file.write(chunk)
+            self._file.flush()
+            self.chars += len(chunk)
+            if self.echo:
+                sys.stdout.write(chunk)
+                sys.stdout.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "ChangelogStream":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def summary(self) -> str:
+        """Human readable time to first output"""
+        if self.first_chunk_seconds is None:
+            return "no output"
+        return (
+            f"first output after {self.first_chunk_seconds:.1f}s, "
+            f"{self.chars} chars"
+        )
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Commit Deduplication for GitLab Changelog Generator
+Removes commits that add nothing to a changelog before they are fetched and
+analyzed: pure merge commits, cherry-picks of commits already in the range (by their
+"cherry picked from" trailer or by an identical patch) and revert pairs
+"""
+
+import hashlib
+import re
+from typing import Collection, Dict, Iterable, List, Optional
+
+# Trailers written by `git revert` and `git cherry-pick -x` (and GitLab's buttons)
+REVERT_TRAILER = re.compile(r"This reverts commit ([0-9a-f]{7,40})")
+CHERRY_PICK_TRAILER = re.compile(r"\(cherry picked from commit ([0-9a-f]{7,40})\)")
+
+# Whitespace is ignored in patch ids, as in `git patch-id`
+WHITESPACE = re.compile(rb"\s+")
+
+
+class PatchIdHasher:
+    """
+    Incremental patch id of a commit diff
+
+    Like `git patch-id --stable`: every file hashes its path and its changed
+    lines without whitespace (so line numbers and context do not matter), and
+    the file hashes are combined independently of their order.
+    """
+
+    def __init__(self):
+        self._files: List[bytes] = []
+        self._current = None
+        self._changed = False
+
+    def add_file(self, path: str) -> None:
+        """Start hashing the diff of a file"""
+        self._close_file()
+        self._current = hashlib.sha1(path.encode("utf-8", "replace") + b"\0")
+
+    def add_line(self, line: str) -> None:
+        """Hash a diff line of the current file (only +/- lines count)"""
+        if self._current is None or line[:1] not in ("+", "-"):
+            return
+        content = WHITESPACE.sub(b"", line[1:].encode("utf-8", "replace"))
+        self._current.update(line[:1].encode() + content + b"\n")
+        self._changed = True
+
+    def add_diff(self, path: str, diff_text: str) -> None:
+        """Hash the whole diff text of a file"""
+        self.add_file(path)
+        for line in diff_text.split("\n"):
+            self.add_line(line)
+
+    def _close_file(self) -> None:
+        if self._current is not None:
+            self._files.append(self._current.digest())
+            self._current = None
+
+    def hexdigest(self) -> Optional[str]:
+        """Patch id of the hashed diff, None when it changes no lines"""
+        self._close_file()
+        if not self._changed:
+            return None
+        return hashlib.sha1(b"".join(sorted(self._files))).hexdigest()
+
+
+def patch_id(diff: Iterable[Dict]) -> Optional[str]:
+    """Patch id of a GitLab-style diff list"""
+    hasher = PatchIdHasher()
+    for diff_item in diff:
+        path = diff_item.get("new_path", diff_item.get("old_path", "unknown"))
+        hasher.add_diff(path, diff_item.get("diff") or "")
+    return hasher.hexdigest()
+
+
+class CommitDeduplicator:
+    """Drops merge commits, duplicated patches and revert pairs from a range"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Zero the removed-commit counters"""
+        self.merges = 0
+        self.cherry_picks = 0
+        self.reverts = 0
+
+    @property
+    def removed(self) -> int:
+        return self.merges + self.cherry_picks + self.reverts
+
+    @staticmethod
+    def _resolve(ref: str, ids: List[str]) -> Optional[str]:
+        """Full SHA of the range commit a (possibly abbreviated) reference points to"""
+        for commit_id in ids:
+            if commit_id.startswith(ref):
+                return commit_id
+        return None
+
+    @staticmethod
+    def merge_commits(commits: Iterable[Dict]) -> List[Dict]:
+        """The merge commits (more than one parent) of a list"""
+        return [c for c in commits if len(c.get("parent_ids") or []) > 1]
+
+    def filter_commits(
+        self, commits: List[Dict], pure_merges: Collection[str] = ()
+    ) -> List[Dict]:
+        """
+        Drop commits identifiable from their metadata, before fetching details
+
+        Args:
+            commits: Commit metadata (id, message, parent_ids), oldest first
+            pure_merges: SHAs of the merge commits that add nothing beyond the
+                branches they merge; other merges (conflict resolutions, extra
+                changes) are kept
+
+        Returns:
+            The remaining commits, in their original order
+        """
+        ids = [commit["id"] for commit in commits]
+        dropped = set()
+
+        for commit in self.merge_commits(commits):
+            # Pure merges only bring in changes already listed in the range
+            if commit["id"] in pure_merges:
+                dropped.add(commit["id"])
+                self.merges += 1
+
+        for commit in commits:
+            if commit["id"] in dropped:
+                continue
+            message = commit.get("message") or ""
+
+            # A revert and the commit it reverts cancel out when both are in
+            # the range (a revert of a cancelled revert stays, as a re-apply)
+            match = REVERT_TRAILER.search(message)
+            if match:
+                reverted = self._resolve(match.group(1), ids)
+                if reverted and reverted not in dropped and reverted != commit["id"]:
+                    dropped.update((reverted, commit["id"]))
+                    self.reverts += 2
+                    continue
+
+            # Cherry-picks of a commit already in the range add nothing new
+            match = CHERRY_PICK_TRAILER.search(message)
+            if match:
+                original = self._resolve(match.group(1), ids)
+                if original and original not in dropped and original != commit["id"]:
+                    dropped.add(commit["id"])
+                    self.cherry_picks += 1
+
+        return [commit for commit in commits if commit["id"] not in dropped]
+
+    def collapse_patches(self, commit_details: List[Dict]) -> List[Dict]:
+        """
+        Keep the first commit of each patch id, after fetching details
+
+        Catches cherry-picks made without a trailer (details without a patch
+        id in their diff_stats, e.g. cached by older versions, are always kept).
+        """
+        seen = set()
+        kept = []
+        for detail in commit_details:
+            key = detail.get("diff_stats", {}).get("patch_id")
+            if key is not None and key in seen:
+                self.cherry_picks += 1
+                continue
+            if key is not None:
+                seen.add(key)
+            kept.append(detail)
+        return kept
+
+    def summary(self) -> str:
+        """Human readable count of the removed commits"""
+        return (
+            f"{self.removed} duplicate commits skipped "
+            f"({self.merges} merges, {self.cherry_picks} cherry-picks, "
+            f"{self.reverts} reverted)"
+        )
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Commit Hydrator for GitLab Changelog Generator
+Shares GitLab commit data between the listing and detail stages so every
+commit object is fetched at most once per run
+"""
+
+import threading
+from typing import Any, Dict
+
+
+class CommitHydrator:
+    """Fetches and memoizes GitLab commit objects, counting the API calls saved"""
+
+    # Commit metadata fields already present in the repository_compare payload
+    METADATA_FIELDS = ("id", "title", "message", "author_name", "created_at")
+
+    def __init__(self, project: Any):
+        """Initialize the hydrator for a GitLab project"""
+        self.project = project
+        self._commits: Dict[str, Any] = {}
+        self._sha_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        self.api_calls = 0
+        self.api_calls_saved = 0
+
+    def from_compare(self, compare_commit: Dict) -> Dict:
+        """Build commit metadata from a repository_compare entry without an API call"""
+        metadata = {field: compare_commit.get(field, "") for field in self.METADATA_FIELDS}
+        metadata["parent_ids"] = compare_commit.get("parent_ids", [])
+
+        with self._lock:
+            self.api_calls_saved += 1
+        return metadata
+
+    def get(self, sha: str) -> Any:
+        """Return the full commit object for a SHA, fetching it only the first time"""
+        with self._lock:
+            sha_lock = self._sha_locks.setdefault(sha, threading.Lock())
+
+        # Per-SHA lock so concurrent workers asking for the same commit share one fetch
+        with sha_lock:
+            with self._lock:
+                if sha in self._commits:
+                    self.api_calls_saved += 1
+                    return self._commits[sha]
+
+            commit = self.project.commits.get(sha)
+
+            with self._lock:
+                self._commits[sha] = commit
+                self.api_calls += 1
+            return commit
+
+    def count_call(self) -> None:
+        """Record an additional GitLab API call made on behalf of a commit (e.g. diff)"""
+        with self._lock:
+            self.api_calls += 1
+
+    def reset(self) -> None:
+        """Forget the memoized commits and counters (e.g. between service jobs)"""
+        with self._lock:
+            self._commits.clear()
+            self._sha_locks.clear()
+            self.api_calls = 0
+            self.api_calls_saved = 0
+
+    def summary(self) -> str:
+        """Human readable summary of the API calls made and saved"""
+        return (
+            f"{self.api_calls} GitLab commit API calls made, "
+            f"{self.api_calls_saved} saved"
+        )
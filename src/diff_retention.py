@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Diff Retention Policy for GitLab Changelog Generator
+Trims commit diffs as they are fetched so only what the prompts render is kept
+in memory and in the cache
+"""
+
+import os
+from typing import Dict, List, Tuple
+from .commit_dedup import patch_id
+from .diff_selection import DiffSelector
+
+
+class DiffRetentionPolicy:
+    """Keeps the most relevant files and hunks of a commit plus per-file stats"""
+
+    def __init__(
+        self,
+        max_files: int = None,
+        max_lines: int = None,
+        selector: DiffSelector = None,
+    ):
+        """
+        Initialize the policy (defaults to DIFF_MAX_FILES / DIFF_MAX_LINES)
+
+        The defaults cover the largest render in use: 10 files per commit in the
+        batch analysis context and 20 lines per file in the API context. The
+        selector decides which files and hunks fill those limits.
+        """
+        if max_files is None:
+            max_files = int(os.getenv("DIFF_MAX_FILES", "10"))
+        if max_lines is None:
+            max_lines = int(os.getenv("DIFF_MAX_LINES", "20"))
+        if max_files < 1 or max_lines < 1:
+            raise ValueError("Diff retention limits must be at least 1")
+        self.max_files = max_files
+        self.max_lines = max_lines
+        self.selector = selector or DiffSelector()
+
+    def fingerprint(self) -> str:
+        """Settings that change the diffs rendered into the analysis prompts"""
+        return (
+            f"retention={self.max_files}:{self.max_lines};"
+            f"{self.selector.fingerprint()}"
+        )
+
+    @staticmethod
+    def count_changes(diff_text: str) -> Tuple[int, int]:
+        """Count added and removed lines in a unified diff"""
+        if not diff_text:
+            return 0, 0
+        additions = diff_text.count("\n+") + diff_text.startswith("+")
+        deletions = diff_text.count("\n-") + diff_text.startswith("-")
+        return additions, deletions
+
+    def apply(self, diff: List[Dict]) -> Tuple[List[Dict], Dict]:
+        """
+        Trim a GitLab-style diff list
+
+        Returns:
+            The retained file entries and a diff_stats dict with the total number
+            of files, the number of ignored files, [path, additions, deletions]
+            for every file and the patch id of the full diff
+        """
+        entries = []
+        file_stats = []
+        for diff_item in diff:
+            path = diff_item.get("new_path", diff_item.get("old_path", "unknown"))
+            diff_text = diff_item.get("diff") or ""
+            additions, deletions = self.count_changes(diff_text)
+            file_stats.append([path, additions, deletions])
+            entries.append(
+                {
+                    "old_path": diff_item.get("old_path", path),
+                    "new_path": path,
+                    "new_file": diff_item.get("new_file", False),
+                    "deleted_file": diff_item.get("deleted_file", False),
+                    "renamed_file": diff_item.get("renamed_file", False),
+                    "diff": diff_text,
+                    "additions": additions,
+                    "deletions": deletions,
+                }
+            )
+
+        retained, ignored = self.select(entries)
+        diff_stats = {
+            "files_changed": len(file_stats),
+            "files_ignored": ignored,
+            "file_stats": file_stats,
+            "patch_id": patch_id(diff),
+        }
+        return retained, diff_stats
+
+    def select(self, entries: List[Dict]) -> Tuple[List[Dict], int]:
+        """Choose the retained file entries, returning them and the ignored count"""
+        return self.selector.select(entries, self.max_files, self.max_lines)
+
+    def apply_to_detail(self, detail: Dict) -> Dict:
+        """
+        Apply the policy to a cached commit detail
+
+        Details cached before the diff selection existed are re-selected from
+        the entries they retained (full diffs from older versions are trimmed).
+        """
+        if "files_ignored" in detail.get("diff_stats", {}):
+            return detail
+        detail = dict(detail)
+        if "diff_stats" in detail:
+            detail["diff"], ignored = self.select(detail.get("diff", []))
+            detail["diff_stats"] = dict(detail["diff_stats"], files_ignored=ignored)
+        else:
+            detail["diff"], detail["diff_stats"] = self.apply(detail.get("diff", []))
+        return detail
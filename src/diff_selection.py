@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Diff Selection for GitLab Changelog Generator
+Chooses which files and hunks of a commit diff reach the prompts: lockfiles,
+generated, vendored and binary files are dropped by pattern, the remaining
+files are ranked by churn and path relevance, and a per-commit byte budget is
+filled with the hunks that change the most lines
+"""
+
+import math
+import os
+import re
+from typing import Dict, List, Tuple
+from .prompt_renderer import leading_lines
+
+# Paths never worth sending to the model. Patterns without "/" match the file
+# name; patterns with "/" match the whole path from the repository root, where
+# "*" stays within a directory and "**" spans any number of them
+DEFAULT_IGNORE_PATTERNS = (
+    # Lockfiles
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "Pipfile.lock",
+    "Cargo.lock",
+    "Gemfile.lock",
+    "composer.lock",
+    "go.sum",
+    "*.lock",
+    # Generated code and snapshots
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    "*.pb.go",
+    "*_pb2.py",
+    "*_pb2_grpc.py",
+    "*.pb.cc",
+    "*.pb.h",
+    "*.generated.*",
+    "*.g.dart",
+    "*.snap",
+    "**/__snapshots__/**",
+    # Vendored dependencies (node_modules at any depth) and root build output
+    "**/node_modules/**",
+    "vendor/**",
+    "third_party/**",
+    "dist/**",
+    "build/**",
+    # Binary files
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.ico",
+    "*.webp",
+    "*.pdf",
+    "*.zip",
+    "*.gz",
+    "*.jar",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.eot",
+    "*.mp3",
+    "*.mp4",
+    "*.so",
+    "*.dll",
+    "*.exe",
+)
+
+# Relevance weights by kind of path (source code keeps 1.0)
+TEST_PATH = re.compile(r"(^|/)(tests?|spec|__tests__)/|(_test|\.test|\.spec)\.\w+$")
+DOCS_PATH = re.compile(r"(^|/)docs?/|\.(md|rst|txt|adoc)$", re.IGNORECASE)
+CONFIG_PATH = re.compile(r"\.(json|ya?ml|toml|ini|cfg|conf|xml)$", re.IGNORECASE)
+PATH_WEIGHTS = ((TEST_PATH, 0.5), (DOCS_PATH, 0.4), (CONFIG_PATH, 0.7))
+
+
+def _pattern_regex(pattern: str) -> str:
+    """Regex of an ignore pattern, matched against a file name or a whole path"""
+    if "/" not in pattern:
+        # File name patterns may match in any directory
+        pattern = "**/" + pattern
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex.append("[^/]")
+            i += 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(regex)
+
+
+# Leading lines of a file diff scanned for hunks (bounds the work on huge diffs)
+SCAN_LINES = 400
+
+
+class DiffSelector:
+    """Filters, ranks and budgets the file diffs of a commit"""
+
+    def __init__(
+        self,
+        ignore_patterns: Tuple[str, ...] = None,
+        byte_budget: int = None,
+        enabled: bool = True,
+    ):
+        """
+        Initialize the selector
+
+        Args:
+            ignore_patterns: Glob patterns of dropped paths (defaults to
+                DEFAULT_IGNORE_PATTERNS plus DIFF_IGNORE_PATTERNS, comma separated)
+            byte_budget: Diff characters kept per commit (defaults to
+                DIFF_BYTE_BUDGET or 4000, 0 = unlimited)
+            enabled: When False, files keep GitLab's order and nothing is dropped
+        """
+        if ignore_patterns is None:
+            extra = os.getenv("DIFF_IGNORE_PATTERNS", "")
+            ignore_patterns = DEFAULT_IGNORE_PATTERNS + tuple(
+                pattern.strip() for pattern in extra.split(",") if pattern.strip()
+            )
+        if byte_budget is None:
+            byte_budget = int(os.getenv("DIFF_BYTE_BUDGET", "4000"))
+        if byte_budget < 0:
+            raise ValueError("byte_budget must not be negative")
+        self.ignore_patterns = ignore_patterns
+        self.byte_budget = byte_budget
+        self.enabled = enabled
+
+        # One regex for every pattern, matched on the whole path
+        translated = "|".join(f"(?:{_pattern_regex(p)})" for p in ignore_patterns)
+        self._ignored = re.compile(f"(?:{translated})\\Z") if translated else None
+
+    def fingerprint(self) -> str:
+        """Settings that change which files and hunks are selected"""
+        patterns = ",".join(self.ignore_patterns) if self.enabled else ""
+        return f"selector={int(self.enabled)}:{self.byte_budget}:{patterns}"
+
+    def is_ignored(self, path: str, diff_text: str = "") -> bool:
+        """Whether a file is dropped from the prompts"""
+        if not self.enabled:
+            return False
+        if diff_text.startswith(("Binary files ", "GIT binary patch")):
+            return True
+        if self._ignored is None:
+            return False
+        return self._ignored.match(path) is not None
+
+    @staticmethod
+    def relevance(entry: Dict) -> float:
+        """Score of a file: log-scaled churn weighted by the kind of path"""
+        path = entry.get("new_path") or entry.get("old_path") or ""
+        weight = 1.0
+        for pattern, path_weight in PATH_WEIGHTS:
+            if pattern.search(path):
+                weight = path_weight
+                break
+        churn = entry.get("additions", 0) + entry.get("deletions", 0)
+        return weight * math.log1p(churn)
+
+    @staticmethod
+    def _hunks(diff_text: str) -> List[List[str]]:
+        """Split a unified diff in hunks (lines before the first @@ form one)"""
+        hunks = [[]]
+        for line in diff_text.split("\n"):
+            if line.startswith("@@") and hunks[-1]:
+                hunks.append([])
+            hunks[-1].append(line)
+        return hunks
+
+    @staticmethod
+    def _hunk_score(hunk: List[str]) -> int:
+        """Changed lines of a hunk, ignoring whitespace-only changes"""
+        return sum(
+            1 for line in hunk if line[:1] in ("+", "-") and line[1:].strip() != ""
+        )
+
+    def select_hunks(self, diff_text: str, max_lines: int) -> str:
+        """Keep the most changed hunks of a file diff within max_lines lines"""
+        hunks = self._hunks(leading_lines(diff_text, SCAN_LINES))
+        if len(hunks) == 1:
+            return "\n".join(hunks[0][:max_lines])
+
+        ranked = sorted(
+            range(len(hunks)), key=lambda i: self._hunk_score(hunks[i]), reverse=True
+        )
+        chosen = set()
+        lines = 0
+        for i in ranked:
+            if lines + len(hunks[i]) <= max_lines:
+                chosen.add(i)
+                lines += len(hunks[i])
+        if not chosen:
+            # Even the best hunk is too long: keep its beginning
+            return "\n".join(hunks[ranked[0]][:max_lines])
+        # Original order, so the snippet still reads as a diff
+        return "\n".join(line for i in sorted(chosen) for line in hunks[i])
+
+    def select(
+        self, entries: List[Dict], max_files: int, max_lines: int
+    ) -> Tuple[List[Dict], int]:
+        """
+        Choose the file entries sent to the prompts
+
+        Args:
+            entries: File entries with new_path, diff, additions and deletions
+            max_files: Files kept
+            max_lines: Diff lines kept per file
+
+        Returns:
+            The kept entries, most relevant first, with their diff reduced to
+            the selected hunks within the byte budget, and the number of
+            ignored files
+        """
+        if not self.enabled:
+            # GitLab's order, leading lines only
+            return [
+                dict(entry, diff=leading_lines(entry.get("diff") or "", max_lines))
+                for entry in entries[:max_files]
+            ], 0
+
+        kept = [
+            entry
+            for entry in entries
+            if not self.is_ignored(
+                entry.get("new_path") or entry.get("old_path") or "",
+                entry.get("diff") or "",
+            )
+        ]
+        ignored = len(entries) - len(kept)
+        # Stable sort: equally relevant files keep GitLab's order
+        kept.sort(key=self.relevance, reverse=True)
+
+        selected = []
+        remaining = self.byte_budget or math.inf
+        for entry in kept[:max_files]:
+            snippet = self.select_hunks(entry.get("diff") or "", max_lines)
+            if len(snippet) > remaining:
+                # Whole lines only, so the snippet stays a readable diff
+                cut = snippet.rfind("\n", 0, int(remaining) + 1)
+                snippet = snippet[:cut] if cut > 0 else ""
+            remaining -= len(snippet)
+            selected.append(dict(entry, diff=snippet))
+        return selected, ignored
+
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gemini API Backend
+Runs Gemini API generations on google-genai's async client so independent
+requests (both changelogs, per-batch analyses) are issued concurrently
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Coroutine, List
+from google.genai import types
+from .llm_cache import LLMResponseCache
+from .run_metrics import RunMetrics
+
+
+class GeminiAPIBackend:
+    """Async Gemini API backend with a bounded number of in-flight requests"""
+
+    # Structured output used for the changelog generations
+    CONTENT_SCHEMA = {
+        "type": "object",
+        "properties": {"content": {"type": "string"}},
+        "required": ["content"],
+    }
+
+    def __init__(
+        self,
+        client: Any,
+        model: str,
+        llm_cache: LLMResponseCache = None,
+        max_concurrency: int = None,
+        shared_limit: threading.Semaphore = None,
+        metrics: RunMetrics = None,
+    ):
+        """
+        Initialize the backend (concurrency defaults to GEMINI_API_CONCURRENCY)
+
+        shared_limit is an optional semaphore shared with other backends that
+        bounds the requests in flight across all of them (multi-project mode).
+        metrics receives prompt sizes, cache hits and request time.
+        """
+        self.client = client
+        self.model = model
+        self.llm_cache = llm_cache
+        self.shared_limit = shared_limit
+        self.metrics = metrics or RunMetrics()
+
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("GEMINI_API_CONCURRENCY", "4"))
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+
+        # The async client keeps its connection pool bound to one event loop,
+        # so every request runs on the same long-lived loop
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._semaphore = self.run(self._create_semaphore())
+
+    async def _create_semaphore(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(self.max_concurrency)
+
+    @asynccontextmanager
+    async def _shared_slot(self) -> AsyncIterator[None]:
+        """Hold a slot of the shared limit (if any) for the duration of a request"""
+        if not self.shared_limit:
+            yield
+            return
+
+        # Wait for a global slot off the loop so other requests proceed. The
+        # thread cannot be interrupted, so if this task is cancelled while it
+        # waits, the permit it eventually takes is handed back
+        acquire = asyncio.ensure_future(asyncio.to_thread(self.shared_limit.acquire))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            acquire.add_done_callback(self._release_abandoned_slot)
+            raise
+        try:
+            yield
+        finally:
+            self.shared_limit.release()
+
+    def _release_abandoned_slot(self, acquire: asyncio.Future) -> None:
+        if not acquire.cancelled() and acquire.exception() is None:
+            self.shared_limit.release()
+
+    def run(self, coro: Coroutine) -> Any:
+        """Run a coroutine on the backend loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self) -> None:
+        """Stop the backend event loop"""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def generate(self, prompt: str, structured: bool = True) -> str:
+        """
+        Generate a response for a prompt
+
+        Args:
+            prompt: Fully rendered prompt
+            structured: Return the "content" field of a JSON-schema response
+                (changelogs); otherwise return the raw JSON text (batch analysis)
+        """
+        backend = "api" if structured else "api-json"
+        if self.llm_cache:
+            cached = self.llm_cache.get(prompt, self.model, backend)
+            if cached is not None:
+                self.metrics.increment("llm_cache_hits")
+                return cached
+            self.metrics.increment("llm_cache_misses")
+        self.metrics.record_prompt(prompt)
+
+        if structured:
+            config = types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=self.CONTENT_SCHEMA,
+            )
+        else:
+            config = types.GenerateContentConfig(response_mime_type="application/json")
+
+        async with self._semaphore, self._shared_slot():
+            started = time.perf_counter()
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=self.model, contents=prompt, config=config
+                )
+            finally:
+                self.metrics.increment(
+                    "gemini_request_seconds", time.perf_counter() - started
+                )
+        content = response.parsed["content"] if structured else response.text
+
+        if self.llm_cache:
+            self.llm_cache.set(prompt, self.model, backend, content)
+        return content
+
+    async def generate_many(
+        self, prompts: List[str], structured: bool = True, return_exceptions: bool = False
+    ) -> List[Any]:
+        """Generate responses for several prompts concurrently, preserving order"""
+        return await asyncio.gather(
+            *(self.generate(prompt, structured) for prompt in prompts),
+            return_exceptions=return_exceptions,
+        )
+
+    async def generate_stream(
+        self, prompt: str, on_chunk: Callable[[str], None]
+    ) -> str:
+        """
+        Generate a changelog as plain text, passing each chunk to on_chunk
+
+        Shares the cache entries of structured generations (same content), so a
+        cached changelog is emitted as a single chunk.
+        """
+        if self.llm_cache:
+            cached = self.llm_cache.get(prompt, self.model, "api")
+            if cached is not None:
+                self.metrics.increment("llm_cache_hits")
+                on_chunk(cached)
+                return cached
+            self.metrics.increment("llm_cache_misses")
+        self.metrics.record_prompt(prompt)
+
+        chunks = []
+        async with self._semaphore, self._shared_slot():
+            started = time.perf_counter()
+            try:
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=self.model, contents=prompt
+                )
+                async for chunk in stream:
+                    if chunk.text:
+                        chunks.append(chunk.text)
+                        on_chunk(chunk.text)
+            finally:
+                self.metrics.increment(
+                    "gemini_request_seconds", time.perf_counter() - started
+                )
+        content = "".join(chunks).strip()
+
+        if self.llm_cache:
+            self.llm_cache.set(prompt, self.model, "api", content)
+        return content
+
+    async def generate_stream_many(
+        self, prompts: List[str], callbacks: List[Callable[[str], None]]
+    ) -> List[str]:
+        """Stream several generations concurrently, each to its own callback"""
+        return await asyncio.gather(
+            *(
+                self.generate_stream(prompt, on_chunk)
+                for prompt, on_chunk in zip(prompts, callbacks)
+            )
+        )
@@ -6,18 +6,120 @@ Gemini CLI Analyzer
 Handles interaction with Gemini CLI for analyzing commits and generating changelogs
 """
 
+import codecs
+import contextlib
+import hashlib
 import json
+import os
 import subprocess
-from typing import Dict, List
+import threading
+import time
+from typing import Callable, Dict, List
 from halo import Halo
+from .changelog_stream import ChangelogStream
+from .llm_cache import LLMResponseCache
+from .prompt_renderer import describe_size, render_batch_context, render_summary_context
+from .run_metrics import RunMetrics, timed_stage
+
+# Per-commit categorization instructions sent with every analysis batch
+ANALYSIS_PROMPT = """Analiza estos commits y categorízalos en:
+- features: Nuevas características
+- improvements: Mejoras a funcionalidad existente
+- fixes: Correcciones de bugs
+- breaking_changes: Cambios que rompen compatibilidad
+- architecture: Cambios arquitectónicos
+- dependencies: Cambios en dependencias
+- performance: Mejoras de rendimiento
+- security: Parches de seguridad
+- testing: Cambios en tests
+- docs: Cambios en documentación
+- other: Otros cambios
+
+Para cada commit, proporciona:
+- category: La categoría principal
+- title: Título descriptivo
+- description: Descripción detallada
+- technical_details: Detalles técnicos relevantes
+- files_affected: Archivos principales afectados
+
+Responde SOLO con un JSON válido con esta estructura:
+{
+  "commits": [
+    {
+      "id": "commit_id",
+      "category": "category_name",
+      "title": "título",
+      "description": "descripción",
+      "technical_details": "detalles técnicos",
+      "files_affected": ["file1", "file2"]
+    }
+  ]
+}"""
+
+# Bump when the batch context rendering changes in a way that affects the analysis
+ANALYSIS_CONTEXT_REVISION = "2"
 
 
 class GeminiCLIAnalyzer:
     """Manages interaction with Gemini CLI for local analysis"""
 
-    def __init__(self):
-        """Initialize the Gemini CLI analyzer"""
-        self.verify_gemini_cli()
+    # Identifies CLI responses in the LLM response cache
+    CACHE_BACKEND = "cli"
+
+    # Non-interactive invocation: the prompt is written to stdin, which has no
+    # size limit (argv is capped by the kernel's ARG_MAX)
+    CLI_COMMAND = ["gemini"]
+
+    def __init__(
+        self,
+        llm_cache: LLMResponseCache = None,
+        verify: bool = True,
+        concurrency_limit: threading.Semaphore = None,
+        show_spinners: bool = True,
+        metrics: RunMetrics = None,
+    ):
+        """
+        Initialize the Gemini CLI analyzer
+
+        Args:
+            llm_cache: Optional persistent response cache
+            verify: Check that the CLI is installed (skip it when the analyzer is
+                only used to build and parse prompts, e.g. in API mode)
+            concurrency_limit: Optional semaphore shared with other analyzers
+                bounding the Gemini CLI processes running at once
+            show_spinners: Show progress spinners (disabled when several
+                projects are generated concurrently)
+            metrics: Run metrics receiving prompt sizes, cache hits and
+                subprocess time
+        """
+        self.llm_cache = llm_cache
+        self.concurrency_limit = concurrency_limit or contextlib.nullcontext()
+        self.show_spinners = show_spinners
+        self.metrics = metrics or RunMetrics()
+        # GEMINI_CLI_MODEL is passed to the CLI; without it the CLI picks its
+        # own default (or the GEMINI_MODEL it reads from the environment)
+        configured_model = os.getenv("GEMINI_CLI_MODEL")
+        self.cli_model = configured_model or os.getenv("GEMINI_MODEL")
+        self.cli_command = list(self.CLI_COMMAND)
+        if configured_model:
+            self.cli_command += ["--model", configured_model]
+        self.cli_version = None
+        if verify:
+            self.verify_gemini_cli()
+
+    @property
+    def cache_model(self) -> str:
+        """
+        Model of the CLI responses in the LLM response cache
+
+        Includes the configured model and the CLI version, so that a new model
+        or a CLI upgrade (which may change its default model) never reuses
+        responses cached for the previous one.
+        """
+        return (
+            f"gemini-cli:{self.cli_model or 'default'}:"
+            f"{self.cli_version or 'unknown'}"
+        )
 
     def verify_gemini_cli(self) -> None:
         """Verify that Gemini CLI is installed and accessible"""
@@ -27,6 +129,7 @@ class GeminiCLIAnalyzer:
             )
             if result.returncode != 0:
                 raise RuntimeError("Gemini CLI is not working properly")
+            self.cli_version = result.stdout.strip() or None
         except FileNotFoundError:
             raise RuntimeError(
                 "Gemini CLI not found. Please install it first:\n"
@@ -35,26 +138,136 @@ class GeminiCLIAnalyzer:
         except subprocess.TimeoutExpired:
             raise RuntimeError("Gemini CLI verification timed out")
 
-    def _call_gemini_cli(self, prompt: str) -> str:
+    def _call_gemini_cli(
+        self, prompt: str, on_chunk: Callable[[str], None] = None
+    ) -> str:
         """
-        Call Gemini CLI in non-interactive mode using --prompt.
+        Call Gemini CLI in non-interactive mode with the prompt on stdin.
+        Responses are served from the LLM response cache when available.
+        With on_chunk, the output is streamed to it as the CLI writes it.
         """
-        cmd = ["gemini", "--prompt", prompt]
+        if self.llm_cache:
+            cached = self.llm_cache.get(prompt, self.cache_model, self.CACHE_BACKEND)
+            if cached is not None:
+                self.metrics.increment("llm_cache_hits")
+                if on_chunk:
+                    on_chunk(cached)
+                return cached
+            self.metrics.increment("llm_cache_misses")
+
+        self.metrics.record_prompt(prompt)
+        if on_chunk:
+            response = self._stream_gemini_cli(prompt, on_chunk)
+        else:
+            response = self._run_gemini_cli(prompt)
+
+        if self.llm_cache:
+            self.llm_cache.set(prompt, self.cache_model, self.CACHE_BACKEND, response)
+        return response
+
+    def _forget_response(self, prompt: str) -> None:
+        """Drop a cached response that could not be used"""
+        if self.llm_cache:
+            self.llm_cache.invalidate(prompt, self.cache_model, self.CACHE_BACKEND)
+
+    def _run_gemini_cli(self, prompt: str) -> str:
+        """Run the Gemini CLI subprocess for a prompt"""
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,  # 5 minutes timeout
-            )
+            with self.concurrency_limit:
+                started = time.perf_counter()
+                try:
+                    result = subprocess.run(
+                        self.cli_command,
+                        input=prompt,
+                        capture_output=True,
+                        text=True,
+                        encoding="utf-8",
+                        errors="replace",
+                        timeout=300,  # 5 minutes timeout
+                    )
+                finally:
+                    self.metrics.increment(
+                        "gemini_subprocess_seconds", time.perf_counter() - started
+                    )
             if result.returncode != 0:
                 raise RuntimeError(f"Gemini CLI error: {result.stderr}")
             return result.stdout.strip()
         except subprocess.TimeoutExpired:
             raise RuntimeError("Gemini CLI request timed out after 5 minutes")
 
+    def _stream_gemini_cli(self, prompt: str, on_chunk: Callable[[str], None]) -> str:
+        """Run the Gemini CLI, passing its stdout to on_chunk as it arrives"""
+        with self.concurrency_limit:
+            started = time.perf_counter()
+            try:
+                process = subprocess.Popen(
+                    self.cli_command,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+
+                def write_prompt() -> None:
+                    try:
+                        process.stdin.write(prompt.encode("utf-8"))
+                        process.stdin.close()
+                    except BrokenPipeError:
+                        # The CLI exited early, its error is on stderr
+                        pass
+
+                # Feed stdin and drain stderr on the side so neither pipe can
+                # block the CLI while its output is read
+                stderr = []
+                stdin_writer = threading.Thread(target=write_prompt, daemon=True)
+                stderr_reader = threading.Thread(
+                    target=lambda: stderr.append(process.stderr.read()), daemon=True
+                )
+                stdin_writer.start()
+                stderr_reader.start()
+
+                # Same 5 minutes timeout as the blocking call
+                timed_out = threading.Event()
+                timer = threading.Timer(
+                    300, lambda: (timed_out.set(), process.kill())
+                )
+                timer.start()
+
+                # Multi-byte characters may be split across reads
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                output = []
+                try:
+                    while True:
+                        data = process.stdout.read1(4096)
+                        text = decoder.decode(data, final=not data)
+                        if text:
+                            output.append(text)
+                            on_chunk(text)
+                        if not data:
+                            break
+                    process.wait()
+                finally:
+                    timer.cancel()
+                    stdin_writer.join()
+                    stderr_reader.join()
+            finally:
+                self.metrics.increment(
+                    "gemini_subprocess_seconds", time.perf_counter() - started
+                )
+
+        if timed_out.is_set():
+            raise RuntimeError("Gemini CLI request timed out after 5 minutes")
+        if process.returncode != 0:
+            error = b"".join(stderr).decode("utf-8", errors="replace")
+            raise RuntimeError(f"Gemini CLI error: {error}")
+        return "".join(output).strip()
+
+    @timed_stage("analyze_batch")
     def analyze_commits_batch(
-        self, commits_batch: List[Dict], batch_num: int, total_batches: int
+        self,
+        commits_batch: List[Dict],
+        batch_num: int,
+        total_batches: int,
+        show_spinner: bool = True,
     ) -> Dict:
         """
         Analyze a batch of commits using Gemini CLI
@@ -63,6 +276,8 @@ class GeminiCLIAnalyzer:
             commits_batch: List of commit details to analyze
             batch_num: Current batch number
             total_batches: Total number of batches
+            show_spinner: Whether to show a progress spinner for this batch
+                (disabled when several batches run concurrently)
 
         Returns:
             Dictionary with categorized changes
@@ -70,62 +285,22 @@ class GeminiCLIAnalyzer:
         spinner = Halo(
             text=f"Analyzing batch {batch_num}/{total_batches} with Gemini CLI...",
             spinner="dots",
+            enabled=show_spinner and self.show_spinners,
         )
         spinner.start()
 
-        # Prepare context for this batch
-        context = self._prepare_batch_context(commits_batch)
-
-        # Prepare analysis prompt
-        prompt = """Analiza estos commits y categorízalos en:
-- features: Nuevas características
-- improvements: Mejoras a funcionalidad existente
-- fixes: Correcciones de bugs
-- breaking_changes: Cambios que rompen compatibilidad
-- architecture: Cambios arquitectónicos
-- dependencies: Cambios en dependencias
-- performance: Mejoras de rendimiento
-- security: Parches de seguridad
-- testing: Cambios en tests
-- docs: Cambios en documentación
-- other: Otros cambios
-
-Para cada commit, proporciona:
-- category: La categoría principal
-- title: Título descriptivo
-- description: Descripción detallada
-- technical_details: Detalles técnicos relevantes
-- files_affected: Archivos principales afectados
-
-Responde SOLO con un JSON válido con esta estructura:
-{
-  "commits": [
-    {
-      "id": "commit_id",
-      "category": "category_name",
-      "title": "título",
-      "description": "descripción",
-      "technical_details": "detalles técnicos",
-      "files_affected": ["file1", "file2"]
-    }
-  ]
-}"""
-
-        # Combine prompt and context for CLI
-        combined_prompt = f"{prompt}\n\n=== CONTEXTO DE COMMITS (LOTE {batch_num}/{total_batches}) ===\n\n{context}"
+        combined_prompt = self.build_batch_prompt(
+            commits_batch, batch_num, total_batches
+        )
 
         try:
             response = self._call_gemini_cli(combined_prompt)
 
-            # Parse JSON response
-            # Extract JSON from response (in case there's extra text)
-            json_start = response.find("{")
-            json_end = response.rfind("}") + 1
-            if json_start != -1 and json_end > json_start:
-                json_str = response[json_start:json_end]
-                result = json.loads(json_str)
-            else:
-                raise ValueError("No valid JSON found in response")
+            try:
+                result = self.parse_batch_response(response)
+            except ValueError:
+                self._forget_response(combined_prompt)
+                raise
 
             spinner.succeed(f"Batch {batch_num}/{total_batches} analyzed")
             return result
@@ -136,36 +311,54 @@ Responde SOLO con un JSON válido con esta estructura:
             spinner.fail(f"Failed to analyze batch {batch_num}")
             raise
 
-    def _prepare_batch_context(self, commits: List[Dict]) -> str:
-        """Prepare context for a batch of commits"""
-        context = "# Commits to Analyze\n\n"
-
-        for commit in commits:
-            context += f"## Commit {commit['id']}\n"
-            context += f"**Author:** {commit['author']}\n"
-            context += f"**Date:** {commit['date']}\n"
-            context += f"**Message:**\n{commit['message']}\n\n"
-            context += f"**Stats:** +{commit['stats']['additions']} -{commit['stats']['deletions']}\n\n"
-
-            # Add file changes
-            context += "**Files Changed:**\n"
-            for diff_item in commit["diff"][:10]:  # Limit to 10 files per commit
-                file_path = diff_item.get(
-                    "new_path", diff_item.get("old_path", "unknown")
-                )
-                context += f"- {file_path}\n"
+    @timed_stage("condense_summary")
+    def condense_summary(self, prompt: str) -> str:
+        """Run one reduce step of a large summary context (see SummaryReducer)"""
+        return self._call_gemini_cli(prompt)
+
+    @staticmethod
+    def analysis_prompt_version(diff_fingerprint: str = "") -> str:
+        """
+        Version of the analysis prompt, used to namespace stored analyses
 
-                # Add diff snippet if available
-                if "diff" in diff_item and diff_item["diff"]:
-                    diff_lines = diff_item["diff"].split("\n")[:15]  # First 15 lines
-                    context += f"  ```diff\n{chr(10).join(diff_lines)}\n  ```\n"
+        Args:
+            diff_fingerprint: Diff retention and selection settings (see
+                DiffRetentionPolicy.fingerprint), which change the diffs the
+                prompt shows and so the analyses it produces
+        """
+        key = "\0".join((ANALYSIS_CONTEXT_REVISION, ANALYSIS_PROMPT, diff_fingerprint))
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
 
-            context += "\n---\n\n"
+    def build_batch_prompt(
+        self, commits_batch: List[Dict], batch_num: int, total_batches: int
+    ) -> str:
+        """Build the categorization prompt for a batch of commits"""
+        # Prepare context for this batch
+        context = render_batch_context(commits_batch)
+        self.metrics.increment("batch_context_chars", len(context))
+
+        # Prepare analysis prompt
+        prompt = ANALYSIS_PROMPT
+
+        # Combine prompt and context for CLI
+        combined_prompt = f"{prompt}\n\n=== CONTEXTO DE COMMITS (LOTE {batch_num}/{total_batches}) ===\n\n{context}"
+        return combined_prompt
 
-        return context
+    @staticmethod
+    def parse_batch_response(response: str) -> Dict:
+        """Extract the JSON analysis from a batch response (in case there's extra text)"""
+        json_start = response.find("{")
+        json_end = response.rfind("}") + 1
+        if json_start != -1 and json_end > json_start:
+            return json.loads(response[json_start:json_end])
+        raise ValueError("No valid JSON found in response")
 
     def generate_commercial_changelog(
-        self, analyzed_commits: List[Dict], tag_name: str
+        self,
+        analyzed_commits: List[Dict],
+        tag_name: str,
+        stream: ChangelogStream = None,
+        summary_context: str = None,
     ) -> str:
         """
         Generate commercial changelog from analyzed commits using Gemini CLI
@@ -173,15 +366,28 @@ Responde SOLO con un JSON válido con esta estructura:
         Args:
             analyzed_commits: List of analyzed and categorized commits
             tag_name: The release tag name
+            stream: Optional stream receiving the changelog as it is generated
+            summary_context: Summary context already rendered (and condensed)
+                from analyzed_commits
 
         Returns:
             Commercial changelog text
         """
-        spinner = Halo(text="Generating commercial changelog...", spinner="dots")
+        spinner = Halo(
+            text="Generating commercial changelog...",
+            spinner="dots",
+            enabled=self.show_spinners and stream is None,
+        )
         spinner.start()
+        if stream:
+            stream.start()
+            print(f"\n📝 Streaming commercial changelog to {stream.path}\n")
 
         # Prepare summary context
-        context = self._prepare_summary_context(analyzed_commits)
+        context = summary_context
+        if context is None:
+            context = render_summary_context(analyzed_commits)
+            self.metrics.increment("summary_context_chars", len(context))
 
         prompt = f"""Basándote en el análisis de commits proporcionado, genera un CHANGELOG COMERCIAL para el release {tag_name}.
 
@@ -223,16 +429,28 @@ Reglas:
 
         # Combine prompt and context
         combined_prompt = f"{prompt}\n\n=== RESUMEN ANALIZADO ===\n\n{context}"
+        size = describe_size(combined_prompt)
+        spinner.text = f"Generating commercial changelog ({size})..."
         try:
-            response = self._call_gemini_cli(combined_prompt)
+            response = self._call_gemini_cli(
+                combined_prompt, on_chunk=stream.write if stream else None
+            )
             spinner.succeed("Commercial changelog generated")
+            if stream:
+                print(f"\n✅ Commercial changelog generated ({stream.summary()})")
             return response
         except Exception:
             spinner.fail("Failed to generate commercial changelog")
+            if stream:
+                print("\n❌ Failed to generate commercial changelog")
             raise
 
     def generate_technical_changelog(
-        self, analyzed_commits: List[Dict], tag_name: str
+        self,
+        analyzed_commits: List[Dict],
+        tag_name: str,
+        stream: ChangelogStream = None,
+        summary_context: str = None,
     ) -> str:
         """
         Generate technical changelog from analyzed commits using Gemini CLI
@@ -240,15 +458,28 @@ Reglas:
         Args:
             analyzed_commits: List of analyzed and categorized commits
             tag_name: The release tag name
+            stream: Optional stream receiving the changelog as it is generated
+            summary_context: Summary context already rendered (and condensed)
+                from analyzed_commits
 
         Returns:
             Technical changelog text
         """
-        spinner = Halo(text="Generating technical changelog...", spinner="dots")
+        spinner = Halo(
+            text="Generating technical changelog...",
+            spinner="dots",
+            enabled=self.show_spinners and stream is None,
+        )
         spinner.start()
+        if stream:
+            stream.start()
+            print(f"\n📝 Streaming technical changelog to {stream.path}\n")
 
         # Prepare summary context
-        context = self._prepare_summary_context(analyzed_commits)
+        context = summary_context
+        if context is None:
+            context = render_summary_context(analyzed_commits)
+            self.metrics.increment("summary_context_chars", len(context))
 
         prompt = f"""Basándote en el análisis de commits proporcionado, genera un CHANGELOG TÉCNICO para el release {tag_name}.
 
@@ -316,43 +547,18 @@ Reglas:
 
         # Combine prompt and context
         combined_prompt = f"{prompt}\n\n=== RESUMEN ANALIZADO ===\n\n{context}"
+        size = describe_size(combined_prompt)
+        spinner.text = f"Generating technical changelog ({size})..."
         try:
-            response = self._call_gemini_cli(combined_prompt)
+            response = self._call_gemini_cli(
+                combined_prompt, on_chunk=stream.write if stream else None
+            )
             spinner.succeed("Technical changelog generated")
+            if stream:
+                print(f"\n✅ Technical changelog generated ({stream.summary()})")
             return response
         except Exception:
             spinner.fail("Failed to generate technical changelog")
+            if stream:
+                print("\n❌ Failed to generate technical changelog")
             raise
-
-    def _prepare_summary_context(self, analyzed_commits: List[Dict]) -> str:
-        """Prepare summary context from analyzed commits"""
-        context = "# Analyzed Commits Summary\n\n"
-
-        # Group by category
-        categories = {}
-        for commit_data in analyzed_commits:
-            for commit in commit_data.get("commits", []):
-                category = commit.get("category", "other")
-                if category not in categories:
-                    categories[category] = []
-                categories[category].append(commit)
-
-        # Format by category
-        for category, commits in categories.items():
-            context += f"## {category.upper()}\n\n"
-            for commit in commits:
-                context += f"### {commit.get('title', 'No title')}\n"
-                context += f"**ID:** {commit.get('id', 'unknown')}\n"
-                context += (
-                    f"**Description:** {commit.get('description', 'No description')}\n"
-                )
-                context += f"**Technical Details:** {commit.get('technical_details', 'None')}\n"
-
-                files = commit.get("files_affected", [])
-                if files:
-                    context += f"**Files:** {', '.join(files[:5])}\n"
-
-                context += "\n"
-            context += "---\n\n"
-
-        return context
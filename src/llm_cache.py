@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LLM Response Cache for GitLab Changelog Generator
+Persists Gemini responses so re-runs with identical prompts skip the model call
+"""
+
+import json
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# Entries allowed above max_entries before a write triggers a collection
+GC_SLACK_RATIO = 0.1
+
+
+class LLMResponseCache:
+    """Size-bounded, TTL-aware LRU cache of LLM responses stored on disk"""
+
+    def __init__(
+        self,
+        cache_dir: str = ".cache/llm",
+        max_entries: int = None,
+        ttl_seconds: float = None,
+    ):
+        """Initialize the response cache (limits default to LLM_CACHE_* env vars)"""
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        if max_entries is None:
+            max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("LLM_CACHE_TTL_DAYS", "30")) * 86400
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Estimated number of stored entries, counted on the first write
+        self._entries: Optional[int] = None
+
+    @staticmethod
+    def _key(prompt: str, model: str, backend: str) -> str:
+        """Hash of the fully rendered prompt, the model and the backend"""
+        digest = hashlib.sha256()
+        for part in (backend, model, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, prompt: str, model: str, backend: str) -> Optional[str]:
+        """Return the cached response for a prompt, or None on a miss"""
+        entry_file = self._entry_path(self._key(prompt, model, backend))
+
+        try:
+            with open(entry_file, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except Exception:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            entry_file.unlink(missing_ok=True)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Refresh the access time used for LRU eviction
+        os.utime(entry_file)
+        with self._lock:
+            self.hits += 1
+        return entry["response"]
+
+    def set(self, prompt: str, model: str, backend: str, response: str) -> None:
+        """Store a response and evict old entries beyond the size bound"""
+        entry_file = self._entry_path(self._key(prompt, model, backend))
+        new_entry = not entry_file.exists()
+        entry = {
+            "backend": backend,
+            "model": model,
+            "created_at": time.time(),
+            "response": response,
+        }
+
+        tmp_file = entry_file.with_suffix(
+            f".{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_file, entry_file)
+
+        # Collect once the estimate crosses the bound by some slack, instead of
+        # scanning the directory on every write
+        if self._entries is None:
+            entries = self.stats()["entries"]
+            with self._lock:
+                self._entries = entries
+        elif new_entry:
+            with self._lock:
+                self._entries += 1
+        slack = max(1, int(self.max_entries * GC_SLACK_RATIO))
+        if self._entries > self.max_entries + slack:
+            self.gc()
+
+    def invalidate(self, prompt: str, model: str, backend: str) -> None:
+        """Drop a cached response (e.g. one that turned out to be unusable)"""
+        self._entry_path(self._key(prompt, model, backend)).unlink(missing_ok=True)
+
+    def gc(self) -> Dict[str, int]:
+        """
+        Remove expired entries, then the least recently used beyond max_entries
+
+        Returns:
+            Removed entries and bytes freed
+        """
+        removed = {"entries": 0, "bytes_freed": 0}
+
+        def remove(entry_file: Path, size: int) -> None:
+            entry_file.unlink(missing_ok=True)
+            removed["entries"] += 1
+            removed["bytes_freed"] += size
+
+        with self._lock:
+            now = time.time()
+            entries = []
+            for entry_file in self.cache_dir.glob("*.json"):
+                try:
+                    stat = entry_file.stat()
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.ttl_seconds:
+                    remove(entry_file, stat.st_size)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, entry_file))
+
+            if len(entries) > self.max_entries:
+                entries.sort()
+                for _, size, entry_file in entries[: len(entries) - self.max_entries]:
+                    remove(entry_file, size)
+                entries = entries[len(entries) - self.max_entries :]
+            self._entries = len(entries)
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Stored entries and their bytes"""
+        sizes = []
+        for entry_file in self.cache_dir.glob("*.json"):
+            try:
+                sizes.append(entry_file.stat().st_size)
+            except FileNotFoundError:
+                continue
+        return {"entries": len(sizes), "bytes": sum(sizes)}
+
+    def summary(self) -> str:
+        """Human readable hit/miss summary"""
+        return f"LLM cache: {self.hits} hits, {self.misses} misses"
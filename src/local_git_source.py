@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Local Git Source for GitLab Changelog Generator
+Reads tags, commit ranges, metadata and diffs straight from a local clone using
+batched git plumbing, producing the same dicts as the GitLab API path
+"""
+
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+from .commit_dedup import PatchIdHasher
+from .diff_retention import DiffRetentionPolicy
+from .diff_selection import SCAN_LINES
+
+
+class LocalGitSource:
+    """Commit data source backed by a local git repository"""
+
+    def __init__(self, repo_path: str, retention: DiffRetentionPolicy = None):
+        """
+        Initialize the source for a local repository
+
+        Args:
+            repo_path: Path to a full (non-shallow) clone
+            retention: Files and diff lines kept per commit
+        """
+        self.repo_path = Path(repo_path)
+        self.retention = retention or DiffRetentionPolicy()
+
+        try:
+            self._git("rev-parse", "--git-dir")
+        except RuntimeError:
+            raise ValueError(f"Not a git repository: {self.repo_path}")
+
+    @property
+    def name(self) -> str:
+        """Display name of the repository"""
+        return self.repo_path.resolve().name
+
+    def _git(self, *args: str, stdin: str = None) -> str:
+        """Run a git command in the repository and return its stdout"""
+        result = subprocess.run(
+            ["git", "-c", "core.quotepath=off", *args],
+            cwd=self.repo_path,
+            input=stdin,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"git {args[0]} failed: {result.stderr.strip()}")
+        return result.stdout
+
+    def list_tags(self) -> List[Tuple[str, str]]:
+        """Return (tag name, commit SHA) pairs, newest first"""
+        output = self._git(
+            "for-each-ref",
+            "--sort=-creatordate",
+            "--format=%(refname:short)%00%(objectname)%00%(*objectname)",
+            "refs/tags",
+        )
+        tags = []
+        for line in output.splitlines():
+            name, sha, peeled_sha = line.split("\0")
+            # Annotated tags point at a tag object: use the peeled commit
+            tags.append((name, peeled_sha or sha))
+        return tags
+
+    def list_commits(self, from_tag: str, to_tag: str) -> List[Dict]:
+        """Return metadata for the commits in from_tag..to_tag, oldest first"""
+        output = self._git(
+            "log",
+            "--reverse",
+            "--format=%H%x00%P%x00%an%x00%cI%x00%B%x1e",
+            f"{from_tag}..{to_tag}",
+        )
+        commits = []
+        for record in output.split("\x1e"):
+            record = record.lstrip("\n")
+            if not record:
+                continue
+            sha, parents, author, date, message = record.split("\0", 4)
+            message = message.rstrip("\n")
+            commits.append(
+                {
+                    "id": sha,
+                    "title": message.split("\n", 1)[0],
+                    "message": message,
+                    "author_name": author,
+                    "created_at": date,
+                    "parent_ids": parents.split(),
+                }
+            )
+        return commits
+
+    def pure_merges(self, shas: Iterable[str]) -> Set[str]:
+        """
+        Merge commits whose combined diff is empty
+
+        `git diff-tree --cc` only lists the files where a merge differs from
+        every parent, i.e. conflict resolutions and changes made in the merge.
+        """
+        shas = list(shas)
+        if not shas:
+            return set()
+        output = self._git(
+            "diff-tree",
+            "--stdin",
+            "--always",
+            "--cc",
+            "-r",
+            "--name-only",
+            stdin="\n".join(shas) + "\n",
+        )
+        pure = set()
+        current = None
+        for line in output.splitlines():
+            if line in shas:
+                current = line
+                pure.add(current)
+            elif line and current:
+                pure.discard(current)
+        return pure
+
+    def get_commit_details(self, commits: Iterable[Dict]) -> Dict[str, Dict]:
+        """
+        Return commit detail dicts (as built from the GitLab API) keyed by SHA
+
+        All commits are read with a single streamed `git log --no-walk --patch`
+        and each file diff is truncated while parsing.
+        """
+        commits = {commit["id"]: commit for commit in commits}
+        if not commits:
+            return {}
+
+        process = subprocess.Popen(
+            [
+                "git",
+                "-c",
+                "core.quotepath=off",
+                "log",
+                "--no-walk=unsorted",
+                "--stdin",
+                "--format=%x00%H",
+                "--patch",
+                "-M",
+                "--diff-merges=first-parent",
+                "--no-color",
+                "--no-ext-diff",
+            ],
+            cwd=self.repo_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        process.stdin.write("\n".join(commits) + "\n")
+        process.stdin.close()
+
+        details = {}
+        current = None
+        file_entry = None
+        file_lines = []
+        selector = self.retention.selector
+        # Candidate files of the current commit, selected once it is complete
+        candidates = []
+
+        def close_file():
+            if file_entry is None:
+                return
+            current["diff_stats"]["file_stats"].append(
+                [file_entry["new_path"], file_entry["additions"], file_entry["deletions"]]
+            )
+            current["diff_stats"]["files_changed"] += 1
+            file_entry["diff"] = "\n".join(file_lines)
+            if selector.is_ignored(file_entry["new_path"], file_entry["diff"]):
+                current["diff_stats"]["files_ignored"] += 1
+            else:
+                candidates.append(file_entry)
+
+        def close_commit():
+            close_file()
+            if current is not None:
+                current["diff"], _ = self.retention.select(candidates)
+                current["diff_stats"]["patch_id"] = hasher.hexdigest()
+            candidates.clear()
+
+        for line in process.stdout:
+            line = line.rstrip("\n")
+
+            if line.startswith("\0"):
+                close_commit()
+                file_entry = None
+                hasher = PatchIdHasher()
+                sha = line[1:]
+                commit = commits[sha]
+                current = {
+                    "id": sha[:8],
+                    "full_id": sha,
+                    "message": commit["message"],
+                    "title": commit["title"],
+                    "author": commit["author_name"],
+                    "date": commit["created_at"],
+                    "diff": [],
+                    "stats": {"additions": 0, "deletions": 0, "total": 0},
+                    "diff_stats": {
+                        "files_changed": 0,
+                        "files_ignored": 0,
+                        "file_stats": [],
+                    },
+                }
+                details[sha] = current
+                continue
+
+            if current is None:
+                continue
+
+            if line.startswith("diff --git "):
+                close_file()
+                paths = line[len("diff --git a/") :].split(" b/", 1)
+                file_entry = {
+                    "old_path": paths[0],
+                    "new_path": paths[-1],
+                    "new_file": False,
+                    "deleted_file": False,
+                    "renamed_file": False,
+                    "additions": 0,
+                    "deletions": 0,
+                }
+                file_lines = []
+                in_hunks = False
+                hasher.add_file(file_entry["new_path"])
+                continue
+
+            if file_entry is None:
+                continue
+
+            if not in_hunks:
+                if line.startswith("@@"):
+                    in_hunks = True
+                elif line.startswith("new file mode"):
+                    file_entry["new_file"] = True
+                    continue
+                elif line.startswith("Binary files "):
+                    # Kept so the selector recognizes the file as binary
+                    file_lines.append(line)
+                    continue
+                elif line.startswith("deleted file mode"):
+                    file_entry["deleted_file"] = True
+                    continue
+                elif line.startswith("rename from "):
+                    file_entry["renamed_file"] = True
+                    file_entry["old_path"] = line[len("rename from ") :]
+                    continue
+                elif line.startswith("rename to "):
+                    file_entry["new_path"] = line[len("rename to ") :]
+                    continue
+                elif line.startswith("--- a/"):
+                    file_entry["old_path"] = line[len("--- a/") :]
+                    continue
+                elif line.startswith("+++ b/"):
+                    file_entry["new_path"] = line[len("+++ b/") :]
+                    continue
+                else:
+                    continue
+
+            # Every changed line counts in the patch id, not only the kept ones
+            hasher.add_line(line)
+            if line.startswith("+"):
+                file_entry["additions"] += 1
+                current["stats"]["additions"] += 1
+            elif line.startswith("-"):
+                file_entry["deletions"] += 1
+                current["stats"]["deletions"] += 1
+
+            # Enough lines to rank the leading hunks of the file
+            if len(file_lines) < SCAN_LINES:
+                file_lines.append(line)
+
+        close_commit()
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError(f"git log failed: {stderr.strip()}")
+
+        for detail in details.values():
+            stats = detail["stats"]
+            stats["total"] = stats["additions"] + stats["deletions"]
+        return details
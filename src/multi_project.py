@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Multi-Project Runner for GitLab Changelog Generator
+Generates changelogs for several projects released together in one invocation,
+running the per-project pipelines concurrently under global GitLab and Gemini
+concurrency limits
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+import requests
+from requests.adapters import HTTPAdapter
+from .changelog_generator import ChangelogGenerator
+
+# Project names and IDs become directories under the results and cache directories
+SAFE_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*\Z")
+PROJECT_NUMBER = re.compile(r"[0-9]+\Z")
+
+
+class LimitedSession(requests.Session):
+    """HTTP session of one GitLab client, bounding in-flight requests with a
+    semaphore shared by the sessions of every project"""
+
+    def __init__(self, limit: threading.Semaphore, max_requests: int):
+        super().__init__()
+        self._limit = limit
+        # Keep one pooled connection per allowed request
+        adapter = HTTPAdapter(pool_maxsize=max_requests)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, *args: Any, **kwargs: Any) -> requests.Response:
+        with self._limit:
+            return super().request(*args, **kwargs)
+
+
+class _ThreadOutputRouter:
+    """stdout replacement sending each project thread's prints to its own log"""
+
+    def __init__(self, default: Any):
+        self._default = default
+        self._routes = {}
+
+    def route(self, stream: Any) -> None:
+        self._routes[threading.get_ident()] = stream
+
+    def unroute(self) -> None:
+        self._routes.pop(threading.get_ident(), None)
+
+    def _target(self) -> Any:
+        return self._routes.get(threading.get_ident(), self._default)
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._default, name)
+
+
+def validate_project_id(project_id: Any) -> str:
+    """
+    GitLab project ID as a string: a positive number or a namespace path
+    ("group/subgroup/project") made of safe names
+    """
+    project_id = str(project_id)
+    if PROJECT_NUMBER.match(project_id):
+        if int(project_id) > 0:
+            return project_id
+    elif all(SAFE_NAME.match(part) for part in project_id.split("/")):
+        return project_id
+    raise ValueError(
+        f"Invalid project id {project_id!r}: use a project number or a "
+        "group/project path"
+    )
+
+
+def validate_project_name(name: Any) -> str:
+    """Project or job name, used as a directory name"""
+    name = str(name)
+    if not SAFE_NAME.match(name):
+        raise ValueError(
+            f"Invalid name {name!r}: use letters, digits, '.', '_' and '-' only"
+        )
+    return name
+
+
+def project_dir(root: Path, name: str) -> Path:
+    """Directory of a project right below root, refusing names that escape it"""
+    path = Path(root) / name
+    if path.resolve().parent != Path(root).resolve():
+        raise ValueError(f"Project directory {name!r} is not inside {root}")
+    return path
+
+
+def load_project_specs(projects: str = None, manifest: str = None) -> List[Dict]:
+    """
+    Build the list of projects to generate
+
+    Args:
+        projects: Comma-separated GitLab project IDs
+        manifest: JSON file with a list of projects (or {"projects": [...]}).
+            Each entry is a project ID or an object with "id" or "repo_path"
+            and optional "name", "from_tag", "to_tag", "ranges" and "last"
+
+    Returns:
+        Project specs as dicts
+    """
+    entries = []
+    if manifest:
+        with open(manifest, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        entries.extend(data["projects"] if isinstance(data, dict) else data)
+    if projects:
+        entries.extend(p.strip() for p in projects.split(",") if p.strip())
+
+    specs = []
+    for entry in entries:
+        spec = dict(entry) if isinstance(entry, dict) else {"id": str(entry)}
+        if not spec.get("id") and not spec.get("repo_path"):
+            raise ValueError(f"Manifest entry needs an 'id' or 'repo_path': {entry}")
+        if spec.get("id"):
+            spec["id"] = validate_project_id(spec["id"])
+        if spec.get("name") is not None:
+            spec["name"] = validate_project_name(spec["name"])
+        if isinstance(spec.get("ranges"), str):
+            spec["ranges"] = spec["ranges"].split(",")
+        specs.append(spec)
+
+    if not specs:
+        raise ValueError("No projects given (use --projects or --manifest)")
+    return specs
+
+
+class MultiProjectRunner:
+    """Runs one changelog pipeline per project on a bounded thread pool"""
+
+    def __init__(
+        self,
+        projects: List[Dict],
+        generator_options: Dict = None,
+        max_projects: int = None,
+        gitlab_concurrency: int = None,
+        gemini_concurrency: int = None,
+        results_dir: str = "results",
+    ):
+        """
+        Initialize the runner
+
+        Args:
+            projects: Project specs (see load_project_specs); from_tag, to_tag,
+                ranges and last default to the values of generator_options
+            generator_options: Keyword arguments shared by every ChangelogGenerator
+                plus the default from_tag, to_tag, ranges and last
+            max_projects: Projects generated at once
+                (default: MULTI_PROJECT_WORKERS or 4)
+            gitlab_concurrency: GitLab requests in flight across all projects
+                (default: GITLAB_GLOBAL_CONCURRENCY or 8)
+            gemini_concurrency: Gemini CLI processes or API requests in flight
+                across all projects (default: GEMINI_GLOBAL_CONCURRENCY or 4)
+            results_dir: Parent directory of the per-project results directories
+        """
+        if max_projects is None:
+            max_projects = int(os.getenv("MULTI_PROJECT_WORKERS", "4"))
+        if gitlab_concurrency is None:
+            gitlab_concurrency = int(os.getenv("GITLAB_GLOBAL_CONCURRENCY", "8"))
+        if gemini_concurrency is None:
+            gemini_concurrency = int(os.getenv("GEMINI_GLOBAL_CONCURRENCY", "4"))
+        if min(max_projects, gitlab_concurrency, gemini_concurrency) < 1:
+            raise ValueError("Multi-project concurrency limits must be at least 1")
+
+        self.projects = projects
+        self.generator_options = dict(generator_options or {})
+        self.defaults = {
+            key: self.generator_options.pop(key, None)
+            for key in ("from_tag", "to_tag", "ranges", "last")
+        }
+        self.max_projects = max_projects
+        self.results_dir = Path(results_dir)
+
+        # Shared by every project so the limits are global
+        self.gitlab_concurrency = gitlab_concurrency
+        self.gemini_concurrency = gemini_concurrency
+        self.gitlab_limit = threading.BoundedSemaphore(gitlab_concurrency)
+        self.gemini_limit = threading.BoundedSemaphore(gemini_concurrency)
+
+        labels = [self.project_label(spec) for spec in projects]
+        for spec, label in zip(projects, labels):
+            # Refuse specs whose directories would escape their roots
+            project_dir(self.results_dir, label)
+            project_dir(Path(".cache") / "projects", self.project_key(spec))
+        duplicates = {label for label in labels if labels.count(label) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate projects in manifest: {sorted(duplicates)}")
+
+    @staticmethod
+    def project_key(spec: Dict) -> str:
+        """Stable key of a project, used for its cache directory"""
+        if spec.get("repo_path"):
+            return f"local_{Path(spec['repo_path']).resolve().name}"
+        # Namespace paths are URL-encoded as in the GitLab API: one directory
+        return f"project_{str(spec['id']).replace('/', '%2F')}"
+
+    def project_label(self, spec: Dict) -> str:
+        """Display name of a project, used for its results directory"""
+        return str(spec.get("name") or self.project_key(spec))
+
+    def _run_project(self, spec: Dict, router: _ThreadOutputRouter) -> Dict:
+        """Generate the changelogs of one project, logging to its results directory"""
+        label = self.project_label(spec)
+        results_dir = project_dir(self.results_dir, label)
+        cache_dir = project_dir(Path(".cache") / "projects", self.project_key(spec))
+        results_dir.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        result = {"label": label, "output_dirs": [], "error": None}
+
+        options = {
+            key: spec.get(key) or default for key, default in self.defaults.items()
+        }
+        generator = None
+        with open(results_dir / "generation.log", "a", encoding="utf-8") as log:
+            router.route(log)
+            try:
+                generator = ChangelogGenerator(
+                    **self.generator_options,
+                    repo_path=spec.get("repo_path"),
+                    project_id=spec.get("id"),
+                    results_dir=results_dir,
+                    cache_dir=cache_dir,
+                    show_spinners=False,
+                    gitlab_session=LimitedSession(
+                        self.gitlab_limit, self.gitlab_concurrency
+                    ),
+                    gemini_limit=self.gemini_limit,
+                )
+                if options["ranges"] or options["last"]:
+                    result["output_dirs"] = generator.generate_many(
+                        ranges=options["ranges"], last=options["last"]
+                    )
+                else:
+                    output_dir = generator.generate(
+                        options["from_tag"], options["to_tag"]
+                    )
+                    result["output_dirs"] = [output_dir] if output_dir else []
+            except Exception as e:
+                result["error"] = e
+                print(f"\n❌ Error: {str(e)}")
+            finally:
+                if generator:
+                    generator.export_metrics(results_dir / "run_report.json")
+                router.unroute()
+
+        result["elapsed"] = time.perf_counter() - started
+        return result
+
+    def run(self, combined_summary: bool = False) -> List[Dict]:
+        """
+        Generate every project concurrently
+
+        Returns:
+            One result per project (in input order) with its label, output
+            directories, error (if any) and elapsed seconds
+        """
+        total = len(self.projects)
+        print(
+            f"\n📦 Multi-project mode: {total} projects, {self.max_projects} at a time"
+        )
+        started = time.perf_counter()
+        results = [None] * total
+
+        router = _ThreadOutputRouter(sys.stdout)
+        sys.stdout = router
+        executor = ThreadPoolExecutor(max_workers=self.max_projects)
+        try:
+            futures = {
+                executor.submit(self._run_project, spec, router): i
+                for i, spec in enumerate(self.projects)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results[futures[future]] = result
+                status = "❌" if result["error"] else "✅"
+                print(
+                    f"   {status} [{done}/{total}] {result['label']} "
+                    f"({len(result['output_dirs'])} releases, "
+                    f"{result['elapsed']:.0f}s)"
+                )
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            sys.stdout = router._default
+        executor.shutdown()
+
+        succeeded = sum(1 for result in results if not result["error"])
+        print("\n" + "=" * 60)
+        print(
+            f"✅ Multi-project run completed: {succeeded}/{total} projects "
+            f"in {time.perf_counter() - started:.0f}s"
+        )
+        print("=" * 60)
+        for result in results:
+            if result["error"]:
+                print(f"❌ {result['label']}: {result['error']}")
+        print(f"📁 Results and per-project logs: {self.results_dir.absolute()}")
+
+        if combined_summary:
+            summary_file = self.write_combined_summary(results)
+            print(f"📄 Combined summary: {summary_file.absolute()}")
+        print()
+
+        return results
+
+    def write_combined_summary(self, results: List[Dict]) -> Path:
+        """Write one markdown file with every project's commercial changelog"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        summary_file = self.results_dir / f"release_summary_{timestamp}.md"
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+
+        sections = [f"# Resumen de release ({datetime.now():%Y-%m-%d %H:%M})\n"]
+        for result in results:
+            sections.append(f"## {result['label']}\n")
+            if result["error"]:
+                sections.append(f"❌ Error: {result['error']}\n")
+                continue
+            if not result["output_dirs"]:
+                sections.append("Sin cambios en este release.\n")
+                continue
+            for output_dir in result["output_dirs"]:
+                for changelog in sorted(output_dir.glob("Changelog_comercial_*.md")):
+                    content = changelog.read_text(encoding="utf-8").strip()
+                    sections.append(content + "\n")
+
+        summary_file.write_text("\n".join(sections), encoding="utf-8")
+        return summary_file
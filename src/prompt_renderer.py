@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Prompt Renderer for GitLab Changelog Generator
+Renders the commit contexts sent to Gemini (analysis batches, the summary of
+analyzed commits and the legacy API release context) for both the CLI and the
+API paths
+
+Prompts are assembled as a list of parts joined once, so rendering stays
+linear in the output size, and diff snippets are cut by scanning for their
+first newlines instead of splitting the whole diff.
+"""
+
+from typing import Dict, Iterable, List
+
+# Rough characters-per-token ratio used to estimate prompt sizes
+CHARS_PER_TOKEN = 4
+
+# Diff files and leading lines kept per commit in each context
+BATCH_DIFF_FILES = 10
+BATCH_DIFF_LINES = 15
+RELEASE_DIFF_FILES = 5
+RELEASE_DIFF_LINES = 20
+SUMMARY_FILES = 5
+
+BATCH_CONTEXT_HEADER = "# Commits to Analyze\n\n"
+SUMMARY_CONTEXT_HEADER = "# Analyzed Commits Summary\n\n"
+
+
+def estimate_tokens(chars: int) -> int:
+    """Estimated tokens of a prompt with the given number of characters"""
+    return chars // CHARS_PER_TOKEN
+
+
+def describe_size(text: str) -> str:
+    """Human readable size of a rendered prompt"""
+    return f"{len(text):,} chars, ~{estimate_tokens(len(text)):,} tokens"
+
+
+def leading_lines(text: str, count: int) -> str:
+    """First count lines of a text, without splitting the rest of it"""
+    end = -1
+    for _ in range(count):
+        end = text.find("\n", end + 1)
+        if end == -1:
+            return text
+    return text[:end]
+
+
+class PromptBuilder:
+    """Collects prompt parts and joins them once, tracking the rendered size"""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self.chars = 0
+
+    def write(self, *parts: str) -> None:
+        for part in parts:
+            self._parts.append(part)
+            self.chars += len(part)
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.chars)
+
+    def render(self) -> str:
+        return "".join(self._parts)
+
+
+def _diff_path(diff_item: Dict) -> str:
+    return diff_item.get("new_path", diff_item.get("old_path", "unknown"))
+
+
+def _write_commit_header(builder: PromptBuilder, heading: str, commit: Dict) -> None:
+    stats = commit["stats"]
+    builder.write(
+        f"{heading} {commit['id']}\n",
+        f"**Author:** {commit['author']}\n",
+        f"**Date:** {commit['date']}\n",
+        f"**Message:**\n{commit['message']}\n\n",
+        f"**Stats:** +{stats['additions']} -{stats['deletions']}\n\n",
+    )
+
+
+def _write_batch_commit(builder: PromptBuilder, commit: Dict) -> None:
+    _write_commit_header(builder, "## Commit", commit)
+
+    # Add file changes
+    builder.write("**Files Changed:**\n")
+    for diff_item in commit["diff"][:BATCH_DIFF_FILES]:
+        builder.write(f"- {_diff_path(diff_item)}\n")
+
+        # Add diff snippet if available
+        if diff_item.get("diff"):
+            snippet = leading_lines(diff_item["diff"], BATCH_DIFF_LINES)
+            builder.write("  ```diff\n", snippet, "\n  ```\n")
+
+    builder.write("\n---\n\n")
+
+
+def render_batch_commit(commit: Dict) -> str:
+    """Block of one commit in an analysis batch context"""
+    builder = PromptBuilder()
+    _write_batch_commit(builder, commit)
+    return builder.render()
+
+
+def render_batch_context(commits: Iterable[Dict]) -> str:
+    """Context of a batch of commits sent for categorization"""
+    builder = PromptBuilder()
+    builder.write(BATCH_CONTEXT_HEADER)
+    for commit in commits:
+        _write_batch_commit(builder, commit)
+    return builder.render()
+
+
+def group_by_category(analyzed_commits: Iterable[Dict]) -> Dict[str, List[Dict]]:
+    """Analyzed commits of every batch grouped by category, in first-seen order"""
+    categories: Dict[str, List[Dict]] = {}
+    for commit_data in analyzed_commits:
+        for commit in commit_data.get("commits", []):
+            categories.setdefault(commit.get("category", "other"), []).append(commit)
+    return categories
+
+
+def _write_summary_commit(builder: PromptBuilder, commit: Dict) -> None:
+    builder.write(
+        f"### {commit.get('title', 'No title')}\n",
+        f"**ID:** {commit.get('id', 'unknown')}\n",
+        f"**Description:** {commit.get('description', 'No description')}\n",
+        f"**Technical Details:** {commit.get('technical_details', 'None')}\n",
+    )
+
+    files = commit.get("files_affected", [])
+    if files:
+        builder.write(f"**Files:** {', '.join(files[:SUMMARY_FILES])}\n")
+
+    builder.write("\n")
+
+
+def render_summary_commit(commit: Dict) -> str:
+    """Block of one analyzed commit in a summary context"""
+    builder = PromptBuilder()
+    _write_summary_commit(builder, commit)
+    return builder.render()
+
+
+def render_summary_context(analyzed_commits: Iterable[Dict]) -> str:
+    """Context of the analyzed commits grouped by category"""
+    builder = PromptBuilder()
+    builder.write(SUMMARY_CONTEXT_HEADER)
+    for category, commits in group_by_category(analyzed_commits).items():
+        builder.write(f"## {category.upper()}\n\n")
+        for commit in commits:
+            _write_summary_commit(builder, commit)
+        builder.write("---\n\n")
+    return builder.render()
+
+
+def render_release_context(commits: List[Dict], tag_name: str) -> str:
+    """Context of a whole release with diff snippets (legacy API mode)"""
+    builder = PromptBuilder()
+    builder.write(
+        f"# Release: {tag_name}\n\n",
+        f"Total commits: {len(commits)}\n\n",
+        "## Commits:\n\n",
+    )
+
+    for commit in commits:
+        _write_commit_header(builder, "### Commit", commit)
+
+        # Add diff information (limited to avoid token limits)
+        builder.write("**Changes:**\n")
+        for diff_item in commit["diff"][:RELEASE_DIFF_FILES]:
+            if diff_item.get("new_file", False):
+                change_type = "new"
+            elif diff_item.get("deleted_file", False):
+                change_type = "deleted"
+            else:
+                change_type = "modified"
+            builder.write(
+                f"- File: {_diff_path(diff_item)}\n", f"  Type: {change_type}\n"
+            )
+
+            # Add a snippet of the diff (limited)
+            if diff_item.get("diff"):
+                snippet = leading_lines(diff_item["diff"], RELEASE_DIFF_LINES)
+                builder.write("  Diff snippet:\n```\n", snippet, "\n```\n")
+
+        builder.write("\n---\n\n")
+
+    return builder.render()
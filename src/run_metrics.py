@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Run Metrics for GitLab Changelog Generator
+Records per-stage wall time and counters (GitLab calls and bytes, cache hits,
+prompt sizes, Gemini subprocess time) and exports them as a JSON run report
+or a Prometheus textfile
+
+Counters are attributed to the innermost open stage. Stages of one generator
+run one after another, except for stages of the same name (parallel batches),
+so the attribution also holds for work done on worker threads.
+"""
+
+import functools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+
+def _escape_label(value: Any) -> str:
+    """Escape a Prometheus label value"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def timed_stage(name: str) -> Callable:
+    """Decorator timing a method as a stage of its instance's `metrics`"""
+
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            with self.metrics.stage(name):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class RunMetrics:
+    """Thread-safe stage timings and counters for one generator"""
+
+    def __init__(self, chars_per_token: int = 4):
+        """Initialize empty metrics (chars_per_token estimates prompt tokens)"""
+        self.chars_per_token = chars_per_token
+        self.labels: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new run, dropping the recorded stages and counters"""
+        with self._lock:
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+            self.stages: Dict[str, Dict[str, Any]] = {}
+            self.counters: Dict[str, float] = {}
+            self._open_stages = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block as one call of a stage"""
+        token = object()
+        with self._lock:
+            self._open_stages.append((name, token))
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._open_stages.remove((name, token))
+                stage = self._stage(name)
+                stage["calls"] += 1
+                stage["seconds"] += elapsed
+                stage["max_seconds"] = max(stage["max_seconds"], elapsed)
+
+    def _stage(self, name: str) -> Dict[str, Any]:
+        if name not in self.stages:
+            self.stages[name] = {
+                "calls": 0,
+                "seconds": 0.0,
+                "max_seconds": 0.0,
+                "counters": {},
+            }
+        return self.stages[name]
+
+    def increment(self, counter: str, value: float = 1) -> None:
+        """Add to a run counter and to the counter of the innermost open stage"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+            if self._open_stages:
+                stage_counters = self._stage(self._open_stages[-1][0])["counters"]
+                stage_counters[counter] = stage_counters.get(counter, 0) + value
+
+    def record_prompt(self, prompt: str) -> None:
+        """Count a prompt sent to Gemini and its estimated size"""
+        self.increment("gemini_calls")
+        self.increment("gemini_prompt_chars", len(prompt))
+        self.increment(
+            "gemini_prompt_tokens_estimated", len(prompt) // self.chars_per_token
+        )
+
+    def record_http_response(self, response: Any, *args: Any, **kwargs: Any) -> None:
+        """requests response hook counting GitLab calls and bytes received"""
+        self.increment("gitlab_requests")
+        self.increment("gitlab_response_bytes", len(response.content or b""))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The run report"""
+        with self._lock:
+            return {
+                "labels": dict(self.labels),
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat(
+                    timespec="seconds"
+                ),
+                "total_seconds": round(time.perf_counter() - self._started, 4),
+                "stages": {
+                    name: {
+                        "calls": stage["calls"],
+                        "seconds": round(stage["seconds"], 4),
+                        "max_seconds": round(stage["max_seconds"], 4),
+                        "counters": dict(stage["counters"]),
+                    }
+                    for name, stage in self.stages.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+    def write_json(self, path: str) -> Path:
+        """Write the run report as JSON"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        return path
+
+    def write_prometheus(self, path: str) -> Path:
+        """Write the run as a Prometheus textfile (for node_exporter's collector)"""
+        report = self.to_dict()
+        base_labels = {
+            re.sub(r"[^a-zA-Z0-9_]", "_", key): value
+            for key, value in report["labels"].items()
+        }
+
+        def labels(**extra: str) -> str:
+            pairs = dict(base_labels, **extra)
+            if not pairs:
+                return ""
+            rendered = ",".join(
+                f'{key}="{_escape_label(value)}"' for key, value in pairs.items()
+            )
+            return "{" + rendered + "}"
+
+        lines = [
+            "# HELP changelog_run_seconds Wall time of the last run",
+            "# TYPE changelog_run_seconds gauge",
+            f"changelog_run_seconds{labels()} {report['total_seconds']}",
+            "# HELP changelog_stage_seconds Wall time spent per stage",
+            "# TYPE changelog_stage_seconds gauge",
+        ]
+        for name, stage in report["stages"].items():
+            lines.append(
+                f"changelog_stage_seconds{labels(stage=name)} {stage['seconds']}"
+            )
+        lines += [
+            "# HELP changelog_stage_calls Calls per stage",
+            "# TYPE changelog_stage_calls gauge",
+        ]
+        for name, stage in report["stages"].items():
+            lines.append(
+                f"changelog_stage_calls{labels(stage=name)} {stage['calls']}"
+            )
+        for counter, value in sorted(report["counters"].items()):
+            metric = f"changelog_{counter}"
+            lines += [f"# TYPE {metric} gauge", f"{metric}{labels()} {value}"]
+
+        # Write then rename so the collector never reads a partial file
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp_file, path)
+        return path
+
+    def summary(self) -> str:
+        """Human readable per-stage timings"""
+        report = self.to_dict()
+        parts = [
+            f"{name} {stage['seconds']:.1f}s"
+            + (f" ×{stage['calls']}" if stage["calls"] > 1 else "")
+            for name, stage in report["stages"].items()
+        ]
+        return "Stages: " + (", ".join(parts) if parts else "none")
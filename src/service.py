@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Service Mode for GitLab Changelog Generator
+Long-running local HTTP API that queues "generate for project X range A..B"
+jobs (e.g. from GitLab tag-push webhooks) and runs them on bounded workers,
+keeping one connected generator per project warm between jobs: the GitLab
+session, the Gemini client, the tag catalogue and the caches are reused.
+
+Endpoints:
+    POST /jobs             {"project": 123, "from_tag": ..., "to_tag": ...,
+                            "ranges": [...], "last": N, "name": ...}
+                            or {"repo_path": ...} for a local clone
+    POST /webhooks/gitlab  GitLab "Tag Push Hook" payload
+    GET  /jobs             Recent jobs
+    GET  /jobs/<id>        One job
+    GET  /health           Queue and worker status
+
+With SERVICE_WEBHOOK_TOKEN set, both POST endpoints require it (X-Gitlab-Token
+or "Authorization: Bearer" header). Local clones are only accepted below
+SERVICE_REPO_ROOT.
+"""
+
+import hmac
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .changelog_generator import ChangelogGenerator
+from .multi_project import (
+    LimitedSession,
+    MultiProjectRunner,
+    _ThreadOutputRouter,
+    project_dir,
+    validate_project_id,
+    validate_project_name,
+)
+
+
+class Job:
+    """A queued changelog generation request"""
+
+    def __init__(self, spec: Dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.spec = spec
+        self.status = "queued"
+        self.output_dirs: List[Path] = []
+        self.error: Optional[str] = None
+        self.metrics: Optional[Dict] = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def dedupe_key(self) -> Tuple:
+        """Identical pending requests (e.g. retried webhooks) share one job"""
+        return tuple(
+            json.dumps(self.spec.get(key), sort_keys=True)
+            for key in ("id", "repo_path", "from_tag", "to_tag", "ranges", "last")
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "spec": self.spec,
+            "output_dirs": [str(output_dir) for output_dir in self.output_dirs],
+            "error": self.error,
+            "metrics": self.metrics,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ChangelogService:
+    """Job queue with bounded workers and warm per-project generators"""
+
+    def __init__(
+        self,
+        generator_options: Dict = None,
+        workers: int = None,
+        gitlab_concurrency: int = None,
+        gemini_concurrency: int = None,
+        results_dir: str = "results",
+        max_jobs: int = None,
+        repo_root: str = None,
+    ):
+        """
+        Initialize the service
+
+        Args:
+            generator_options: Keyword arguments shared by every ChangelogGenerator
+            workers: Jobs run at once (default: SERVICE_WORKERS or 2)
+            gitlab_concurrency: GitLab requests in flight across all jobs
+                (default: GITLAB_GLOBAL_CONCURRENCY or 8)
+            gemini_concurrency: Gemini CLI processes or API requests in flight
+                across all jobs (default: GEMINI_GLOBAL_CONCURRENCY or 4)
+            results_dir: Parent directory of the per-project results directories
+            max_jobs: Finished jobs kept for status queries
+                (default: SERVICE_MAX_JOBS or 200)
+            repo_root: Directory local clones of repo_path jobs must be in
+                (default: SERVICE_REPO_ROOT, unset rejects repo_path jobs)
+        """
+        if workers is None:
+            workers = int(os.getenv("SERVICE_WORKERS", "2"))
+        if gitlab_concurrency is None:
+            gitlab_concurrency = int(os.getenv("GITLAB_GLOBAL_CONCURRENCY", "8"))
+        if gemini_concurrency is None:
+            gemini_concurrency = int(os.getenv("GEMINI_GLOBAL_CONCURRENCY", "4"))
+        if max_jobs is None:
+            max_jobs = int(os.getenv("SERVICE_MAX_JOBS", "200"))
+        if min(workers, gitlab_concurrency, gemini_concurrency) < 1:
+            raise ValueError("Service concurrency limits must be at least 1")
+
+        self.generator_options = dict(generator_options or {})
+        self.workers = workers
+        self.results_dir = Path(results_dir)
+        self.max_jobs = max_jobs
+        repo_root = repo_root or os.getenv("SERVICE_REPO_ROOT")
+        self.repo_root = Path(repo_root).resolve() if repo_root else None
+
+        # Shared by every generator so the limits are global
+        self.gitlab_concurrency = gitlab_concurrency
+        self.gitlab_limit = threading.BoundedSemaphore(gitlab_concurrency)
+        self.gemini_limit = threading.BoundedSemaphore(gemini_concurrency)
+
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending: Dict[Tuple, Job] = {}
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+        # Warm generators and the locks serializing the jobs of each project
+        self._generators: Dict[str, ChangelogGenerator] = {}
+        self._project_locks: Dict[str, threading.Lock] = {}
+
+        self._router = _ThreadOutputRouter(sys.stdout)
+        self._threads: List[threading.Thread] = []
+
+    @staticmethod
+    def project_key(spec: Dict) -> str:
+        """Key of the warm generator used for a job"""
+        if not spec.get("id") and not spec.get("repo_path"):
+            return "default"
+        return MultiProjectRunner.project_key(spec)
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        sys.stdout = self._router
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"changelog-worker-{i + 1}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Let the workers finish their current job and stop"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        sys.stdout = self._router._default
+
+    def submit(self, spec: Dict) -> Tuple[Job, bool]:
+        """
+        Queue a job
+
+        Returns:
+            The job and whether it was created (False when an identical job
+            is still queued or running)
+        """
+        spec = self.validate_spec(spec)
+        if isinstance(spec.get("ranges"), str):
+            spec["ranges"] = spec["ranges"].split(",")
+
+        job = Job(spec)
+        with self._lock:
+            pending = self._pending.get(job.dedupe_key)
+            if pending:
+                return pending, False
+            self._pending[job.dedupe_key] = job
+            self.jobs[job.id] = job
+            self._forget_old_jobs()
+        self._queue.put(job)
+        return job, True
+
+    def validate_spec(self, spec: Dict) -> Dict:
+        """Normalize a job spec, rejecting unsafe IDs, names and repository paths"""
+        spec = dict(spec)
+        if spec.get("id"):
+            spec["id"] = validate_project_id(spec["id"])
+        if spec.get("name") is not None:
+            spec["name"] = validate_project_name(spec["name"])
+
+        if spec.get("repo_path"):
+            if self.repo_root is None:
+                raise ValueError("repo_path jobs require SERVICE_REPO_ROOT")
+            repo_path = Path(spec["repo_path"]).resolve()
+            if self.repo_root not in (repo_path, *repo_path.parents):
+                raise ValueError(f"repo_path must be inside {self.repo_root}")
+            spec["repo_path"] = str(repo_path)
+
+        # The results and cache directories of the job must stay in their roots
+        key = self.project_key(spec)
+        project_dir(self.results_dir, self._label(spec, key))
+        project_dir(Path(".cache") / "projects", key)
+        return spec
+
+    def _forget_old_jobs(self) -> None:
+        """Drop the oldest finished jobs beyond max_jobs"""
+        finished = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.status in ("done", "failed")
+        ]
+        for job_id in finished[: max(0, len(self.jobs) - self.max_jobs)]:
+            del self.jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self.jobs.values())
+
+    def status(self) -> Dict:
+        """Queue and worker status"""
+        with self._lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            projects = sorted(self._generators)
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "jobs": counts,
+            "warm_projects": projects,
+        }
+
+    def _generator_for(self, key: str, spec: Dict) -> ChangelogGenerator:
+        """Return the warm generator of a project, creating it on first use"""
+        generator = self._generators.get(key)
+        if generator is None:
+            generator = ChangelogGenerator(
+                **self.generator_options,
+                repo_path=spec.get("repo_path"),
+                project_id=spec.get("id"),
+                results_dir=project_dir(self.results_dir, self._label(spec, key)),
+                cache_dir=project_dir(Path(".cache") / "projects", key),
+                show_spinners=False,
+                gitlab_session=LimitedSession(
+                    self.gitlab_limit, self.gitlab_concurrency
+                ),
+                gemini_limit=self.gemini_limit,
+            )
+            generator.ensure_connected()
+            with self._lock:
+                self._generators[key] = generator
+        return generator
+
+    @staticmethod
+    def _label(spec: Dict, key: str) -> str:
+        return str(spec.get("name") or key)
+
+    def _work(self) -> None:
+        """Worker loop: run queued jobs until stopped"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job: Job) -> None:
+        """Run one job on the warm generator of its project, logging to a file"""
+        spec = job.spec
+        key = self.project_key(spec)
+        with self._lock:
+            project_lock = self._project_locks.setdefault(key, threading.Lock())
+
+        log_dir = project_dir(self.results_dir, self._label(spec, key)) / "jobs"
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+        # One job at a time per project: the generator state is not shared
+        log_file = log_dir / f"{job.id}.log"
+        with project_lock, open(log_file, "a", encoding="utf-8") as log:
+            with self._lock:
+                job.status = "running"
+                job.started_at = time.time()
+            self._router.route(log)
+            generator = None
+            try:
+                generator = self._generator_for(key, spec)
+                # Pick up tags pushed since the previous job
+                generator.load_tag_catalogue(resync=True)
+                if spec.get("ranges") or spec.get("last"):
+                    job.output_dirs = generator.generate_many(
+                        ranges=spec.get("ranges"), last=spec.get("last")
+                    )
+                else:
+                    output_dir = generator.generate(
+                        spec.get("from_tag"), spec.get("to_tag")
+                    )
+                    job.output_dirs = [output_dir] if output_dir else []
+                job.status = "done"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+                print(f"\n❌ Error: {str(e)}")
+            finally:
+                if generator:
+                    # Warm generators keep running: start a new report per job
+                    # and drop the commits memoized for this one
+                    job.metrics = generator.metrics.to_dict()
+                    generator.reset_run_state()
+                self._router.unroute()
+                with self._lock:
+                    self._pending.pop(job.dedupe_key, None)
+                    job.finished_at = time.time()
+
+        elapsed = job.finished_at - job.started_at
+        status = "✅" if job.status == "done" else "❌"
+        print(f"   {status} Job {job.id} ({self._label(spec, key)}) in {elapsed:.0f}s")
+
+    @staticmethod
+    def spec_from_tag_push(payload: Dict) -> Optional[Dict]:
+        """
+        Build a job spec from a GitLab tag push webhook payload
+
+        Returns None for events that should not generate a changelog
+        (other event kinds and tag deletions)
+        """
+        if payload.get("object_kind") != "tag_push":
+            return None
+        # GitLab sends a null checkout_sha when a tag is deleted
+        if not payload.get("checkout_sha"):
+            return None
+        ref = payload.get("ref", "")
+        tag = ref[len("refs/tags/") :] if ref.startswith("refs/tags/") else ref
+        project = payload.get("project") or {}
+        project_id = payload.get("project_id") or project.get("id")
+        spec = {"id": str(project_id), "to_tag": tag}
+        if project.get("path"):
+            spec["name"] = project["path"]
+        return spec
+
+
+class _ServiceRequestHandler(BaseHTTPRequestHandler):
+    """JSON HTTP interface of the service"""
+
+    service: ChangelogService = None
+    webhook_token: Optional[str] = None
+
+    def _send_json(self, status: int, body: Dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        return body
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, self.service.status())
+        elif self.path == "/jobs":
+            jobs = [job.to_dict() for job in self.service.list_jobs()]
+            self._send_json(200, {"jobs": jobs})
+        elif self.path.startswith("/jobs/"):
+            job = self.service.get_job(self.path[len("/jobs/") :])
+            if job:
+                self._send_json(200, job.to_dict())
+            else:
+                self._send_json(404, {"error": "Job not found"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def _authorized(self) -> bool:
+        """Whether the request carries the service token (when one is set)"""
+        if not self.webhook_token:
+            return True
+        bearer = self.headers.get("Authorization", "")
+        token = self.headers.get("X-Gitlab-Token") or (
+            bearer[len("Bearer ") :] if bearer.startswith("Bearer ") else ""
+        )
+        return hmac.compare_digest(token.encode(), self.webhook_token.encode())
+
+    def do_POST(self) -> None:
+        if self.path in ("/jobs", "/webhooks/gitlab") and not self._authorized():
+            self._send_json(401, {"error": "Invalid token"})
+            return
+
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON body: {e}"})
+            return
+
+        if self.path == "/jobs":
+            spec = dict(body)
+            if "project" in spec:
+                spec["id"] = spec.pop("project")
+        elif self.path == "/webhooks/gitlab":
+            spec = self.service.spec_from_tag_push(body)
+            if spec is None:
+                self._send_json(200, {"status": "ignored"})
+                return
+        else:
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            job, created = self.service.submit(spec)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self._send_json(202 if created else 200, job.to_dict())
+
+    def log_message(self, format: str, *args) -> None:
+        # Requests are logged on the service console, not per job
+        sys.__stdout__.write(f"🌐 {self.address_string()} {format % args}\n")
+
+
+def make_handler(service: ChangelogService, webhook_token: str = None) -> type:
+    """
+    Request handler class bound to a service
+
+    Args:
+        service: The job service
+        webhook_token: Secret expected in the X-Gitlab-Token (or Bearer
+            Authorization) header of job and webhook calls
+            (default: SERVICE_WEBHOOK_TOKEN, unset disables it)
+    """
+    return type(
+        "ServiceRequestHandler",
+        (_ServiceRequestHandler,),
+        {
+            "service": service,
+            "webhook_token": webhook_token or os.getenv("SERVICE_WEBHOOK_TOKEN"),
+        },
+    )
+
+
+def serve(
+    service: ChangelogService,
+    host: str = None,
+    port: int = None,
+    webhook_token: str = None,
+) -> None:
+    """
+    Run the service HTTP API until interrupted
+
+    Args:
+        service: The job service
+        host: Bind address (default: SERVICE_HOST or 127.0.0.1)
+        port: Bind port (default: SERVICE_PORT or 8765)
+        webhook_token: Secret required by job and webhook calls (see
+            make_handler)
+    """
+    host = host or os.getenv("SERVICE_HOST", "127.0.0.1")
+    port = port or int(os.getenv("SERVICE_PORT", "8765"))
+    server = ThreadingHTTPServer((host, port), make_handler(service, webhook_token))
+    service.start()
+    print(
+        f"\n🛰️  Changelog service listening on http://{host}:{port} "
+        f"({service.workers} workers)"
+    )
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        service.stop()
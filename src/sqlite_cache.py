@@ -0,0 +1,693 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SQLite Cache Engine for GitLab Changelog Generator
+Optional storage engine (CACHE_ENGINE=sqlite / --cache-engine sqlite) behind
+the CacheManager and AnalysisStore APIs
+
+Everything lives in one cache.db per cache directory: commit metadata,
+commit details (diffs), range membership and analysis records, indexed by SHA
+and range. The database runs in WAL mode with a busy timeout, so concurrent CI
+jobs sharing a cache read in parallel and serialize their writes instead of
+corrupting files, and lookups only touch the rows they need. The JSON files of
+the default engine are imported on first use.
+"""
+
+import gzip
+import json
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .analysis_store import RECORD_FIELDS, AnalysisStore
+from .cache_manager import STATS_FILE, CacheManager
+
+# Database file inside the cache directory
+SQLITE_DB = "cache.db"
+
+# Seconds a writer waits for another process holding the write lock
+BUSY_TIMEOUT = 30
+
+# Stays below SQLite's default limit of bound parameters per statement
+MAX_QUERY_PARAMS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    sha TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS diffs (
+    sha TEXT PRIMARY KEY,
+    detail BLOB NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ranges (
+    id INTEGER PRIMARY KEY,
+    from_tag TEXT NOT NULL,
+    to_tag TEXT NOT NULL,
+    accessed_at REAL NOT NULL,
+    UNIQUE (from_tag, to_tag)
+);
+CREATE TABLE IF NOT EXISTS range_commits (
+    range_id INTEGER NOT NULL REFERENCES ranges (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    sha TEXT NOT NULL,
+    PRIMARY KEY (range_id, position)
+);
+CREATE INDEX IF NOT EXISTS range_commits_sha ON range_commits (sha);
+CREATE TABLE IF NOT EXISTS analyses (
+    prompt_version TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    record TEXT NOT NULL,
+    accessed_at REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (prompt_version, sha)
+);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# PRAGMA auto_vacuum value of INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def _chunks(items: List[str]) -> Iterator[List[str]]:
+    for start in range(0, len(items), MAX_QUERY_PARAMS):
+        yield items[start : start + MAX_QUERY_PARAMS]
+
+
+def _placeholders(items: List[str]) -> str:
+    return ",".join("?" * len(items))
+
+
+class SQLiteDatabase:
+    """cache.db of a cache directory, with one connection per thread"""
+
+    def __init__(self, cache_dir: str):
+        """Open (and create) the database"""
+        self.path = Path(cache_dir) / SQLITE_DB
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        self._enable_auto_vacuum()
+        self.connect().executescript(SCHEMA)
+        self._add_analysis_access_time()
+
+    def _enable_auto_vacuum(self) -> None:
+        """
+        Let gc return freed pages to the file system (PRAGMA incremental_vacuum)
+
+        auto_vacuum only takes effect when it is set before the database
+        switches to WAL and gets its tables, so it runs on a separate connection
+        first. Databases created without it are rebuilt once with VACUUM.
+        """
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        try:
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if mode == AUTO_VACUUM_INCREMENTAL:
+                return
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            if conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]:
+                try:
+                    conn.execute("VACUUM")
+                except sqlite3.OperationalError:
+                    # Busy with other jobs: the rebuild is retried on next open
+                    pass
+        finally:
+            conn.close()
+
+    def _add_analysis_access_time(self) -> None:
+        """Add accessed_at to analyses tables created by older versions"""
+
+        def migrated(conn: sqlite3.Connection) -> bool:
+            columns = conn.execute("PRAGMA table_info(analyses)").fetchall()
+            return any(column[1] == "accessed_at" for column in columns)
+
+        if migrated(self.connect()):
+            return
+        with self.transaction() as conn:
+            # Another process may have migrated it while waiting for the lock
+            if migrated(conn):
+                return
+            conn.execute(
+                "ALTER TABLE analyses ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0"
+            )
+            # Existing records count as used now, not as expired
+            conn.execute("UPDATE analyses SET accessed_at = ?", (time.time(),))
+
+    def connect(self) -> sqlite3.Connection:
+        """Connection of the calling thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly
+            conn = sqlite3.connect(
+                self.path, timeout=BUSY_TIMEOUT, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run a block in one write transaction
+
+        BEGIN IMMEDIATE takes the write lock upfront, so concurrent writers wait
+        for it (up to BUSY_TIMEOUT) instead of failing halfway. Nested blocks
+        join the outer transaction.
+        """
+        conn = self.connect()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[Tuple]:
+        """Run a read query"""
+        return self.connect().execute(sql, tuple(params)).fetchall()
+
+    def vacuum(self) -> None:
+        """Return free pages to the file system and shrink the write-ahead log"""
+        conn = self.connect()
+        # executescript steps the pragma to completion (execute frees one page)
+        conn.executescript("PRAGMA incremental_vacuum;")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def file_bytes(self) -> int:
+        """Size of the database with its write-ahead log"""
+        return sum(
+            path.stat().st_size
+            for path in (self.path, self.path.with_name(f"{SQLITE_DB}-wal"))
+            if path.exists()
+        )
+
+
+class SQLiteCacheManager(CacheManager):
+    """CacheManager storing commits, details and ranges in SQLite"""
+
+    def __init__(
+        self,
+        cache_dir: str = ".cache",
+        max_bytes: int = None,
+        ttl_seconds: float = None,
+        compress: bool = None,
+    ):
+        """Initialize the cache, importing the JSON files of the default engine"""
+        self.db = SQLiteDatabase(cache_dir)
+        super().__init__(cache_dir, max_bytes, ttl_seconds, compress)
+
+    def _encode_detail(self, detail: Dict) -> bytes:
+        payload = json.dumps(detail, ensure_ascii=False, separators=(",", ":"))
+        payload = payload.encode("utf-8")
+        return gzip.compress(payload, compresslevel=3) if self.compress else payload
+
+    @staticmethod
+    def _decode_detail(blob: bytes) -> Dict:
+        if blob[:2] == GZIP_MAGIC:
+            blob = gzip.decompress(blob)
+        return json.loads(blob)
+
+    def _read_object(self, sha: str) -> Optional[Dict]:
+        """Commit object in the format of the JSON engine"""
+        data = {}
+        rows = self.db.query("SELECT data FROM commits WHERE sha = ?", [sha])
+        if rows:
+            data["commit"] = json.loads(rows[0][0])
+        rows = self.db.query("SELECT detail FROM diffs WHERE sha = ?", [sha])
+        if rows:
+            data["detail"] = self._decode_detail(rows[0][0])
+        return dict(data, id=sha) if data else None
+
+    def _update_object(self, sha: str, **fields: Any) -> None:
+        """Upsert the commit metadata and/or detail of a commit"""
+        now = time.time()
+        with self.db.transaction() as conn:
+            if "commit" in fields:
+                conn.execute(
+                    "INSERT INTO commits (sha, data, accessed_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (sha) DO UPDATE SET "
+                    "data = excluded.data, accessed_at = excluded.accessed_at",
+                    (sha, json.dumps(fields["commit"], ensure_ascii=False), now),
+                )
+            if "detail" in fields:
+                conn.execute(
+                    "INSERT INTO diffs (sha, detail, accessed_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (sha) DO UPDATE SET "
+                    "detail = excluded.detail, accessed_at = excluded.accessed_at",
+                    (sha, self._encode_detail(fields["detail"]), now),
+                )
+
+    def _migrate_legacy_cache(self) -> None:
+        """Import every JSON cache file (any version) into the database"""
+        # Legacy per-range files go through the JSON engine's migration first
+        super()._migrate_legacy_cache()
+
+        object_files = self._object_files()
+        range_files = self._range_files()
+        stats_file = self.cache_dir / STATS_FILE
+        if not (object_files or range_files or stats_file.exists()):
+            shutil.rmtree(self.objects_dir, ignore_errors=True)
+            return
+
+        print(
+            f"💾 Importing {len(object_files)} cached commits and "
+            f"{len(range_files)} ranges into {self.db.path}"
+        )
+        with self.db.transaction():
+            for object_file in object_files:
+                # The JSON engine's reader handles both object formats
+                data = CacheManager._read_object(self, self._sha_of(object_file))
+                if data:
+                    fields = {k: data[k] for k in ("commit", "detail") if k in data}
+                    self._update_object(data["id"], **fields)
+
+            for range_file in range_files:
+                try:
+                    with open(range_file, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    self._save_range(data["from_tag"], data["to_tag"], data["shas"])
+                except Exception:
+                    continue
+
+            stats = CacheManager._load_stats(self)
+            self._add_stats(stats.get("hits", 0), stats.get("misses", 0))
+
+        # Other processes may be importing the same files
+        for path in range_files + [stats_file]:
+            path.unlink(missing_ok=True)
+        shutil.rmtree(self.objects_dir, ignore_errors=True)
+
+    def _save_range(self, from_tag: str, to_tag: str, shas: List[str]) -> None:
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO ranges (from_tag, to_tag, accessed_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (from_tag, to_tag) DO UPDATE SET "
+                "accessed_at = excluded.accessed_at",
+                (from_tag, to_tag, time.time()),
+            )
+            (range_id,) = conn.execute(
+                "SELECT id FROM ranges WHERE from_tag = ? AND to_tag = ?",
+                (from_tag, to_tag),
+            ).fetchone()
+            conn.execute("DELETE FROM range_commits WHERE range_id = ?", (range_id,))
+            conn.executemany(
+                "INSERT INTO range_commits (range_id, position, sha) VALUES (?, ?, ?)",
+                ((range_id, position, sha) for position, sha in enumerate(shas)),
+            )
+
+    def _range_id(self, from_tag: str, to_tag: str) -> Optional[int]:
+        rows = self.db.query(
+            "SELECT id FROM ranges WHERE from_tag = ? AND to_tag = ?",
+            [from_tag, to_tag],
+        )
+        return rows[0][0] if rows else None
+
+    def _load_range_shas(self, from_tag: str, to_tag: str) -> Optional[List[str]]:
+        """Load the ordered list of SHAs stored for a tag range"""
+        range_id = self._range_id(from_tag, to_tag)
+        if range_id is None:
+            return None
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE ranges SET accessed_at = ? WHERE id = ?",
+                (time.time(), range_id),
+            )
+        rows = self.db.query(
+            "SELECT sha FROM range_commits WHERE range_id = ? ORDER BY position",
+            [range_id],
+        )
+        return [sha for (sha,) in rows]
+
+    def save_commits_cache(
+        self, from_tag: str, to_tag: str, commits: List[Any]
+    ) -> None:
+        """Save commits list to cache in one transaction"""
+        with self.db.transaction():
+            shas = []
+            for commit in commits:
+                commit_data = self._serialize_commit(commit)
+                self._update_object(commit_data["id"], commit=commit_data)
+                shas.append(commit_data["id"])
+            self._save_range(from_tag, to_tag, shas)
+
+    def load_commits_cache(self, from_tag: str, to_tag: str) -> Optional[List[Dict]]:
+        """Load commits list from cache with one indexed join"""
+        range_id = self._range_id(from_tag, to_tag)
+        if range_id is None:
+            self.misses += 1
+            return None
+
+        rows = self.db.query(
+            "SELECT commits.data FROM range_commits "
+            "LEFT JOIN commits ON commits.sha = range_commits.sha "
+            "WHERE range_commits.range_id = ? ORDER BY range_commits.position",
+            [range_id],
+        )
+        if any(data is None for (data,) in rows):
+            # Incomplete (or partly evicted) store: let the caller refetch
+            self.misses += 1
+            return None
+
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE ranges SET accessed_at = ? WHERE id = ?", (now, range_id)
+            )
+            conn.execute(
+                "UPDATE commits SET accessed_at = ? WHERE sha IN "
+                "(SELECT sha FROM range_commits WHERE range_id = ?)",
+                (now, range_id),
+            )
+        self.hits += 1
+        return [json.loads(data) for (data,) in rows]
+
+    def load_commit_details(
+        self, from_tag: str, to_tag: str, commit_ids: Iterable[str] = None
+    ) -> Dict[str, Dict]:
+        """Load cached commit details for the range (or for the given SHAs)"""
+        if commit_ids is None:
+            commit_ids = self._load_range_shas(from_tag, to_tag) or []
+        commit_ids = list(dict.fromkeys(commit_ids))
+
+        details = {}
+        now = time.time()
+        for chunk in _chunks(commit_ids):
+            rows = self.db.query(
+                f"SELECT sha, detail FROM diffs WHERE sha IN ({_placeholders(chunk)})",
+                chunk,
+            )
+            for sha, detail in rows:
+                details[sha] = self._decode_detail(detail)
+            with self.db.transaction() as conn:
+                conn.execute(
+                    f"UPDATE diffs SET accessed_at = ? "
+                    f"WHERE sha IN ({_placeholders(chunk)})",
+                    [now] + chunk,
+                )
+        self.hits += len(details)
+        self.misses += len(commit_ids) - len(details)
+        return details
+
+    def clear_cache(self, from_tag: str = None, to_tag: str = None) -> None:
+        """Clear cache for specific tags or all cache"""
+        with self.db.transaction() as conn:
+            if from_tag and to_tag:
+                # Clear specific range and the commits no other range references
+                shas = self._load_range_shas(from_tag, to_tag) or []
+                conn.execute(
+                    "DELETE FROM ranges WHERE from_tag = ? AND to_tag = ?",
+                    (from_tag, to_tag),
+                )
+                for chunk in _chunks(shas):
+                    for table in ("commits", "diffs"):
+                        conn.execute(
+                            f"DELETE FROM {table} "
+                            f"WHERE sha IN ({_placeholders(chunk)}) "
+                            "AND sha NOT IN (SELECT sha FROM range_commits)",
+                            chunk,
+                        )
+            else:
+                for table in ("range_commits", "ranges", "commits", "diffs", "stats"):
+                    conn.execute(f"DELETE FROM {table}")
+        if not (from_tag and to_tag):
+            # Tag catalogues are still plain files
+            for cache_file in self.cache_dir.glob("*.json"):
+                cache_file.unlink()
+
+    def _add_stats(self, hits: int, misses: int) -> None:
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                (("hits", hits), ("misses", misses)),
+            )
+
+    def _load_stats(self) -> Dict[str, int]:
+        return dict(self.db.query("SELECT name, value FROM stats"))
+
+    def save_stats(self) -> None:
+        """Add this run's hits and misses to the persisted counters"""
+        self._add_stats(self.hits, self.misses)
+        self.hits = self.misses = 0
+
+    def _stored_bytes(self) -> int:
+        (total,) = self.db.query(
+            "SELECT (SELECT IFNULL(SUM(LENGTH(data)), 0) FROM commits) "
+            "+ (SELECT IFNULL(SUM(LENGTH(detail)), 0) FROM diffs) "
+            "+ (SELECT IFNULL(SUM(LENGTH(record)), 0) FROM analyses)"
+        )[0]
+        return total
+
+    def gc(self, max_bytes: int = None) -> Dict[str, int]:
+        """
+        Enforce the TTL and the size budget of the commit and analysis stores
+
+        Same policy as the JSON engine, on the stored payload bytes: expired
+        rows first, then the least recently used commits and analyses, then
+        the ranges that lost one of their commits. Freed pages are returned to
+        the filesystem.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        before = self._stored_bytes()
+        objects_before = self._object_count()
+        removed = {
+            "ranges": 0,
+            "objects": 0,
+            "analyses": 0,
+            "llm_entries": 0,
+            "bytes_freed": 0,
+            "bytes": 0,
+        }
+
+        with self.db.transaction() as conn:
+            if self.ttl_seconds:
+                expired = time.time() - self.ttl_seconds
+                for table in ("commits", "diffs"):
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE accessed_at < ?", (expired,)
+                    )
+                removed["ranges"] += conn.execute(
+                    "DELETE FROM ranges WHERE accessed_at < ?", (expired,)
+                ).rowcount
+                removed["analyses"] += conn.execute(
+                    "DELETE FROM analyses WHERE accessed_at < ?", (expired,)
+                ).rowcount
+
+            total = self._stored_bytes()
+            if max_bytes and total > max_bytes:
+                # Commits by SHA and analyses by rowid, least recently used first
+                rows = conn.execute(
+                    "SELECT 'commit' AS kind, sha AS key, SUM(size), "
+                    "MAX(accessed_at) AS used FROM ("
+                    "SELECT sha, LENGTH(data) AS size, accessed_at FROM commits "
+                    "UNION ALL "
+                    "SELECT sha, LENGTH(detail) AS size, accessed_at FROM diffs"
+                    ") GROUP BY sha "
+                    "UNION ALL "
+                    "SELECT 'analysis', rowid, LENGTH(record), accessed_at "
+                    "FROM analyses ORDER BY used"
+                ).fetchall()
+                evicted = {"commit": [], "analysis": []}
+                for kind, key, size, _ in rows:
+                    if total <= max_bytes:
+                        break
+                    evicted[kind].append(key)
+                    total -= size
+                for chunk in _chunks(evicted["commit"]):
+                    for table in ("commits", "diffs"):
+                        conn.execute(
+                            f"DELETE FROM {table} "
+                            f"WHERE sha IN ({_placeholders(chunk)})",
+                            chunk,
+                        )
+                for chunk in _chunks(evicted["analysis"]):
+                    conn.execute(
+                        f"DELETE FROM analyses WHERE rowid IN ({_placeholders(chunk)})",
+                        chunk,
+                    )
+                removed["analyses"] += len(evicted["analysis"])
+
+            # Drop the ranges that lost commits
+            removed["ranges"] += conn.execute(
+                "DELETE FROM ranges WHERE id IN ("
+                "SELECT range_id FROM range_commits "
+                "LEFT JOIN commits ON commits.sha = range_commits.sha "
+                "WHERE commits.sha IS NULL)"
+            ).rowcount
+
+        removed["objects"] = objects_before - self._object_count()
+        removed["bytes"] = self._stored_bytes()
+        removed["bytes_freed"] = before - removed["bytes"]
+        self.db.vacuum()
+        self._gc_llm_cache(removed)
+        return removed
+
+    def _object_count(self) -> int:
+        """Commits with metadata or details stored"""
+        return self.db.query(
+            "SELECT COUNT(*) FROM (SELECT sha FROM commits UNION SELECT sha FROM diffs)"
+        )[0][0]
+
+    def stats(self, top: int = 5) -> Dict[str, Any]:
+        """
+        Entries, bytes, hit rate and largest ranges of the cache
+
+        Args:
+            top: Number of largest ranges reported
+        """
+        largest = self.db.query(
+            "SELECT ranges.from_tag, ranges.to_tag, COUNT(*), "
+            "SUM(IFNULL(LENGTH(commits.data), 0) + IFNULL(LENGTH(diffs.detail), 0)) "
+            "AS size FROM ranges "
+            "JOIN range_commits ON range_commits.range_id = ranges.id "
+            "LEFT JOIN commits ON commits.sha = range_commits.sha "
+            "LEFT JOIN diffs ON diffs.sha = range_commits.sha "
+            "GROUP BY ranges.id ORDER BY size DESC LIMIT ?",
+            [top],
+        )
+        (ranges,) = self.db.query("SELECT COUNT(*) FROM ranges")[0]
+        (compressed,) = self.db.query(
+            "SELECT COUNT(*) FROM diffs WHERE SUBSTR(detail, 1, 2) = ?", [GZIP_MAGIC]
+        )[0]
+
+        (analyses, analysis_bytes) = self.db.query(
+            "SELECT COUNT(*), IFNULL(SUM(LENGTH(record)), 0) FROM analyses"
+        )[0]
+
+        other = {}
+        for path in self.cache_dir.iterdir():
+            if path.is_dir() and path.name != "llm":
+                other[path.name] = sum(
+                    f.stat().st_size for f in path.rglob("*") if f.is_file()
+                )
+
+        persisted = self._load_stats()
+        hits = persisted.get("hits", 0) + self.hits
+        misses = persisted.get("misses", 0) + self.misses
+        return {
+            "cache_dir": str(self.cache_dir),
+            "engine": "sqlite",
+            "ranges": ranges,
+            "objects": self._object_count(),
+            "compressed_objects": compressed,
+            "bytes": self._stored_bytes() - analysis_bytes,
+            "analyses": analyses,
+            "analysis_bytes": analysis_bytes,
+            "llm": self._llm_stats(),
+            "file_bytes": self.db.file_bytes(),
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else None,
+            "largest_ranges": [
+                {"range": f"{from_tag}..{to_tag}", "commits": commits, "bytes": size}
+                for from_tag, to_tag, commits, size in largest
+            ],
+            "other_bytes": other,
+        }
+
+
+class SQLiteAnalysisStore(AnalysisStore):
+    """AnalysisStore keeping its records in the analyses table of cache.db"""
+
+    def __init__(self, cache_dir: str, prompt_version: str):
+        """Initialize the store, importing the record files of every version"""
+        self.db = SQLiteDatabase(cache_dir)
+        self.prompt_version = prompt_version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._import_record_files(Path(cache_dir) / "analysis")
+
+    def _import_record_files(self, analysis_dir: Path) -> None:
+        if not analysis_dir.is_dir():
+            return
+        with self.db.transaction() as conn:
+            for record_file in analysis_dir.glob("*/*/*.json"):
+                try:
+                    with open(record_file, "r", encoding="utf-8") as f:
+                        record = json.load(f)
+                except Exception:
+                    continue
+                conn.execute(
+                    "INSERT OR IGNORE INTO analyses "
+                    "(prompt_version, sha, record, accessed_at) VALUES (?, ?, ?, ?)",
+                    (
+                        record_file.parent.parent.name,
+                        record_file.stem,
+                        json.dumps(record, ensure_ascii=False),
+                        record_file.stat().st_mtime,
+                    ),
+                )
+        shutil.rmtree(analysis_dir, ignore_errors=True)
+
+    def get(self, sha: str) -> Optional[Dict]:
+        """Return the stored analysis record of a commit, or None"""
+        return self.lookup([sha]).get(sha)
+
+    def set(self, sha: str, record: Dict) -> Dict:
+        """Store the analysis record of a commit, returning it"""
+        data = {"id": sha}
+        data.update(
+            {field: record[field] for field in RECORD_FIELDS if field in record}
+        )
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses "
+                "(prompt_version, sha, record, accessed_at) VALUES (?, ?, ?, ?)",
+                (
+                    self.prompt_version,
+                    sha,
+                    json.dumps(data, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+        return data
+
+    def lookup(self, shas: Iterable[str]) -> Dict[str, Dict]:
+        """Return the stored records of the given commits with indexed queries"""
+        shas = list(dict.fromkeys(shas))
+        records = {}
+        for chunk in _chunks(shas):
+            rows = self.db.query(
+                "SELECT sha, record FROM analyses WHERE prompt_version = ? "
+                f"AND sha IN ({_placeholders(chunk)})",
+                [self.prompt_version] + chunk,
+            )
+            records.update((sha, json.loads(record)) for sha, record in rows)
+            if rows:
+                # Refresh the access time used by the cache gc
+                found = [sha for sha, _ in rows]
+                with self.db.transaction() as conn:
+                    conn.execute(
+                        "UPDATE analyses SET accessed_at = ? WHERE prompt_version = ? "
+                        f"AND sha IN ({_placeholders(found)})",
+                        [time.time(), self.prompt_version] + found,
+                    )
+        with self._lock:
+            self.hits += len(records)
+            self.misses += len(shas) - len(records)
+        return records
+
+    def store_batch_results(
+        self, batch_results: List[Dict], shas: Iterable[str]
+    ) -> Tuple[Dict[str, Dict], List[Dict]]:
+        """Store the records of analyzed batches in one transaction"""
+        with self.db.transaction():
+            return super().store_batch_results(batch_results, shas)
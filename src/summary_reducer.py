@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Summary Reducer for GitLab Changelog Generator
+Keeps the context of the final changelog generations bounded for very large
+releases: when the summary of analyzed commits exceeds its token budget, the
+commits of each category are condensed by Gemini in parallel chunks (map), and
+the condensed parts are condensed again (reduce) until the context fits
+"""
+
+import os
+from typing import Callable, Dict, List, Union
+from halo import Halo
+from .prompt_renderer import (
+    CHARS_PER_TOKEN,
+    SUMMARY_CONTEXT_HEADER,
+    describe_size,
+    estimate_tokens,
+    group_by_category,
+    render_summary_commit,
+    render_summary_context,
+)
+from .run_metrics import RunMetrics
+
+# Reduce passes before the remaining parts are cut to fit the budget
+MAX_REDUCE_LEVELS = 3
+
+# Items Gemini keeps in each condensed part
+REDUCE_MAX_ITEMS = 8
+
+REDUCE_PROMPT = """Condensa los siguientes cambios de la categoría {category} de un release en un resumen compacto, que se usará para redactar sus changelogs.
+
+Reglas:
+- Agrupa los cambios relacionados en un solo ítem
+- Conserva los cambios más relevantes para clientes y desarrolladores; los breaking changes y parches de seguridad siempre
+- Máximo {max_items} ítems, cada uno con 1-2 frases de descripción y de detalles técnicos
+- Responde SOLO con los ítems en Markdown, con este formato:
+
+### [Título]
+**Description:** [Descripción]
+**Technical Details:** [Detalles técnicos]"""
+
+# Prompts in, responses (or the exception of a failed call) out, in order
+CompleteMany = Callable[[List[str]], List[Union[str, Exception]]]
+
+
+class SummaryReducer:
+    """Bounds the summary context with parallel per-category map-reduce passes"""
+
+    def __init__(
+        self,
+        complete_many: CompleteMany,
+        token_budget: int = None,
+        metrics: RunMetrics = None,
+        show_spinners: bool = True,
+    ):
+        """
+        Initialize the reducer
+
+        Args:
+            complete_many: Sends a list of prompts to Gemini concurrently
+            token_budget: Estimated tokens of the final summary context and of
+                every reduce prompt (defaults to GEMINI_SUMMARY_TOKEN_BUDGET
+                or 30000)
+            metrics: Run metrics receiving the reduce calls
+            show_spinners: Show progress spinners
+        """
+        if token_budget is None:
+            token_budget = int(os.getenv("GEMINI_SUMMARY_TOKEN_BUDGET", "30000"))
+        if token_budget < 1000:
+            raise ValueError("token_budget must be at least 1000")
+        self.complete_many = complete_many
+        self.token_budget = token_budget
+        self.max_chars = token_budget * CHARS_PER_TOKEN
+        self.metrics = metrics or RunMetrics()
+        self.show_spinners = show_spinners
+
+    @staticmethod
+    def render(parts: Dict[str, List[str]]) -> str:
+        """Summary context of the (possibly condensed) parts of each category"""
+        sections = [SUMMARY_CONTEXT_HEADER]
+        for category, blocks in parts.items():
+            sections.append(f"## {category.upper()}\n\n")
+            sections.extend(blocks)
+            sections.append("---\n\n")
+        return "".join(sections)
+
+    def _chunks(self, blocks: List[str]) -> List[str]:
+        """Pack consecutive blocks into chunks within the prompt budget"""
+        chunks = []
+        current = []
+        size = 0
+        for block in blocks:
+            if len(block) > self.max_chars:
+                block = block[: self.max_chars]
+            if current and size + len(block) > self.max_chars:
+                chunks.append("".join(current))
+                current, size = [], 0
+            current.append(block)
+            size += len(block)
+        if current:
+            chunks.append("".join(current))
+        return chunks
+
+    def _reduce_level(
+        self, parts: Dict[str, List[str]], level: int
+    ) -> Dict[str, List[str]]:
+        """Condense every category with several blocks, all chunks at once"""
+        # Small categories are left as they are, and a single condensed part
+        # cannot shrink further by itself
+        min_blocks = REDUCE_MAX_ITEMS if level == 1 else 1
+        jobs = []
+        for category, blocks in parts.items():
+            if len(blocks) > min_blocks:
+                jobs.extend((category, chunk) for chunk in self._chunks(blocks))
+        if not jobs:
+            return parts
+
+        spinner = Halo(
+            text=f"Condensing {len(jobs)} summary chunks (level {level})...",
+            spinner="dots",
+            enabled=self.show_spinners,
+        )
+        spinner.start()
+        prompts = [
+            REDUCE_PROMPT.format(category=category, max_items=REDUCE_MAX_ITEMS)
+            + f"\n\n=== CAMBIOS ===\n\n{chunk}"
+            for category, chunk in jobs
+        ]
+        responses = self.complete_many(prompts)
+        self.metrics.increment("summary_reduce_calls", len(prompts))
+
+        condensed: Dict[str, List[str]] = {}
+        failures = 0
+        for (category, chunk), response in zip(jobs, responses):
+            if isinstance(response, Exception) or not response.strip():
+                # Keep the titles of the chunk instead of losing it
+                failures += 1
+                response = "\n".join(
+                    line for line in chunk.split("\n") if line.startswith("### ")
+                )
+            condensed.setdefault(category, []).append(response.strip() + "\n\n")
+
+        if failures:
+            spinner.warn(
+                f"Condensed {len(jobs) - failures}/{len(jobs)} summary chunks "
+                f"(level {level})"
+            )
+        else:
+            spinner.succeed(f"Condensed {len(jobs)} summary chunks (level {level})")
+        # Categories keep their original order
+        return {
+            category: condensed.get(category, blocks)
+            for category, blocks in parts.items()
+        }
+
+    def _cut(self, parts: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Last resort: give every category an equal share of the budget"""
+        headers = len(self.render({category: [] for category in parts}))
+        share = max(self.max_chars - headers, 0) // max(len(parts), 1)
+        cut = {}
+        for category, blocks in parts.items():
+            text = "".join(blocks)
+            if len(text) > share:
+                limit = max(share - 2, 0)
+                end = text.rfind("\n", 0, limit)
+                text = text[: end if end > 0 else limit] + "\n\n"
+            cut[category] = [text]
+        return cut
+
+    def reduce(self, analyzed_commits: List[Dict]) -> str:
+        """
+        Summary context of the analyzed commits within the token budget
+
+        Releases that already fit are rendered as before, without extra calls.
+        """
+        context = render_summary_context(analyzed_commits)
+        if estimate_tokens(len(context)) <= self.token_budget:
+            return context
+
+        print(
+            f"\n🗜️  Summary context ({describe_size(context)}) exceeds "
+            f"{self.token_budget:,} tokens, condensing it by category"
+        )
+        parts = {
+            category: [render_summary_commit(commit) for commit in commits]
+            for category, commits in group_by_category(analyzed_commits).items()
+        }
+        for level in range(1, MAX_REDUCE_LEVELS + 1):
+            parts = self._reduce_level(parts, level)
+            context = self.render(parts)
+            if estimate_tokens(len(context)) <= self.token_budget:
+                return context
+
+        print(
+            f"⚠️  Summary still above {self.token_budget:,} tokens after "
+            f"{MAX_REDUCE_LEVELS} levels, cutting each category to fit"
+        )
+        return self.render(self._cut(parts))
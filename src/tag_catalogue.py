@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tag Catalogue for GitLab Changelog Generator
+Keeps the repository tags (newest first) with name indexes so tag lookups and
+previous/next resolution are O(1), and refreshes incrementally from GitLab
+(with a periodic full sync that drops deleted tags)
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+# Hours between full syncs, which also find tags pushed on older commits and
+# drop deleted tags (TAG_FULL_SYNC_HOURS overrides it)
+DEFAULT_FULL_SYNC_HOURS = 24.0
+
+
+def _full_sync_seconds_from_env() -> float:
+    """Seconds between full syncs, from TAG_FULL_SYNC_HOURS"""
+    value = os.getenv("TAG_FULL_SYNC_HOURS")
+    if value is None:
+        return DEFAULT_FULL_SYNC_HOURS * 3600
+    try:
+        hours = float(value)
+    except ValueError:
+        hours = -1
+    if not hours >= 0:
+        print(
+            f"⚠️  Invalid TAG_FULL_SYNC_HOURS={value!r}, "
+            f"using {DEFAULT_FULL_SYNC_HOURS:g} hours"
+        )
+        hours = DEFAULT_FULL_SYNC_HOURS
+    return hours * 3600
+
+
+class TagCatalogue:
+    """Ordered tag list with name→position and name→SHA indexes"""
+
+    def __init__(
+        self,
+        tags: List[Tuple[str, str]] = None,
+        path: Path = None,
+        full_sync_seconds: float = None,
+    ):
+        """
+        Initialize the catalogue
+
+        Args:
+            tags: (name, commit SHA) pairs, newest first
+            path: Optional JSON file the catalogue is persisted to
+            full_sync_seconds: Seconds between full syncs (default:
+                TAG_FULL_SYNC_HOURS or 24 hours)
+        """
+        if full_sync_seconds is None:
+            full_sync_seconds = _full_sync_seconds_from_env()
+        self.full_sync_seconds = full_sync_seconds
+        self.path = Path(path) if path else None
+        self.last_sync = None
+        self.last_full_sync = None
+        self._set_tags(tags or [])
+
+    def _set_tags(self, tags: List[Tuple[str, str]]) -> None:
+        """Replace the tag list and rebuild the indexes"""
+        self.tags = [(name, sha) for name, sha in tags]
+        self._positions = {name: i for i, (name, _) in enumerate(self.tags)}
+        self._shas = dict(self.tags)
+
+    @classmethod
+    def load(cls, path: Path) -> "TagCatalogue":
+        """Load a persisted catalogue, or an empty one if missing or unreadable"""
+        catalogue = cls(path=path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            catalogue._set_tags(data["tags"])
+            catalogue.last_sync = data.get("last_sync")
+            catalogue.last_full_sync = data.get("last_full_sync")
+        except Exception:
+            pass
+        return catalogue
+
+    def save(self) -> None:
+        """Persist the catalogue atomically (no-op without a path)"""
+        if not self.path:
+            return
+        data = {
+            "last_sync": self.last_sync,
+            "last_full_sync": self.last_full_sync,
+            "tags": self.tags,
+        }
+        tmp_file = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.path)
+
+    @property
+    def full_sync_due(self) -> bool:
+        """Whether the last full sync is older than full_sync_seconds"""
+        return (
+            self.last_full_sync is None
+            or time.time() - self.last_full_sync >= self.full_sync_seconds
+        )
+
+    def refresh_from_gitlab(self, project: Any, full: bool = False) -> int:
+        """
+        Sync with GitLab, returning the number of new or moved tags
+
+        Tags are listed by last update, newest first, one page at a time; the
+        incremental sync stops at the first tag already known with the same SHA.
+        That misses tags pushed on older commits and keeps deleted tags, so a
+        full sync (listing every tag) runs when requested or when one is due.
+        """
+        full = full or self.full_sync_due
+        new_count = 0
+        fresh = []
+        for tag in project.tags.list(
+            order_by="updated", sort="desc", iterator=True, per_page=100
+        ):
+            name, sha = tag.name, tag.commit["id"]
+            if self._shas.get(name) == sha:
+                if not full:
+                    break
+            else:
+                new_count += 1
+            fresh.append((name, sha))
+
+        if full:
+            self.last_full_sync = time.time()
+            self._set_tags(fresh)
+        else:
+            fresh_names = {name for name, _ in fresh}
+            self._set_tags(
+                fresh + [tag for tag in self.tags if tag[0] not in fresh_names]
+            )
+        self.last_sync = time.time()
+        return new_count
+
+    def refresh_from_tags(self, tags: List[Tuple[str, str]]) -> int:
+        """Replace the catalogue with a complete tag list (e.g. from a local clone)"""
+        new_count = sum(1 for name, sha in tags if self._shas.get(name) != sha)
+        self._set_tags(tags)
+        self.last_sync = self.last_full_sync = time.time()
+        return new_count
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    @property
+    def names(self) -> List[str]:
+        return [name for name, _ in self.tags]
+
+    def position(self, name: str) -> int:
+        """Position of a tag (0 is the newest)"""
+        return self._positions[name]
+
+    def sha(self, name: str) -> str:
+        """Commit SHA a tag points to"""
+        return self._shas[name]
+
+    def previous(self, name: str) -> Optional[str]:
+        """The tag just older than the given one, if any"""
+        idx = self._positions[name] + 1
+        return self.tags[idx][0] if idx < len(self.tags) else None
+
+    def next(self, name: str) -> Optional[str]:
+        """The tag just newer than the given one, if any"""
+        idx = self._positions[name] - 1
+        return self.tags[idx][0] if idx >= 0 else None
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the per-commit analysis store and the incremental analysis"""
+
+import pytest
+from src.analysis_store import AnalysisStore
+from src.changelog_generator import ChangelogGenerator
+from src.diff_retention import DiffRetentionPolicy
+from src.diff_selection import DiffSelector
+from src.gemini_cli_analyzer import GeminiCLIAnalyzer
+from src.run_metrics import RunMetrics
+from src.sqlite_cache import SQLiteAnalysisStore
+
+STORES = {"json": AnalysisStore, "sqlite": SQLiteAnalysisStore}
+
+SHA_A = "a1b2c3d4e5" + "0" * 30
+SHA_B = "a1b2c3d4ff" + "0" * 30
+SHA_C = "c0ffee0000" + "1" * 30
+
+
+def record(commit_id, title="Change"):
+    return {"id": commit_id, "category": "features", "title": title}
+
+
+@pytest.mark.parametrize("engine", STORES)
+def test_records_match_full_and_abbreviated_ids(tmp_path, engine):
+    store = STORES[engine](str(tmp_path), "v1")
+    batch = {"commits": [record(SHA_C[:8], "Short id"), record(SHA_A, "Full id")]}
+    stored, unmatched = store.store_batch_results([batch], [SHA_A, SHA_B, SHA_C])
+    assert sorted(stored) == [SHA_A, SHA_C]
+    assert stored[SHA_C]["id"] == SHA_C
+    assert unmatched == []
+    assert store.get(SHA_C)["title"] == "Short id"
+
+
+@pytest.mark.parametrize("engine", STORES)
+def test_ambiguous_short_and_repeated_ids_stay_unmatched(tmp_path, engine):
+    store = STORES[engine](str(tmp_path), "v1")
+    batch = {
+        "commits": [
+            # Prefix of both SHA_A and SHA_B
+            record(SHA_A[:8]),
+            # Shorter than MIN_SHA_PREFIX
+            record(SHA_C[:6]),
+            record("deadbeef"),
+            record(SHA_B),
+            record(SHA_B[:9], "Second record of the same commit"),
+        ]
+    }
+    stored, unmatched = store.store_batch_results([batch], [SHA_A, SHA_B, SHA_C])
+    assert list(stored) == [SHA_B]
+    assert [r["id"] for r in unmatched] == [
+        SHA_A[:8],
+        SHA_C[:6],
+        "deadbeef",
+        SHA_B[:9],
+    ]
+    assert store.lookup([SHA_A, SHA_C]) == {}
+
+
+def prompt_version(**settings):
+    selector = DiffSelector(
+        byte_budget=settings.pop("byte_budget", 4000),
+        ignore_patterns=settings.pop("ignore_patterns", None),
+    )
+    policy = DiffRetentionPolicy(selector=selector, **settings)
+    return GeminiCLIAnalyzer.analysis_prompt_version(policy.fingerprint())
+
+
+@pytest.mark.parametrize("engine", STORES)
+def test_diff_settings_get_their_own_namespace(tmp_path, engine):
+    store = STORES[engine](str(tmp_path), prompt_version())
+    store.set(SHA_A, record(SHA_A))
+
+    same = STORES[engine](str(tmp_path), prompt_version())
+    assert same.get(SHA_A) is not None
+    for settings in (
+        {"max_files": 3},
+        {"max_lines": 5},
+        {"byte_budget": 100},
+        {"ignore_patterns": ("*.csv",)},
+    ):
+        other = STORES[engine](str(tmp_path), prompt_version(**settings))
+        assert other.get(SHA_A) is None, settings
+
+
+@pytest.fixture
+def generator(tmp_path):
+    """Just the state analyze_commits_incrementally uses"""
+    generator = ChangelogGenerator.__new__(ChangelogGenerator)
+    generator.analysis_store = AnalysisStore(str(tmp_path), "v1")
+    generator.metrics = RunMetrics()
+    return generator
+
+
+def detail(sha):
+    return {"id": sha[:8], "full_id": sha}
+
+
+def test_only_new_commits_are_analyzed(generator):
+    analyzed = []
+
+    def analyze(commits):
+        analyzed.append([c["full_id"] for c in commits])
+        # The model echoes the abbreviated ids it was shown
+        return [{"commits": [record(c["id"], c["full_id"]) for c in commits]}]
+
+    first = generator.analyze_commits_incrementally([detail(SHA_A)], analyze)
+    commits = [detail(SHA_C), detail(SHA_A)]
+    second = generator.analyze_commits_incrementally(commits, analyze)
+
+    assert analyzed == [[SHA_A], [SHA_C]]
+    assert [r["id"] for r in first[0]["commits"]] == [SHA_A[:8]]
+    # Commit order, with the ids shown in this run's prompts
+    assert [r["title"] for r in second[0]["commits"]] == [SHA_C, SHA_A]
+    assert [r["id"] for r in second[0]["commits"]] == [SHA_C[:8], SHA_A[:8]]
+    assert generator.metrics.to_dict()["counters"]["analysis_store_hits"] == 1
+
+
+def test_unmatched_records_are_kept_for_the_run(generator):
+    def analyze(commits):
+        return [{"commits": [record("unknown1", "Unmatched")]}]
+
+    result = generator.analyze_commits_incrementally([detail(SHA_A)], analyze)
+    assert [r["title"] for r in result[0]["commits"]] == ["Unmatched"]
+    assert generator.analysis_store.lookup([SHA_A]) == {}
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for packing analysis batches by estimated tokens"""
+
+import pytest
+from src.changelog_generator import ChangelogGenerator
+from src.prompt_renderer import CHARS_PER_TOKEN, render_batch_context
+
+
+def make_generator(budget=100, max_commits=25):
+    """Just the state split_commits_into_batches uses"""
+    generator = ChangelogGenerator.__new__(ChangelogGenerator)
+    generator.batch_token_budget = budget
+    generator.max_batch_commits = max_commits
+    return generator
+
+
+@pytest.fixture
+def generator():
+    generator = make_generator()
+    # Commits declare their estimated size
+    generator.estimate_commit_tokens = lambda commit: commit["tokens"]
+    return generator
+
+
+def sizes(batches):
+    return [[commit["tokens"] for commit in batch] for batch in batches]
+
+
+def commits(*tokens):
+    return [{"tokens": t} for t in tokens]
+
+
+def test_batches_fill_up_to_the_budget(generator):
+    # 100 tokens fit exactly, one more starts a new batch
+    assert sizes(generator.split_commits_into_batches(commits(40, 40, 20, 30))) == [
+        [40, 40, 20],
+        [30],
+    ]
+    assert sizes(generator.split_commits_into_batches(commits(40, 40, 21, 30))) == [
+        [40, 40],
+        [21, 30],
+    ]
+
+
+def test_oversized_commit_gets_its_own_batch(generator):
+    batches = generator.split_commits_into_batches(commits(10, 250, 10, 10))
+    assert sizes(batches) == [[10], [250], [10, 10]]
+    assert sizes(generator.split_commits_into_batches(commits(250))) == [[250]]
+
+
+def test_batches_are_capped_in_commits(generator):
+    generator.max_batch_commits = 3
+    batches = generator.split_commits_into_batches(commits(*[1] * 7))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+
+
+def test_fixed_batch_size_ignores_the_budget(generator):
+    batches = generator.split_commits_into_batches(commits(90, 90, 90), batch_size=2)
+    assert sizes(batches) == [[90, 90], [90]]
+    assert generator.split_commits_into_batches([]) == []
+
+
+def detail(diff_chars):
+    return {
+        "id": "a1b2c3d4",
+        "author": "Dev",
+        "date": "2024-01-01",
+        "message": "Change",
+        "stats": {"additions": 1, "deletions": 0},
+        "diff": [{"new_path": "app.py", "diff": "+" + "x" * diff_chars}],
+    }
+
+
+def test_estimate_follows_the_rendered_size():
+    generator = make_generator()
+    small, large = detail(100), detail(4100)
+    small_tokens = generator.estimate_commit_tokens(small)
+    assert small_tokens == len(render_batch_context([small])) // CHARS_PER_TOKEN + 1
+    assert generator.estimate_commit_tokens(large) - small_tokens == pytest.approx(
+        4000 / CHARS_PER_TOKEN, abs=1
+    )
+
+
+def test_rendered_batches_stay_within_the_budget():
+    generator = make_generator(budget=500)
+    details = [detail(300 + 50 * i) for i in range(12)]
+    batches = generator.split_commits_into_batches(details)
+    assert sum(len(batch) for batch in batches) == 12
+    for batch in batches:
+        prompt_tokens = len(render_batch_context(batch)) // CHARS_PER_TOKEN
+        assert len(batch) == 1 or prompt_tokens <= generator.batch_token_budget
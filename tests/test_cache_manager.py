@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the cache bounds of both storage engines"""
+
+import json
+import os
+import time
+import pytest
+from src.analysis_store import AnalysisStore
+from src.cache_manager import CacheManager
+from src.llm_cache import LLMResponseCache
+from src.sqlite_cache import SQLiteAnalysisStore, SQLiteCacheManager
+
+ENGINES = {
+    "json": (CacheManager, AnalysisStore),
+    "sqlite": (SQLiteCacheManager, SQLiteAnalysisStore),
+}
+
+
+def sha(i):
+    return f"{i:040x}"
+
+
+def age_records(store, shas, seconds):
+    """Move the last use of some analysis records into the past"""
+    used = time.time() - seconds
+    if isinstance(store, SQLiteAnalysisStore):
+        with store.db.transaction() as conn:
+            for record_sha in shas:
+                conn.execute(
+                    "UPDATE analyses SET accessed_at = ? WHERE sha = ?",
+                    (used, record_sha),
+                )
+    else:
+        for record_sha in shas:
+            os.utime(store._record_path(record_sha), (used, used))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_analyses_expire_with_the_cache_ttl(tmp_path, engine):
+    cache_class, store_class = ENGINES[engine]
+    store = store_class(str(tmp_path), "v1")
+    for i in range(4):
+        store.set(sha(i), {"category": "fixes", "title": f"Fix {i}"})
+    age_records(store, [sha(0), sha(1)], 3 * 86400)
+
+    cache = cache_class(str(tmp_path), max_bytes=0, ttl_seconds=86400)
+    cache.enforce_bounds()
+    assert sorted(store.lookup(sha(i) for i in range(4))) == [sha(2), sha(3)]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_analyses_count_in_the_size_budget(tmp_path, engine):
+    cache_class, store_class = ENGINES[engine]
+    store = store_class(str(tmp_path), "v1")
+    for i in range(10):
+        store.set(sha(i), {"category": "fixes", "title": "x" * 500})
+    # Oldest first, and a read keeps the oldest record
+    for i in range(10):
+        age_records(store, [sha(i)], 1000 - i)
+    store.get(sha(0))
+
+    cache = cache_class(str(tmp_path), max_bytes=3000, ttl_seconds=86400)
+    removed = cache.gc()
+    kept = store.lookup(sha(i) for i in range(10))
+    assert removed["analyses"] == 10 - len(kept)
+    assert sha(0) in kept and sha(1) not in kept
+    assert cache.stats()["analyses"] == len(kept)
+
+
+def test_gc_enforces_the_llm_cache_bounds(tmp_path, monkeypatch):
+    llm_cache = LLMResponseCache(str(tmp_path / "llm"), max_entries=10)
+    for i in range(6):
+        llm_cache.set(f"prompt {i}", "model", "cli", "response")
+
+    cache = CacheManager(str(tmp_path), max_bytes=0, ttl_seconds=86400)
+    monkeypatch.setenv("LLM_CACHE_MAX_ENTRIES", "4")
+    assert cache.gc()["llm_entries"] == 2
+    assert cache.stats()["llm"]["entries"] == 4
+
+
+def test_legacy_range_files_migrate_to_the_object_store(tmp_path):
+    cache = CacheManager(str(tmp_path), compress=False)
+    # Journal of details (one line per write, last one wins, torn tail)
+    journal = tmp_path / cache._generate_cache_key("v1", "v2", "details", "jsonl")
+    journal.write_text(
+        json.dumps({"id": sha(1), "detail": {"diff": "old"}})
+        + "\n"
+        + json.dumps({"id": sha(2), "detail": {"diff": "two"}})
+        + "\n"
+        + json.dumps({"id": sha(1), "detail": {"diff": "new"}})
+        + "\n"
+        + '{"id": "torn',
+        encoding="utf-8",
+    )
+    # Whole-file details from before the journal
+    whole = tmp_path / cache._generate_cache_key("v2", "v3", "details")
+    whole.write_text(
+        json.dumps({"details": {sha(3): {"diff": "three"}}}), encoding="utf-8"
+    )
+    # Commit lists with the full metadata instead of SHAs
+    commits = [
+        {"id": sha(i), "title": f"Commit {i}", "parent_ids": []} for i in (1, 2)
+    ]
+    listing = tmp_path / cache._generate_cache_key("v1", "v2", "commits")
+    listing.write_text(
+        json.dumps({"from_tag": "v1", "to_tag": "v2", "commits": commits}),
+        encoding="utf-8",
+    )
+
+    migrated = CacheManager(str(tmp_path))
+    assert not journal.exists() and not whole.exists()
+    assert migrated.load_commit_details("v1", "v2") == {
+        sha(1): {"diff": "new"},
+        sha(2): {"diff": "two"},
+    }
+    assert migrated.load_commit_details("v2", "v3", [sha(3)]) == {
+        sha(3): {"diff": "three"}
+    }
+    assert [c["title"] for c in migrated.load_commits_cache("v1", "v2")] == [
+        "Commit 1",
+        "Commit 2",
+    ]
+    assert "shas" in json.loads(listing.read_text(encoding="utf-8"))
+    assert not list(tmp_path.rglob("*.tmp"))
+
+    # A second start finds nothing left to migrate
+    CacheManager(str(tmp_path))
+    assert migrated.load_commit_details("v1", "v2")[sha(1)] == {"diff": "new"}
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the commit deduplication: patch ids, revert pairs and merges"""
+
+import os
+import subprocess
+import pytest
+from src.changelog_generator import ChangelogGenerator
+from src.commit_dedup import CommitDeduplicator, patch_id
+from src.local_git_source import LocalGitSource
+
+LINES = "".join(f"line {i}\n" for i in range(1, 21))
+
+
+def commit(sha, message="Change", parents=("p",)):
+    return {"id": sha, "message": message, "parent_ids": list(parents)}
+
+
+def file_diff(path, removed, added, start=1):
+    return {
+        "new_path": path,
+        "diff": f"@@ -{start},1 +{start},1 @@\n context\n-{removed}\n+{added}\n",
+    }
+
+
+def test_cherry_pick_has_the_same_patch_id():
+    original = [file_diff("app.py", "x = 1", "x = 2"), file_diff("b.py", "a", "b")]
+    # Other hunk positions, context, whitespace and file order
+    picked = [
+        file_diff("b.py", "a", "b", start=40),
+        {"new_path": "app.py", "diff": "@@ -7,2 +7,2 @@\n other\n-x  =  1\n+x = 2\n"},
+    ]
+    assert patch_id(original) == patch_id(picked)
+    assert patch_id(original) != patch_id([file_diff("app.py", "x = 1", "x = 3")])
+    assert patch_id(original) != patch_id([file_diff("other.py", "x = 1", "x = 2")])
+    assert patch_id([{"new_path": "empty.py", "diff": ""}]) is None
+
+
+def test_collapse_keeps_the_first_commit_of_each_patch():
+    details = [
+        {"full_id": "a", "diff_stats": {"patch_id": "p1"}},
+        {"full_id": "b", "diff_stats": {"patch_id": "p2"}},
+        {"full_id": "c", "diff_stats": {"patch_id": "p1"}},
+        {"full_id": "d", "diff_stats": {}},
+        {"full_id": "e", "diff_stats": {}},
+    ]
+    deduplicator = CommitDeduplicator()
+    kept = deduplicator.collapse_patches(details)
+    assert [detail["full_id"] for detail in kept] == ["a", "b", "d", "e"]
+    assert deduplicator.cherry_picks == 1
+
+
+def test_cherry_pick_trailer_needs_the_original_in_the_range():
+    original = "a" * 40
+    commits = [
+        commit(original, "Fix login"),
+        commit("b" * 40, f"Fix login\n\n(cherry picked from commit {original[:12]})"),
+        commit("c" * 40, f"Fix other\n\n(cherry picked from commit {'f' * 40})"),
+    ]
+    deduplicator = CommitDeduplicator()
+    kept = deduplicator.filter_commits(commits)
+    assert [c["id"] for c in kept] == [original, "c" * 40]
+    assert deduplicator.cherry_picks == 1
+
+
+def test_revert_pairs_cancel_out():
+    reverted = "a" * 40
+    revert = "b" * 40
+    commits = [
+        commit(reverted, "Add feature"),
+        commit(revert, f'Revert "Add feature"\n\nThis reverts commit {reverted}.'),
+        commit("c" * 40, f"Revert old\n\nThis reverts commit {'e' * 40}."),
+        commit("d" * 40, "Unrelated"),
+    ]
+    deduplicator = CommitDeduplicator()
+    kept = deduplicator.filter_commits(commits)
+    # A revert of a commit outside the range is a real change
+    assert [c["id"] for c in kept] == ["c" * 40, "d" * 40]
+    assert deduplicator.reverts == 2
+
+
+def test_reapplied_revert_is_kept():
+    original, revert, reapply = "a" * 40, "b" * 40, "c" * 40
+    commits = [
+        commit(original, "Add feature"),
+        commit(revert, f"Revert\n\nThis reverts commit {original}."),
+        commit(reapply, f"Reapply\n\nThis reverts commit {revert}."),
+    ]
+    kept = CommitDeduplicator().filter_commits(commits)
+    assert [c["id"] for c in kept] == [reapply]
+
+
+def test_only_pure_merges_are_dropped():
+    pure, evil = "a" * 40, "b" * 40
+    commits = [
+        commit("c" * 40, "Feature"),
+        commit(pure, "Merge branch 'feature'", parents=("1", "2")),
+        commit(evil, "Merge branch 'fix'", parents=("3", "4")),
+    ]
+    deduplicator = CommitDeduplicator()
+    kept = deduplicator.filter_commits(commits, pure_merges={pure})
+    assert [c["id"] for c in kept] == ["c" * 40, evil]
+    assert deduplicator.merges == 1
+
+
+@pytest.fixture(scope="module")
+def repo(tmp_path_factory):
+    """
+    Repository with a clean merge, a merge that adds a change, a
+    conflict-resolving merge and a cherry-pick
+    """
+    path = tmp_path_factory.mktemp("repo")
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="Dev",
+        GIT_AUTHOR_EMAIL="dev@example.com",
+        GIT_COMMITTER_NAME="Dev",
+        GIT_COMMITTER_EMAIL="dev@example.com",
+        GIT_CONFIG_GLOBAL=os.devnull,
+    )
+
+    def git(*args, check=True):
+        result = subprocess.run(
+            ["git", *args], cwd=path, env=env, capture_output=True, text=True
+        )
+        assert result.returncode == 0 or not check, result.stderr
+        return result.stdout.strip()
+
+    def write(name, content):
+        (path / name).write_text(content)
+        git("add", name)
+
+    def edit(name, old, new):
+        write(name, (path / name).read_text().replace(old, new))
+
+    git("init", "-q", "-b", "main")
+    write("app.txt", LINES)
+    write("lib.txt", LINES)
+    git("commit", "-qm", "Initial")
+
+    # Clean merge
+    git("checkout", "-qb", "feature")
+    edit("lib.txt", "line 3\n", "line 3 feature\n")
+    git("commit", "-qm", "Feature")
+    git("checkout", "-q", "main")
+    edit("app.txt", "line 18\n", "line 18 main\n")
+    git("commit", "-qm", "Main change")
+    git("merge", "-q", "--no-ff", "feature", "-m", "Merge feature")
+    clean = git("rev-parse", "HEAD")
+
+    # Merge that adds a change of its own
+    git("checkout", "-qb", "extra", "HEAD~1")
+    edit("lib.txt", "line 10\n", "line 10 extra\n")
+    git("commit", "-qm", "Extra")
+    git("checkout", "-q", "main")
+    git("merge", "-q", "--no-ff", "--no-commit", "extra")
+    write("new.txt", "added in the merge\n")
+    git("commit", "-qm", "Merge extra")
+    evil = git("rev-parse", "HEAD")
+
+    # Conflict resolved in the merge
+    git("checkout", "-qb", "conflict", "HEAD~1")
+    edit("app.txt", "line 5\n", "line 5 branch\n")
+    git("commit", "-qm", "Branch side")
+    git("checkout", "-q", "main")
+    edit("app.txt", "line 5\n", "line 5 main\n")
+    git("commit", "-qm", "Main side")
+    git("merge", "-q", "conflict", "-m", "Merge conflict", check=False)
+    assert git("diff", "--name-only", "--diff-filter=U") == "app.txt"
+    conflict = "<<<<<<< HEAD\nline 5 main\n=======\nline 5 branch\n>>>>>>> conflict\n"
+    edit("app.txt", conflict, "line 5 both\n")
+    git("commit", "-qm", "Merge conflict")
+    resolved = git("rev-parse", "HEAD")
+
+    # Cherry-pick without a trailer
+    git("checkout", "-qb", "side")
+    edit("lib.txt", "line 15\n", "line 15 fix\n")
+    git("commit", "-qm", "Fix on side")
+    original = git("rev-parse", "HEAD")
+    git("checkout", "-q", "main")
+    edit("app.txt", "line 1\n", "line 1 main\n")
+    git("commit", "-qm", "Move main")
+    git("cherry-pick", original)
+    picked = git("rev-parse", "HEAD")
+
+    return {
+        "path": path,
+        "git": git,
+        "clean": clean,
+        "evil": evil,
+        "resolved": resolved,
+        "original": original,
+        "picked": picked,
+    }
+
+
+def test_local_source_finds_pure_merges(repo):
+    source = LocalGitSource(str(repo["path"]))
+    merges = [repo["clean"], repo["evil"], repo["resolved"]]
+    assert source.pure_merges(merges) == {repo["clean"]}
+
+
+def test_local_cherry_pick_collapses(repo):
+    source = LocalGitSource(str(repo["path"]))
+    commits = source.list_commits(repo["resolved"], "side") + source.list_commits(
+        repo["resolved"], "main"
+    )
+    by_id = {c["id"]: c for c in commits}
+    details = source.get_commit_details(
+        [by_id[repo["original"]], by_id[repo["picked"]]]
+    )
+    assert (
+        details[repo["original"]]["diff_stats"]["patch_id"]
+        == details[repo["picked"]]["diff_stats"]["patch_id"]
+    )
+
+
+class GitBackedProject:
+    """The two GitLab API calls of _is_pure_merge, answered by git"""
+
+    def __init__(self, git):
+        self.git = git
+
+    def repository_merge_base(self, refs):
+        return {"id": self.git("merge-base", *refs)}
+
+    def repository_compare(self, from_ref, to_ref):
+        diffs = []
+        for chunk in self.git("diff", from_ref, to_ref).split("diff --git ")[1:]:
+            header, _, body = chunk.partition("\n@@")
+            path = header.split("\n", 1)[0].split(" b/", 1)[1]
+            diffs.append({"new_path": path, "diff": "@@" + body})
+        return {"diffs": diffs}
+
+
+class Hydrator:
+    def __init__(self):
+        self.calls = 0
+
+    def count_call(self):
+        self.calls += 1
+
+
+class FailingProject:
+    def repository_merge_base(self, refs):
+        raise RuntimeError("GitLab is down")
+
+
+@pytest.fixture
+def generator(repo):
+    """Just the state _is_pure_merge uses"""
+    generator = ChangelogGenerator.__new__(ChangelogGenerator)
+    generator.project = GitBackedProject(repo["git"])
+    generator.hydrator = Hydrator()
+    return generator
+
+
+def merge_commit(repo, sha):
+    parents = repo["git"]("rev-parse", f"{sha}^1", f"{sha}^2").split()
+    return {"id": sha, "parent_ids": parents}
+
+
+def test_gitlab_pure_merge(repo, generator):
+    assert generator._is_pure_merge(merge_commit(repo, repo["clean"]))
+    assert generator.hydrator.calls == 3
+
+
+def test_gitlab_merges_with_changes_are_kept(repo, generator):
+    assert not generator._is_pure_merge(merge_commit(repo, repo["evil"]))
+    assert not generator._is_pure_merge(merge_commit(repo, repo["resolved"]))
+
+
+def test_gitlab_merge_is_kept_when_unknown(repo, generator):
+    octopus = {"id": repo["clean"], "parent_ids": ["a", "b", "c"]}
+    assert not generator._is_pure_merge(octopus)
+    generator.project = FailingProject()
+    assert not generator._is_pure_merge(merge_commit(repo, repo["clean"]))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the ignore patterns of the diff selection"""
+
+import pytest
+from src.diff_selection import DiffSelector
+
+
+@pytest.fixture
+def selector():
+    return DiffSelector(ignore_patterns=None, byte_budget=4000)
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "src/build/compiler.py",
+        "internal/build/plan.go",
+        "lib/vendor/auth.py",
+        "app/dist/index.ts",
+        "pkg/third_party/client.go",
+        "src/third_party.py",
+        "docs/build.md",
+        "src/main.py",
+    ],
+)
+def test_nested_source_paths_are_kept(selector, path):
+    assert not selector.is_ignored(path)
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "build/output.js",
+        "dist/bundle.js",
+        "vendor/github.com/pkg/errors/errors.go",
+        "third_party/zlib/inflate.c",
+        "node_modules/left-pad/index.js",
+        "web/node_modules/react/index.js",
+        "package-lock.json",
+        "frontend/yarn.lock",
+        "static/js/app.min.js",
+        "src/__snapshots__/view.test.js.snap",
+        "assets/logo.png",
+        "api/v1/service.pb.go",
+    ],
+)
+def test_generated_and_vendored_paths_are_ignored(selector, path):
+    assert selector.is_ignored(path)
+
+
+def test_binary_diffs_are_ignored(selector):
+    assert selector.is_ignored("assets/data.bin", "Binary files a/x and b/x differ")
+
+
+def test_custom_patterns():
+    selector = DiffSelector(ignore_patterns=("*.csv", "fixtures/**"), byte_budget=0)
+    assert selector.is_ignored("data/report.csv")
+    assert selector.is_ignored("fixtures/users/admins.json")
+    assert not selector.is_ignored("tests/fixtures/users.json")
+
+
+def test_disabled_selector_ignores_nothing():
+    selector = DiffSelector(ignore_patterns=None, enabled=False)
+    assert not selector.is_ignored("package-lock.json")
+
+
+def test_fingerprint_follows_the_selection_settings(selector):
+    assert selector.fingerprint() == DiffSelector(byte_budget=4000).fingerprint()
+    for other in (
+        DiffSelector(byte_budget=1000),
+        DiffSelector(ignore_patterns=("*.csv",), byte_budget=4000),
+        DiffSelector(byte_budget=4000, enabled=False),
+    ):
+        assert other.fingerprint() != selector.fingerprint()
+
+
+def test_settings_default_to_the_environment(monkeypatch):
+    monkeypatch.setenv("DIFF_BYTE_BUDGET", "250")
+    monkeypatch.setenv("DIFF_IGNORE_PATTERNS", "*.csv, fixtures/**")
+    selector = DiffSelector()
+    assert selector.byte_budget == 250
+    assert selector.is_ignored("data/report.csv")
+    assert selector.is_ignored("fixtures/users.json")
+    assert selector.is_ignored("package-lock.json")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the shared request limit of the async Gemini API backend"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError
+from types import SimpleNamespace
+
+import pytest
+from src.gemini_api_backend import GeminiAPIBackend
+
+
+class FakeModels:
+    """Async models API answering after an optional delay"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def generate_content(self, model, contents, config):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(parsed={"content": contents.upper()}, text=contents)
+
+
+class CountingSemaphore(threading.Semaphore):
+    """Semaphore counting its releases"""
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.releases = 0
+
+    def release(self, n=1):
+        self.releases += n
+        super().release(n)
+
+
+@pytest.fixture
+def make_backend():
+    backends = []
+
+    def make(shared_limit, delay=0.0):
+        models = FakeModels(delay)
+        client = SimpleNamespace(aio=SimpleNamespace(models=models))
+        backend = GeminiAPIBackend(client, "model", shared_limit=shared_limit)
+        backends.append(backend)
+        return backend, models
+
+    yield make
+    for backend in backends:
+        backend.close()
+
+
+def submit(backend, coro):
+    return asyncio.run_coroutine_threadsafe(coro, backend._loop)
+
+
+def test_requests_hold_and_return_the_shared_slot(make_backend):
+    shared_limit = threading.Semaphore(1)
+    backend, models = make_backend(shared_limit)
+    assert backend.run(backend.generate_many(["a", "b", "c"])) == ["A", "B", "C"]
+    assert models.calls == 3
+    assert shared_limit.acquire(blocking=False)
+
+
+def test_cancelled_waiter_returns_the_slot_it_gets_later(make_backend):
+    shared_limit = CountingSemaphore(1)
+    backend, models = make_backend(shared_limit)
+
+    # Another backend holds the only slot while this request waits for it
+    shared_limit.acquire()
+    waiting = submit(backend, backend.generate("prompt"))
+    time.sleep(0.1)
+    waiting.cancel()
+    with pytest.raises(CancelledError):
+        waiting.result(timeout=1)
+
+    # The waiting thread takes the slot once freed and must hand it back
+    shared_limit.release()
+    deadline = time.monotonic() + 2
+    while shared_limit.releases < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert shared_limit.releases == 2
+    assert shared_limit.acquire(blocking=False)
+    assert models.calls == 0
+
+
+def test_cancelled_request_returns_the_slot(make_backend):
+    shared_limit = threading.Semaphore(1)
+    backend, models = make_backend(shared_limit, delay=10)
+    running = submit(backend, backend.generate("prompt"))
+    while not models.calls:
+        time.sleep(0.01)
+    running.cancel()
+    assert shared_limit.acquire(timeout=2)
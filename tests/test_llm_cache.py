@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the on-disk cache of Gemini responses"""
+
+from src.llm_cache import LLMResponseCache
+
+
+def counting_gc(monkeypatch, cache):
+    calls = []
+    gc = cache.gc
+
+    def wrapped():
+        calls.append(1)
+        return gc()
+
+    monkeypatch.setattr(cache, "gc", wrapped)
+    return calls
+
+
+def test_round_trip_and_invalidate(tmp_path):
+    cache = LLMResponseCache(str(tmp_path), max_entries=10)
+    assert cache.get("prompt", "model", "cli") is None
+    cache.set("prompt", "model", "cli", "response")
+    assert cache.get("prompt", "model", "cli") == "response"
+    assert cache.get("prompt", "other model", "cli") is None
+    cache.invalidate("prompt", "model", "cli")
+    assert cache.get("prompt", "model", "cli") is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_writes_collect_only_past_the_slack(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path), max_entries=100)
+    calls = counting_gc(monkeypatch, cache)
+    for i in range(300):
+        cache.set(f"prompt {i}", "model", "cli", "response")
+        assert cache.stats()["entries"] <= 110
+    # Each collection frees room for the slack before the next one
+    assert 0 < len(calls) <= 300 // 10
+
+    cache.gc()
+    assert cache.stats()["entries"] == 100
+    assert cache.get("prompt 299", "model", "cli") == "response"
+
+
+def test_rewrites_do_not_trigger_collections(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path), max_entries=2)
+    calls = counting_gc(monkeypatch, cache)
+    for _ in range(20):
+        cache.set("prompt", "model", "cli", "response")
+    assert calls == []
+
+
+def test_estimate_starts_from_the_stored_entries(tmp_path, monkeypatch):
+    earlier = LLMResponseCache(str(tmp_path), max_entries=1000)
+    for i in range(20):
+        earlier.set(f"prompt {i}", "model", "cli", "response")
+
+    cache = LLMResponseCache(str(tmp_path), max_entries=10)
+    cache.set("another prompt", "model", "cli", "response")
+    assert cache.stats()["entries"] == 10
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the command line entry point"""
+
+import sys
+import main
+
+
+class FakeGenerator:
+    """Records the options main() builds instead of generating anything"""
+
+    options = None
+
+    def __init__(self, **options):
+        FakeGenerator.options = options
+
+    def generate(self, from_tag, to_tag):
+        pass
+
+    def export_metrics(self, report_path, prometheus_path):
+        pass
+
+
+def test_env_file_is_loaded_before_the_configuration(monkeypatch):
+    monkeypatch.delenv("DIFF_MAX_FILES", raising=False)
+    monkeypatch.delenv("DIFF_BYTE_BUDGET", raising=False)
+    monkeypatch.delenv("DIFF_IGNORE_PATTERNS", raising=False)
+
+    def load_dotenv():
+        monkeypatch.setenv("DIFF_MAX_FILES", "3")
+        monkeypatch.setenv("DIFF_BYTE_BUDGET", "123")
+        monkeypatch.setenv("DIFF_IGNORE_PATTERNS", "*.csv")
+
+    monkeypatch.setattr(main, "load_dotenv", load_dotenv)
+    monkeypatch.setattr(main, "ChangelogGenerator", FakeGenerator)
+    monkeypatch.setattr(sys, "argv", ["main.py", "--from-tag", "v1", "--to-tag", "v2"])
+    main.main()
+
+    retention = FakeGenerator.options["diff_retention"]
+    assert retention.max_files == 3
+    assert retention.selector.byte_budget == 123
+    assert retention.selector.is_ignored("data/report.csv")
+
+
+def test_multi_project_limits_come_from_the_env_file(monkeypatch):
+    for name in (
+        "MULTI_PROJECT_WORKERS",
+        "GITLAB_GLOBAL_CONCURRENCY",
+        "GEMINI_GLOBAL_CONCURRENCY",
+    ):
+        monkeypatch.delenv(name, raising=False)
+
+    def load_dotenv():
+        monkeypatch.setenv("MULTI_PROJECT_WORKERS", "7")
+        monkeypatch.setenv("GITLAB_GLOBAL_CONCURRENCY", "5")
+        monkeypatch.setenv("GEMINI_GLOBAL_CONCURRENCY", "3")
+
+    runners = []
+
+    class Runner(main.MultiProjectRunner):
+        def run(self, combined_summary=False):
+            runners.append(self)
+            return []
+
+    monkeypatch.setattr(main, "load_dotenv", load_dotenv)
+    monkeypatch.setattr(main, "MultiProjectRunner", Runner)
+    monkeypatch.setattr(sys, "argv", ["main.py", "--projects", "101,102"])
+    main.main()
+
+    (runner,) = runners
+    assert runner.max_projects == 7
+    assert runner.gitlab_concurrency == 5
+    assert runner.gemini_concurrency == 3
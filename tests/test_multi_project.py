@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the project specs of the multi-project mode"""
+
+from pathlib import Path
+import pytest
+from src.multi_project import MultiProjectRunner, load_project_specs, project_dir
+
+
+def test_project_ids_are_validated():
+    specs = load_project_specs("101, group/api")
+    assert [spec["id"] for spec in specs] == ["101", "group/api"]
+    with pytest.raises(ValueError, match="Invalid project id"):
+        load_project_specs("101,../../escaped_dir")
+
+
+def test_namespace_paths_get_one_cache_directory():
+    key = MultiProjectRunner.project_key({"id": "group/sub/api"})
+    assert key == "project_group%2Fsub%2Fapi"
+    assert project_dir(Path(".cache") / "projects", key).name == key
+
+
+def test_project_dir_stays_inside_its_root(tmp_path):
+    assert project_dir(tmp_path, "api") == tmp_path / "api"
+    for name in ("..", "../other", "api/nested", str(tmp_path.parent)):
+        with pytest.raises(ValueError):
+            project_dir(tmp_path, name)
+
+
+def test_runner_refuses_specs_escaping_the_results_directory(tmp_path):
+    with pytest.raises(ValueError):
+        MultiProjectRunner(
+            [{"id": "1", "name": "../escaped"}],
+            max_projects=1,
+            gitlab_concurrency=1,
+            gemini_concurrency=1,
+            results_dir=str(tmp_path),
+        )
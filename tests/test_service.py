@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the service HTTP API"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+import pytest
+from src.service import ChangelogService, make_handler
+
+
+@pytest.fixture
+def service(tmp_path):
+    # Workers are not started: submitted jobs stay queued
+    return ChangelogService(
+        workers=1,
+        gitlab_concurrency=1,
+        gemini_concurrency=1,
+        results_dir=str(tmp_path / "results"),
+    )
+
+
+@pytest.fixture
+def api(service, monkeypatch):
+    """Base URL of the service API, with SERVICE_WEBHOOK_TOKEN set"""
+    monkeypatch.setenv("SERVICE_WEBHOOK_TOKEN", "secret")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service))
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, body, headers=None):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json", **(headers or {})},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_jobs_require_the_token(api, service):
+    status, body = post(f"{api}/jobs", {"project": 123, "to_tag": "v1"})
+    assert status == 401
+    assert service.list_jobs() == []
+
+    status, _ = post(
+        f"{api}/jobs", {"project": 123, "to_tag": "v1"}, {"X-Gitlab-Token": "wrong"}
+    )
+    assert status == 401
+
+
+def test_jobs_accept_the_token(api, service):
+    status, body = post(
+        f"{api}/jobs", {"project": 123, "to_tag": "v1"}, {"X-Gitlab-Token": "secret"}
+    )
+    assert status == 202
+    assert body["spec"]["id"] == "123"
+
+    status, _ = post(
+        f"{api}/jobs",
+        {"project": 456, "to_tag": "v1"},
+        {"Authorization": "Bearer secret"},
+    )
+    assert status == 202
+    assert len(service.list_jobs()) == 2
+
+
+def test_webhooks_require_the_token(api):
+    payload = {"object_kind": "tag_push", "checkout_sha": "abc", "ref": "refs/tags/v1"}
+    status, _ = post(f"{api}/webhooks/gitlab", dict(payload, project_id=1))
+    assert status == 401
+
+
+@pytest.mark.parametrize(
+    "project",
+    ["../../escaped_dir", "..", "0", "-1", "group/../other", "/etc", "a b", "group/"],
+)
+def test_unsafe_project_ids_are_rejected(api, service, tmp_path, project):
+    status, body = post(
+        f"{api}/jobs",
+        {"project": project, "to_tag": "v1"},
+        {"X-Gitlab-Token": "secret"},
+    )
+    assert status == 400
+    assert "Invalid project id" in body["error"]
+    assert service.list_jobs() == []
+    assert not (tmp_path / "escaped_dir").exists()
+
+
+@pytest.mark.parametrize("project", [123, "123", "group/project", "group/sub/project"])
+def test_project_ids_and_paths_are_accepted(service, project):
+    spec = service.validate_spec({"id": project, "to_tag": "v1"})
+    key = service.project_key(spec)
+    assert "/" not in key
+    assert key.startswith("project_")
+
+
+def test_unsafe_names_are_rejected(service):
+    with pytest.raises(ValueError, match="Invalid name"):
+        service.validate_spec({"id": 1, "name": "../escaped"})
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the map-reduce condensing of the summary context"""
+
+from src.prompt_renderer import estimate_tokens, render_summary_context
+from src.run_metrics import RunMetrics
+from src.summary_reducer import MAX_REDUCE_LEVELS, REDUCE_MAX_ITEMS, SummaryReducer
+
+BUDGET = 1000
+
+
+def analyzed(features=30, fixes=2):
+    commits = [
+        {
+            "id": f"{i:08x}",
+            "category": "features",
+            "title": f"Feature {i}",
+            "description": "Adds a capability " * 10,
+            "technical_details": "Implemented in the service layer " * 5,
+        }
+        for i in range(features)
+    ]
+    commits += [
+        {"id": f"f{i:07x}", "category": "fixes", "title": f"Fix {i}"}
+        for i in range(fixes)
+    ]
+    return [{"commits": commits}]
+
+
+class FakeGemini:
+    """complete_many recording every call"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+
+    def __call__(self, prompts):
+        self.calls.append(prompts)
+        return [self.respond(prompt) for prompt in prompts]
+
+
+def reducer(gemini, metrics=None):
+    return SummaryReducer(
+        gemini, token_budget=BUDGET, metrics=metrics, show_spinners=False
+    )
+
+
+def test_small_summary_needs_no_calls():
+    gemini = FakeGemini(lambda prompt: "unused")
+    commits = analyzed(features=2)
+    assert reducer(gemini).reduce(commits) == render_summary_context(commits)
+    assert gemini.calls == []
+
+
+def test_one_pass_when_the_condensed_parts_fit():
+    gemini = FakeGemini(lambda prompt: "### Condensed\n**Description:** Short\n")
+    metrics = RunMetrics()
+    commits = analyzed()
+    assert estimate_tokens(len(render_summary_context(commits))) > BUDGET
+
+    context = reducer(gemini, metrics).reduce(commits)
+    assert len(gemini.calls) == 1
+    # Every chunk of the large category is condensed at once, within budget
+    assert len(gemini.calls[0]) >= 2
+    assert all(
+        estimate_tokens(len(prompt)) <= BUDGET * 1.1 for prompt in gemini.calls[0]
+    )
+    assert metrics.to_dict()["counters"]["summary_reduce_calls"] == len(gemini.calls[0])
+    assert estimate_tokens(len(context)) <= BUDGET
+    # Categories with few commits are left as they are
+    assert "### Fix 0" in context and "### Feature 0" not in context
+
+
+def test_small_categories_are_not_condensed():
+    gemini = FakeGemini(lambda prompt: "### Condensed\n")
+    reducer(gemini).reduce(analyzed(features=30, fixes=REDUCE_MAX_ITEMS))
+    assert all("categoría features" in prompt for prompt in gemini.calls[0])
+
+
+def test_stops_after_the_last_level_and_cuts_to_fit():
+    # Condensed parts never shrink
+    gemini = FakeGemini(lambda prompt: "### Still long\n" + "x" * 3000 + "\n")
+    context = reducer(gemini).reduce(analyzed(features=60))
+    assert 1 <= len(gemini.calls) <= MAX_REDUCE_LEVELS
+    assert estimate_tokens(len(context)) <= BUDGET
+    assert "## FEATURES" in context and "## FIXES" in context
+
+
+def test_failed_calls_keep_the_titles():
+    def fail(prompt):
+        return RuntimeError("quota exceeded")
+
+    gemini = FakeGemini(fail)
+    context = reducer(gemini).reduce(analyzed())
+    assert len(gemini.calls) <= MAX_REDUCE_LEVELS
+    assert estimate_tokens(len(context)) <= BUDGET
+    assert "### Feature 0" in context
+    assert "Adds a capability" not in context
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Tests for the full sync interval of the tag catalogue"""
+
+import time
+from src.tag_catalogue import DEFAULT_FULL_SYNC_HOURS, TagCatalogue
+
+
+def test_interval_is_read_when_the_catalogue_is_created(monkeypatch):
+    monkeypatch.setenv("TAG_FULL_SYNC_HOURS", "2")
+    assert TagCatalogue().full_sync_seconds == 2 * 3600
+    monkeypatch.setenv("TAG_FULL_SYNC_HOURS", "0.5")
+    assert TagCatalogue().full_sync_seconds == 1800
+
+
+def test_invalid_interval_falls_back_to_the_default(monkeypatch):
+    for value in ("daily", "-3", "nan"):
+        monkeypatch.setenv("TAG_FULL_SYNC_HOURS", value)
+        assert TagCatalogue().full_sync_seconds == DEFAULT_FULL_SYNC_HOURS * 3600
+
+
+def test_full_sync_due_after_the_interval(tmp_path, monkeypatch):
+    monkeypatch.setenv("TAG_FULL_SYNC_HOURS", "1")
+    catalogue = TagCatalogue([("v1", "a" * 40)], path=tmp_path / "tags.json")
+    assert catalogue.full_sync_due
+    catalogue.last_full_sync = time.time() - 1800
+    assert not catalogue.full_sync_due
+    catalogue.save()
+
+    monkeypatch.setenv("TAG_FULL_SYNC_HOURS", "0.25")
+    assert TagCatalogue.load(tmp_path / "tags.json").full_sync_due